@@ -5,14 +5,19 @@ import os
 import re
 import json
 import csv
+import math
+import struct
+import itertools
 import asyncio
 import logging
 import subprocess
 from logging.handlers import RotatingFileHandler
-from collections import deque
+from collections import deque, namedtuple
+from operator import itemgetter
 from dataclasses import dataclass, field
+from decimal import Decimal
 from pathlib import Path
-from typing import Deque, Optional, Set, List
+from typing import Deque, Dict, Optional, Set, List, Union
 
 import aiofiles
 import serial
@@ -20,11 +25,18 @@ from serial import SerialException
 import serial.tools.list_ports
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Body, Request
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 from datetime import datetime, timezone
 
+# Optional: orjson encodes telemetry several times faster than the json module.
+# Used automatically when installed (pip install orjson).
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # ===================== CONFIGURATION =====================
 # Team ID 
 TEAM_ID = 1043
@@ -63,6 +75,26 @@ XBEE_PRESETS = [
 # If False, the web browser tries to handle it directly (not recommended here).
 USE_SERVER_SERIAL = True
 
+# How the server drives the radio when USE_SERVER_SERIAL is True:
+#   "thread"  — a dedicated blocking reader thread (works everywhere).
+#   "asyncio" — the port's fd is registered with the event loop (loop.add_reader)
+#               and frames are decoded right inside the loop, with no thread hop
+#               per packet. POSIX only; falls back to "thread" on Windows.
+# Override at startup without editing this file: GS_SERIAL_TRANSPORT=asyncio
+SERIAL_TRANSPORT = os.environ.get("GS_SERIAL_TRANSPORT", "thread").strip().lower()
+
+# Telemetry packets are built as plain typed tuples (TelemetryRecord) on the hot
+# path. Strict mode additionally validates every packet against the pydantic
+# Telemetry model — slower, but useful while debugging a new
+# telemetry_config.json. Enable at startup with GS_TELEMETRY_STRICT=1.
+TELEMETRY_STRICT = os.environ.get("GS_TELEMETRY_STRICT", "0").strip() == "1"
+
+# Extra ground radios, each an XBee on its own serial port (second antenna for
+# diversity, or a second ground unit). Every one gets its own reader and
+# reconnect logic and feeds the same telemetry pipeline; uplinks go out on the
+# first connected radio. Comma-separated: GS_EXTRA_RADIOS=/dev/ttyUSB1,/dev/ttyUSB2
+EXTRA_RADIO_PORTS = [p.strip() for p in os.environ.get("GS_EXTRA_RADIOS", "").split(",") if p.strip()]
+
 # These lines set up where the program looks for files.
 # It creates folders for 'data' (CSV files), 'logs', and 'ui' (website files) if they don't exist.
 ROOT_DIR = Path(__file__).resolve().parent
@@ -80,13 +112,133 @@ CSV_CURRENT = DATA_DIR / f"Flight_{TEAM_ID:04}_.csv"
 # Only 115200 is supported — XBee 900HP default for this mission.
 BAUD_PRESETS = [115200]
 
+# Telemetry lines waiting between the serial reader and the event loop. If the
+# loop falls this far behind, the oldest lines are dropped (and counted in
+# /api/health) rather than letting memory grow without limit.
+TELEMETRY_HANDOFF_DEPTH = 1000
+
+# Batch ingest (/api/ingest/batch, /ws/ingest): largest accepted upload, and how
+# many lines go through the pipeline between yields to the event loop so a big
+# backlog upload doesn't stall live telemetry.
+INGEST_MAX_BYTES = 16 * 1024 * 1024
+INGEST_CHUNK_LINES = 1000
+
+# ---- WebSocket fan-out ----
+# Every browser has its own send queue and sender task (WsClient), so a tablet
+# on weak Wi-Fi only delays itself. Telemetry is latest-value: at most one
+# unsent telemetry message is kept per client, and a newer packet replaces it.
+# Control messages queue up to WS_CLIENT_CONTROL_DEPTH. A client that overflows
+# that, or whose send has been stuck for WS_SEND_STALL_S, is disconnected (the
+# dashboard reconnects on its own).
+WS_CLIENT_CONTROL_DEPTH = 256
+WS_SEND_STALL_S = 10.0
+# Compact binary telemetry for remote viewers (ngrok, cellular): a client that
+# offers this WebSocket subprotocol gets a schema message once, then packed,
+# delta-encoded frames instead of ~1 KB of JSON per packet (see WsBinarySchema).
+# Clients that don't ask for it keep getting JSON.
+WS_BINARY_PROTOCOL = "gs.telemetry.bin.v1"
+# A client may ask for a lower telemetry rate ({"type": "subscribe", "rate_hz": 2}):
+# it then gets one message per window with the last packet plus the min/max of
+# every numeric field over the window, so a slow display still sees the apogee
+# peak. Windows are closed by the next packet, or by a check this often when
+# the downlink goes quiet.
+WS_DECIMATION_TICK_S = 0.1
+# Every message broadcast on /ws/telemetry carries a "seq" number, and the last
+# WS_REPLAY_DEPTH of them are kept (~100 s of telemetry at 20 Hz). A browser that
+# reconnects with ?since=<last seq>&epoch=<stream epoch> gets everything it
+# missed in one "replay" message instead of re-downloading /api/logs.
+WS_REPLAY_DEPTH = 2000
+
+# ---- Packet sequence tracking (packet_count) ----
+# The last SEQ_WINDOW packet numbers are remembered, so a packet that arrives
+# late (mesh reroute) is not counted as lost and a DigiMesh retry duplicate is
+# recognised and dropped before it is parsed or shown twice. Differences are
+# taken modulo SEQ_MODULUS, so a 16-bit packet counter may wrap. A jump back
+# of more than SEQ_REORDER_MAX is a CanSat reboot (counter reset), not a late
+# packet or a retry, even if it lands on a number still in the window.
+SEQ_WINDOW = 256
+SEQ_REORDER_MAX = 32        # furthest back a packet may arrive late (mesh reroute, retry)
+SEQ_MODULUS = 65536
+SEQ_BURST_HISTORY = 32      # recent loss bursts kept for /api/health
+
+# ---- RSSI (ATDB) sampling policy ----
+# Each ATDB query is an extra serial write plus an extra 0x88 response, so the
+# GCS does not ask after every packet. Modes (changeable at /api/rssi/policy):
+#   "every_n"     — query after every Nth telemetry packet (RSSI_EVERY_N)
+#   "max_hz"      — query at most RSSI_MAX_HZ times per second
+#   "on_loss"     — query only when the packet-loss rate is rising, plus a
+#                   refresh at least every RSSI_MAX_AGE_S so the value never goes stale
+#   "every_packet"— the old behaviour: one query per telemetry packet
+# The latest value rides along in the next telemetry broadcast (gs_rssi_dbm).
+RSSI_POLL_MODE = "max_hz"
+RSSI_EVERY_N = 5
+RSSI_MAX_HZ = 1.0
+RSSI_MAX_AGE_S = 5.0
+
+# Uplink delivery tracking: every Transmit Request gets its own frame ID so the
+# matching 0x8B Transmit Status can be paired with the command it acknowledges.
+# No receipt within this many seconds counts as "not delivered (timeout)".
+UPLINK_ACK_TIMEOUT_S = 5.0
+
+# Uplink priority lanes, highest priority first, with their depth limits.
+# Operator commands (/api/command, SIM,ENABLE/ACTIVATE) always go out before
+# anything waiting in the bulk lane (the 1 Hz SIMP stream), so a backlog of
+# SIMP lines can never hold up a CX,OFF or SIM,DISABLE.
+UPLINK_LANES = (("operator", 50), ("bulk", 100))
+
+# ---- Flight CSV group commit ----
+# Raw telemetry lines are buffered in memory and appended to the open flight CSV
+# in one write once CSV_FLUSH_BYTES are waiting or the oldest line is
+# CSV_FLUSH_INTERVAL_S old — so a line reaches the OS within a quarter second.
+# CSV_FSYNC_POLICY decides when the data is also forced onto the disk itself:
+#   "always"   — fsync after every flush (safest, slowest on an SD card)
+#   "interval" — fsync at most every CSV_FSYNC_INTERVAL_S
+#   "never"    — leave it to the OS
+CSV_FLUSH_INTERVAL_S = 0.25
+CSV_FLUSH_BYTES = 64 * 1024
+CSV_FSYNC_POLICY = "interval"
+CSV_FSYNC_INTERVAL_S = 1.0
+
+# ---- Raw frame journal ----
+# Every API frame on the radio link (RX and TX, including bad-checksum and
+# unknown frames) is appended, exactly as it went over the wire, to
+# logs/frames/frames_*.gsj so a flight can be replayed byte-for-byte later.
+# Writes are batched by a background thread every FRAME_JOURNAL_FLUSH_S; the
+# serial reader only appends to an in-memory queue. Files rotate at
+# FRAME_JOURNAL_MAX_BYTES and only the newest FRAME_JOURNAL_KEEP are kept.
+# Disable at startup with GS_FRAME_JOURNAL=0.
+FRAME_JOURNAL_ENABLED = os.environ.get("GS_FRAME_JOURNAL", "1").strip() != "0"
+FRAME_JOURNAL_DIR = LOG_DIR / "frames"
+FRAME_JOURNAL_MAX_BYTES = 32 * 1024 * 1024
+FRAME_JOURNAL_KEEP = 50
+FRAME_JOURNAL_FLUSH_S = 0.5
+FRAME_JOURNAL_MAX_PENDING = 50000   # frames queued for disk before new ones are dropped
+
+# ---- Replay (POST /api/replay) ----
+# A frame journal or a raw byte capture can be pushed through the live decode
+# -> telemetry pipeline, into its own CSV (Flight_1043_replay.csv) and never to
+# the uplink tracker or the live dashboards. With ?broadcast=true the packets also
+# go through a hand-off ring of their own and out to the replay-only channel
+# (/ws/telemetry?src=replay), numbered apart from the live stream. Raw captures
+# carry no timestamps, so in real-time mode they are paced at the serial line
+# rate of REPLAY_RAW_BAUD.
+REPLAY_CHUNK_BYTES = 4096       # bytes per decoder feed, like one bulk serial read
+REPLAY_RAW_BAUD = DEFAULT_BAUD
+
 # ===================== TELEMETRY CONFIG (Dynamic Loading) =====================
 # We load the structure of the CSV from 'telemetry_config.json'
 # This allows you to change the order of columns without changing the code.
 # [REQ-64] Generate csv files of all sensor data
 # [REQ-70] Display mission time, temperature, GPS, packet count, state
+TELEMETRY_CONFIG_PATH = ROOT_DIR / "telemetry_config.json"
+
+# The file is watched while the server runs: a saved edit is recompiled in the
+# background and swapped in between two packets — no restart, the radio link and
+# browsers stay connected. Checked every TELEMETRY_CONFIG_POLL_S seconds.
+TELEMETRY_CONFIG_POLL_S = 1.0
+
 def load_telemetry_config():
-    config_path = ROOT_DIR / "telemetry_config.json"
+    config_path = TELEMETRY_CONFIG_PATH
     if not config_path.exists():
         print("Warning: telemetry_config.json not found, using built-in default.")
         return [
@@ -108,8 +260,8 @@ def load_telemetry_config():
             { "csv_header": "ACCEL_Y",       "internal_key": "accel_y_dps2",   "type": "float" },
             { "csv_header": "GPS_TIME",      "internal_key": "gps_time",       "type": "str"   },
             { "csv_header": "GPS_ALTITUDE",  "internal_key": "gps_altitude_m", "type": "float" },
-            { "csv_header": "GPS_LATITUDE",  "internal_key": "gps_lat",        "type": "float" },
-            { "csv_header": "GPS_LONGITUDE", "internal_key": "gps_lon",        "type": "float" },
+            { "csv_header": "GPS_LATITUDE",  "internal_key": "gps_lat",        "type": "float", "ws": "f64" },
+            { "csv_header": "GPS_LONGITUDE", "internal_key": "gps_lon",        "type": "float", "ws": "f64" },
             { "csv_header": "GPS_SATS",      "internal_key": "gps_sats",       "type": "int"   },
             { "csv_header": "CMD_ECHO",      "internal_key": "cmd_echo",       "type": "str"   },
             { "csv_header": "ARM_STATE",     "internal_key": "arm_state",      "type": "str"   },
@@ -120,11 +272,111 @@ def load_telemetry_config():
     with open(config_path, "r") as f:
         return json.load(f)
 
-TELEMETRY_CONFIG = load_telemetry_config()
+def split_telemetry_config(doc) -> tuple:
+    """
+    telemetry_config.json is either the plain column list, or an object
+    {"fields": [...], "packed": {...}} when the CanSat may also send packed
+    binary telemetry (see PackedTelemetryDecoder). Returns (fields, packed).
+    """
+    if isinstance(doc, dict):
+        return doc.get("fields", []), doc.get("packed")
+    return doc, None
+
+TELEMETRY_CONFIG, TELEMETRY_PACKED = split_telemetry_config(load_telemetry_config())
 
 # Build the CSV Header string directly from the config (only what the CanSat sends)
 CSV_HEADER = ",".join([item.get("csv_header", "") for item in TELEMETRY_CONFIG])
 
+
+def _conv_int(v: str) -> int:
+    try:
+        return int(v)       # int() ignores surrounding whitespace itself
+    except ValueError:
+        return 0
+
+def _conv_float(v: str) -> float:
+    try:
+        return float(v)
+    except ValueError:
+        return 0.0
+
+def _conv_str(v: str) -> str:
+    return v.strip()
+
+# Config "type" -> converter. Empty or malformed values become 0 / 0.0 / "".
+_FIELD_CONVERTERS = {"int": _conv_int, "float": _conv_float, "str": _conv_str}
+
+
+class TelemetryParser:
+    """
+    TELEMETRY_CONFIG compiled once into what parsing a line needs: the field
+    keys, one converter per field and the minimum field count, so nothing is
+    looked up or re-derived per packet. Lines without a double quote (every
+    line the CanSat sends) are split with str.split; only quoted lines go
+    through the csv module.
+    """
+
+    def __init__(self, config: list, record_fields: tuple = (), record_defaults: tuple = ()):
+        keyed = [(i, cfg["internal_key"], _FIELD_CONVERTERS.get(cfg.get("type"), _conv_str))
+                 for i, cfg in enumerate(config) if cfg.get("internal_key")]
+        self.n_fields = len(config)
+        self.min_required = sum(1 for cfg in config if not cfg.get("optional", False))
+        self.keys = tuple(k for _, k, _ in keyed)
+        self.converters = tuple(c for _, _, c in keyed)
+        # Only needed if some column has no internal_key (kept in the CSV, not parsed).
+        indices = tuple(i for i, _, _ in keyed)
+        self._indices = None if indices == tuple(range(len(indices))) else indices
+        # parse_values() plan, one entry per record field: the column and
+        # converter that fill it, or no converter and the field's default.
+        column = {k: (i, c) for i, k, c in keyed}
+        self._plan = tuple(column[f] + (None,) if f in column else (None, None, d)
+                           for f, d in zip(record_fields, record_defaults))
+        # Column of the packet counter, read on its own by sequence().
+        self._seq_col = column["packet_count"][0] if "packet_count" in column else None
+
+    def split(self, raw: str) -> List[str]:
+        if '"' in raw:
+            return next(csv.reader([raw], skipinitialspace=True), [])
+        return raw.split(",")
+
+    def _columns(self, raw: str) -> Optional[List[str]]:
+        parts = self.split(raw)
+        n = len(parts)
+        if n < self.min_required:
+            return None
+        if n < self.n_fields:
+            parts += [""] * (self.n_fields - n)     # missing optional fields
+        return parts
+
+    def parse(self, raw: str) -> Optional[dict]:
+        """Typed {internal_key: value} for one line, or None if it has too few fields."""
+        parts = self._columns(raw)
+        if parts is None:
+            return None
+        if self._indices is not None:
+            parts = [parts[i] for i in self._indices]
+        return {k: conv(v) for k, conv, v in zip(self.keys, self.converters, parts)}
+
+    def sequence(self, raw: str) -> Optional[int]:
+        """packet_count of a line without parsing the rest of it; None if missing or not a number."""
+        i = self._seq_col
+        if i is None:
+            return None
+        parts = self.split(raw) if '"' in raw else raw.split(",", i + 1)
+        try:
+            return int(parts[i])
+        except (IndexError, ValueError):
+            return None
+
+    def parse_values(self, raw: str) -> Optional[list]:
+        """Typed values in record field order for one line, or None if it has too few fields.
+        Config keys the record has no field for are skipped, as Telemetry(**data) would."""
+        parts = self._columns(raw)
+        if parts is None:
+            return None
+        return [conv(parts[i]) if conv is not None else d for i, conv, d in self._plan]
+
+
 # ===================== LOGGING (Keeping records) =====================
 # This sets up a system to save important messages to a file named 'ground.jsonl'.
 # It also prints them to the screen so you can see what's happening.
@@ -161,6 +413,13 @@ class LogBody(BaseModel):
     """Structure for switching the active log file."""
     label: str
 
+class RssiPolicyCfg(BaseModel):
+    """How often the GCS asks its XBee for the last-hop RSSI (ATDB)."""
+    mode: str = Field(default=RSSI_POLL_MODE, description="every_n | max_hz | on_loss | every_packet")
+    every_n: int = Field(default=RSSI_EVERY_N, ge=1)
+    max_hz: float = Field(default=RSSI_MAX_HZ, gt=0)
+    max_age_s: float = Field(default=RSSI_MAX_AGE_S, gt=0)
+
 class XBeeCfg(BaseModel):
     """XBee destination address split into DH and DL (each 8 hex chars = 4 bytes)."""
     dh: str = Field(default=DEFAULT_XBEE_DH, description="Destination High — 8 hex chars")
@@ -202,30 +461,384 @@ class Telemetry(BaseModel):
     gs_ts_utc: str
     gs_rx_count: int
     gs_loss_total: int
+    gs_rssi_dbm: Optional[int] = None   # latest ATDB reading, folded into each packet
     gs_raw_line: Optional[str] = None
 
+# Hot-path form of Telemetry: a plain tuple with the same fields in the same
+# order. The compiled parser already yields typed values, so a packet skips
+# pydantic validation and model_dump() unless TELEMETRY_STRICT is on.
+# The ground-station fields come last and are appended by the pipeline.
+_TELEMETRY_GS_FIELDS = ("gs_ts_utc", "gs_rx_count", "gs_loss_total", "gs_rssi_dbm", "gs_raw_line")
+_TELEMETRY_SENSOR_FIELDS = tuple(f for f in Telemetry.model_fields if f not in _TELEMETRY_GS_FIELDS)
+TelemetryRecord = namedtuple("TelemetryRecord", _TELEMETRY_SENSOR_FIELDS + _TELEMETRY_GS_FIELDS)
+
+_telemetry_parser = TelemetryParser(
+    TELEMETRY_CONFIG,
+    _TELEMETRY_SENSOR_FIELDS,
+    tuple(Telemetry.model_fields[f].default for f in _TELEMETRY_SENSOR_FIELDS),
+)
+
+
+class PackedTelemetryDecoder:
+    """
+    Decoder for the optional packed binary telemetry layout.
+
+    Turned on by a "packed" block in telemetry_config.json, e.g.
+        {"packed": {"marker": 165, "byte_order": "<"}, "fields": [...]}
+    plus a struct code under "pack" on every column the CanSat sends in
+    binary, in column order. Optional per column:
+        "scale": 0.1            value = raw * scale (rounded to the scale's decimals)
+        "decimals": 5           round to this many places
+        "enum": ["BOOT", ...]   raw integer -> name (state, mode, ...)
+        "format": "hms"         raw seconds -> "HH:MM:SS" (mission/GPS time)
+    A 0x90 payload whose first byte is the marker is unpacked with one
+    struct call straight into record values; columns without "pack" get the
+    same value an empty CSV field would. The packet is also rendered back to
+    a CSV line, with one %-format, so the flight log stays human-readable.
+    """
+
+    def __init__(self, config: list, packed: dict, record_fields: tuple = (), record_defaults: tuple = ()):
+        self.marker = int(packed.get("marker", 0xA5))
+        if 0x20 <= self.marker < 0x7F:
+            raise ValueError("packed marker must not be a printable ASCII byte")
+        codes, posts, template = [], [], []
+        source = {}     # internal_key -> ("packed", index) or ("empty", value)
+        for cfg in config:
+            conv = _FIELD_CONVERTERS.get(cfg.get("type"), _conv_str)
+            code = cfg.get("pack")
+            if code:
+                post, spec = self._column(cfg, code, conv)
+                if post is not None:
+                    posts.append((len(codes), post))
+                template.append(spec)
+                ref = ("packed", len(codes))
+                codes.append(code)
+            else:
+                template.append("")
+                ref = ("empty", conv(""))
+            if cfg.get("internal_key"):
+                source[cfg["internal_key"]] = ref
+        if not codes:
+            raise ValueError('no column has a "pack" struct code')
+        self._struct = struct.Struct(packed.get("byte_order", "<") + "".join(codes))
+        self.size = 1 + self._struct.size
+        self._posts = tuple(posts)
+        self._template = ",".join(template)
+        # Record plan: (packed index, None) or (None, constant value).
+        plan = []
+        for f, d in zip(record_fields, record_defaults):
+            kind, v = source.get(f, ("empty", d))
+            plan.append((v, None) if kind == "packed" else (None, v))
+        self._plan = tuple(plan)
+
+    @staticmethod
+    def _column(cfg: dict, code: str, conv) -> tuple:
+        """(raw -> value or None for as-is, %-format spec) for one packed column."""
+        if cfg.get("enum"):
+            names = tuple(str(n) for n in cfg["enum"])
+            return (lambda r: names[r] if 0 <= r < len(names) else str(r)), "%s"
+        if cfg.get("format") == "hms":
+            return (lambda r: "%02d:%02d:%02d" % (r // 3600, r // 60 % 60, r % 60)), "%s"
+        if code.endswith("s"):
+            return (lambda r: r.rstrip(b"\0").decode("ascii", "replace")), "%s"
+        scale = cfg.get("scale")
+        decimals = cfg.get("decimals")
+        if decimals is None and scale:
+            # As many places as the scale's own decimal expansion: 0.25 -> 2, 2.5 -> 1.
+            decimals = max(0, -Decimal(str(scale)).normalize().as_tuple().exponent)
+        if conv is _conv_float:
+            if decimals is not None:
+                # raw * scale as (raw * m) / 10**d with integer m: one correctly
+                # rounded division, much cheaper than round(raw * scale, d).
+                d = int(decimals)
+                div = 10 ** d
+                k = scale or 1
+                m = round(k * div)
+                if m and abs(m - k * div) < 1e-9 * div:
+                    if m == 1:
+                        return (lambda r: r / div), f"%.{d}f"
+                    return (lambda r: r * m / div), f"%.{d}f"
+                return (lambda r: round(r * k, d)), f"%.{d}f"
+            if code in ("f", "e"):
+                # float32/16 carry ~7 significant digits; drop the binary noise beyond them.
+                return (lambda r: float(f"{r:.7g}")), "%s"
+            return (None if code == "d" else float), "%s"
+        if conv is _conv_int:
+            if scale:
+                return (lambda r: int(round(r * scale))), "%d"
+            return (None if code not in ("f", "e", "d") else int), "%d"
+        return str, "%s"
+
+    def matches(self, payload: bytes) -> bool:
+        return len(payload) >= self.size and payload[0] == self.marker
+
+    def decode(self, payload: bytes) -> tuple:
+        """(CSV line, record values) for one packed payload (check matches() first)."""
+        vals = list(self._struct.unpack_from(payload, 1))
+        for i, post in self._posts:
+            vals[i] = post(vals[i])
+        line = self._template % tuple(vals)
+        return line, [vals[i] if i is not None else c for i, c in self._plan]
+
+def _build_packed_decoder(config: list, packed: Optional[dict]) -> Optional[PackedTelemetryDecoder]:
+    if not packed:
+        return None
+    try:
+        return PackedTelemetryDecoder(config, packed, _TELEMETRY_SENSOR_FIELDS,
+                                      tuple(Telemetry.model_fields[f].default for f in _TELEMETRY_SENSOR_FIELDS))
+    except (ValueError, TypeError, struct.error) as e:
+        print(f"Warning: telemetry_config.json packed layout ignored: {e}")
+        return None
+
+_packed_decoder = _build_packed_decoder(TELEMETRY_CONFIG, TELEMETRY_PACKED)
+
+
+_F32_MAX = 3.4028234663852886e38      # largest finite float32
+
+class WsBinarySchema:
+    """
+    Wire layout of the binary /ws/telemetry subprotocol (WS_BINARY_PROTOCOL),
+    derived from TELEMETRY_CONFIG: one field per configured column, in column
+    order, then the ground-station fields. A client is sent `message` (JSON
+    text, {"type": "schema", ...}) once when it connects and again after every
+    telemetry_config.json reload; telemetry then arrives as binary frames:
+
+        u8 kind (1 = full, 2 = delta) · u32 schema id · u32 stream seq (as
+        "seq" in JSON messages) · field bitmap (1 bit per field, LSB first) ·
+        the flagged fields' values in field order
+
+    A full frame carries every field that is not null. A delta frame carries
+    only the fields that changed since the packet before it; the rest keep
+    their previous value. Values are little-endian: "i32", "f32" (a config
+    column can ask for "ws": "f64", e.g. GPS lat/lon), "f64", "str" (u16
+    length + UTF-8) and "time" (gs_ts_utc as f64 Unix milliseconds).
+
+    `only` (a client's field subscription) keeps just those fields; every
+    schema gets its own id, so a frame is never decoded against another one.
+    Reloads and new subscriptions both use up ids, so it is 32 bits wide:
+    it does not wrap in any realistic server run.
+    """
+
+    FULL = 1
+    DELTA = 2
+    _CODES = {"i32": "i", "f32": "f", "f64": "d", "time": "d"}
+    _ids = itertools.count(1)
+
+    def __init__(self, config: list, version: int, only: Optional[tuple] = None):
+        types = {"int": "i32", "float": "f32", "str": "str"}
+        index = {f: i for i, f in enumerate(TelemetryRecord._fields)}
+        fields = []
+        for cfg in config:
+            key = cfg.get("internal_key")
+            if key in index and key not in _TELEMETRY_GS_FIELDS and all(k != key for k, _ in fields):
+                kind = types.get(cfg.get("type"), "str")
+                if kind == "f32" and cfg.get("ws") == "f64":
+                    kind = "f64"
+                fields.append((key, kind))
+        fields += [("gs_ts_utc", "time"), ("gs_rx_count", "i32"), ("gs_loss_total", "i32"),
+                   ("gs_rssi_dbm", "i32"), ("gs_raw_line", "str")]
+        if only is not None:
+            fields = [f for f in fields if f[0] in only]
+        self.fields = tuple(fields)
+        self.id = next(self._ids) & 0xFFFFFFFF
+        getter = itemgetter(*(index[k] for k, _ in fields)) if fields else (lambda rec: ())
+        self.project = getter if len(fields) != 1 else (lambda rec: (getter(rec),))
+        self._kinds = tuple(kind for _, kind in fields)
+        self._bitmap_len = (len(fields) + 7) // 8
+        self.message = json.dumps({"type": "schema", "protocol": WS_BINARY_PROTOCOL, "version": version,
+                                   "id": self.id, "fields": [{"key": k, "type": t} for k, t in fields]},
+                                  separators=(",", ":"))
+
+    def pack(self, values: tuple, prev: Optional[tuple] = None, seq: int = 0) -> Optional[bytes]:
+        """One frame: full if `prev` is None, else a delta against `prev`.
+        None if a delta can't express the change (a field became null)."""
+        fmt = ["<BII%ds" % self._bitmap_len]
+        args = [self.DELTA if prev is not None else self.FULL, self.id, seq & 0xFFFFFFFF, None]
+        bitmap = bytearray(self._bitmap_len)
+        for i, kind in enumerate(self._kinds):
+            v = values[i]
+            if prev is not None and v == prev[i]:
+                continue
+            if v is None:
+                if prev is not None:
+                    return None
+                continue
+            if kind == "str":
+                b = str(v).encode()[:0xFFFF]
+                fmt.append("H%ds" % len(b))
+                args += (len(b), b)
+            elif kind == "time":
+                try:
+                    v = datetime.fromisoformat(v).timestamp() * 1000.0
+                except (TypeError, ValueError):
+                    continue
+                fmt.append("d")
+                args.append(v)
+            elif kind == "i32":
+                if not -0x80000000 <= v <= 0x7FFFFFFF:
+                    # Doesn't fit the wire type: null in a full frame; a delta
+                    # can't say "now null", so it falls back to a full frame.
+                    if prev is not None:
+                        return None
+                    continue
+                fmt.append("i")
+                args.append(v)
+            elif kind == "f32" and abs(v) > _F32_MAX and math.isfinite(v):
+                if prev is not None:    # as above: outside float32 range
+                    return None
+                continue
+            else:
+                fmt.append(self._CODES[kind])
+                args.append(v)
+            bitmap[i >> 3] |= 1 << (i & 7)
+        args[3] = bytes(bitmap)
+        return struct.pack("".join(fmt), *args)
+
+
+class WsBinaryFrame:
+    """One telemetry packet for binary clients. Both encodings are built on
+    first use (in a client's sender task) and shared by every client."""
+
+    __slots__ = ("encoder", "seq", "stream_seq", "values", "prev", "_full", "_delta")
+
+    def __init__(self, encoder: "WsBinaryEncoder", seq: int, values: tuple, prev: Optional[tuple],
+                 stream_seq: int = 0):
+        self.encoder = encoder
+        self.seq = seq                  # this encoder's frame number (delta chain)
+        self.stream_seq = stream_seq    # the message's seq in the WebSocket stream
+        self.values = values
+        self.prev = prev
+        self._full = None
+        self._delta = False     # False: not built yet; None: no delta possible
+
+    def full(self) -> bytes:
+        if self._full is None:
+            self._full = self.encoder.schema.pack(self.values, None, self.stream_seq)
+        return self._full
+
+    def delta(self) -> Optional[bytes]:
+        if self._delta is False:
+            self._delta = (None if self.prev is None
+                           else self.encoder.schema.pack(self.values, self.prev, self.stream_seq))
+        return self._delta
+
+
+class WsBinaryEncoder:
+    """Per-session frame numbering and delta base for WsBinarySchema."""
+
+    def __init__(self, schema: WsBinarySchema):
+        self.schema = schema
+        self.seq = 0
+        self.prev: Optional[tuple] = None
+
+    def frame(self, rec: tuple, stream_seq: int = 0) -> WsBinaryFrame:
+        values = self.schema.project(rec)
+        self.seq += 1
+        frame = WsBinaryFrame(self, self.seq, values, self.prev, stream_seq)
+        self.prev = values
+        return frame
+
+TELEMETRY_CONFIG_VERSION = 1    # bumped by every telemetry_config.json reload that changes something
+_ws_schemas: Dict[Optional[tuple], WsBinarySchema] = {}     # field subscription -> schema (current layout)
+
+def ws_binary_schema(only: Optional[tuple] = None) -> WsBinarySchema:
+    """The WsBinarySchema for a field subscription (None: every field), built
+    once per telemetry layout and shared by every client with that set."""
+    schema = _ws_schemas.get(only)
+    if schema is None:
+        if len(_ws_schemas) >= 64:
+            # Forget only field sets no connected binary client still uses: a
+            # client decodes against the schema message it was sent, and a
+            # rebuilt schema would have a new id its frames don't match.
+            in_use = {client.fields for client in ws_clients | _replay_clients if client.binary}
+            for key in [k for k in _ws_schemas if k not in in_use]:
+                del _ws_schemas[key]
+        schema = _ws_schemas[only] = WsBinarySchema(TELEMETRY_CONFIG, TELEMETRY_CONFIG_VERSION, only)
+    return schema
+
+def compile_telemetry_layout(doc) -> dict:
+    """
+    Build everything derived from a telemetry_config.json document: columns,
+    CSV header, line parser and packed decoder. Pure and thread-safe, so a
+    reload compiles off the event loop. Raises ValueError on a bad config.
+    """
+    fields, packed = split_telemetry_config(doc)
+    if not isinstance(fields, list) or not fields or not all(isinstance(f, dict) for f in fields):
+        raise ValueError("fields must be a non-empty list of column objects")
+    for i, item in enumerate(fields):
+        for key in ("csv_header", "internal_key", "type", "format", "pack"):
+            if key in item and not isinstance(item[key], str):
+                raise ValueError(f"fields[{i}].{key} must be a string")
+        scale, decimals = item.get("scale"), item.get("decimals")
+        if scale is not None and (type(scale) not in (int, float) or not math.isfinite(scale)):
+            raise ValueError(f"fields[{i}].scale must be a number")
+        if decimals is not None and (type(decimals) is not int or not 0 <= decimals <= 15):
+            raise ValueError(f"fields[{i}].decimals must be an integer from 0 to 15")
+    if packed is not None and not isinstance(packed, dict):
+        raise ValueError("packed must be an object")
+    defaults = tuple(Telemetry.model_fields[f].default for f in _TELEMETRY_SENSOR_FIELDS)
+    try:
+        packed_decoder = (PackedTelemetryDecoder(fields, packed, _TELEMETRY_SENSOR_FIELDS, defaults)
+                          if packed else None)
+    except (TypeError, AttributeError, KeyError, OverflowError, struct.error) as e:
+        raise ValueError(f"packed layout: {e}")
+    try:
+        parser = TelemetryParser(fields, _TELEMETRY_SENSOR_FIELDS, defaults)
+    except (TypeError, AttributeError, KeyError) as e:
+        # Any other shape mistake: still just a bad config, never a crash.
+        raise ValueError(f"fields: {e}")
+    return {
+        "fields": fields,
+        "packed": packed,
+        "csv_header": ",".join(item.get("csv_header", "") for item in fields),
+        "parser": parser,
+        "packed_decoder": packed_decoder,
+    }
+
+def _apply_telemetry_layout(layout: dict) -> bool:
+    """
+    Swap in a compiled layout. Runs on the event loop with no await, i.e.
+    strictly between two packets; the reader thread picks up the new packed
+    decoder on its next frame. If the CSV header changed, later lines go to
+    a new CSV segment. Returns True in that case.
+    """
+    global TELEMETRY_CONFIG, TELEMETRY_PACKED, CSV_HEADER, TELEMETRY_CONFIG_VERSION
+    global _telemetry_parser, _packed_decoder
+    new_segment = layout["csv_header"] != CSV_HEADER
+    for sess in _source_sessions():
+        sess.csv_writer.path = sess.csv_writer.target()   # pin: lines buffered so far belong to this file
+    TELEMETRY_CONFIG = layout["fields"]
+    TELEMETRY_PACKED = layout["packed"]
+    CSV_HEADER = layout["csv_header"]
+    _telemetry_parser = layout["parser"]
+    _packed_decoder = layout["packed_decoder"]
+    TELEMETRY_CONFIG_VERSION += 1
+    _ws_schemas.clear()
+    if new_segment:
+        state.csv_segment += 1
+        for sess in _source_sessions():
+            sess.csv_writer.start_segment(get_active_csv(sess.suffix))
+    return new_segment
+
 # ===================== GLOBAL STATE (Program Memory) =====================
 @dataclass
 class GSState:
     """Stores the current status of the Ground Station."""
     cfg: SerialCfg = field(default_factory=SerialCfg) # Current connection settings
-    rx_count: int = 0           # Total packets received
-    loss_count: int = 0         # Total packets lost
-    last_pkt: Optional[int] = None # The ID number of the last packet we saw
     csv_ready: bool = False     # Is the CSV file ready to be written to?
     last_cmd: str = "—"         # The last command we sent
     sim_enabled: bool = False   # Is the simulation mode enabled?
     # Active log label — empty string means default file (Flight_1043.csv)
     log_label: str = ""
-    # KML auto-save: collect GPS points for Google Earth export
-    kml_points: Deque = field(default_factory=lambda: deque(maxlen=3000))  # [{lat, lon, alt, state}]
-    kml_max_alt: float = 0.0    # Track max altitude for KML metadata
-    last_current_a: Optional[float] = None  # Most recent current reading (A)
+    # CSV file segment: bumped when a telemetry_config.json reload changes the
+    # column header, so one file never mixes two layouts (Flight_1043_seg1.csv…)
+    csv_segment: int = 0
+    # Packet counters, KML track and the latest readings are kept per CanSat,
+    # in its SourceSession (see _primary).
     rssi_dbm: Optional[int] = None          # Last-hop RSSI from ATDB (negative dBm)
     xbee_dh: str = DEFAULT_XBEE_DH         # Current XBee destination high (8 hex chars)
     xbee_dl: str = DEFAULT_XBEE_DL         # Current XBee destination low  (8 hex chars)
     last_tx_status: Optional[int] = None    # Last uplink delivery status (0x00 = delivered)
-    kml_landed_saved: bool = False          # True after final KML save on LANDED state
 
 state = GSState()
 
@@ -234,7 +847,7 @@ def _select_serial_port_at_startup():
     """Interactive port picker shown once at import time when stdin is a real terminal.
     When running headless (systemd/no TTY), auto-detects the first USB serial port.
     """
-    ports = sorted(serial.tools.list_ports.comports(), key=lambda p: p.device)
+    ports = _port_watcher.ports()
 
     if not sys.stdin.isatty():
         # Running headless (e.g. systemd on Raspberry Pi) — auto-detect XBee port.
@@ -276,17 +889,28 @@ def _select_serial_port_at_startup():
 # ===================== KML AUTO-SAVE =====================
 KML_CURRENT = DATA_DIR / f"Flight_{TEAM_ID:04}.kml"
 
-def get_active_csv() -> Path:
-    """Returns the CSV path for the current log session."""
+def get_active_csv(suffix: str = "") -> Path:
+    """Returns the CSV path for the current log session (and layout segment).
+    `suffix` tells apart the files of a second CanSat (see SourceSession)."""
     if state.log_label:
-        return DATA_DIR / f"Flight_{TEAM_ID:04}_{state.log_label}.csv"
-    return CSV_CURRENT
-
-def get_active_kml() -> Path:
+        path = DATA_DIR / f"Flight_{TEAM_ID:04}_{state.log_label}.csv"
+    else:
+        path = CSV_CURRENT
+    if suffix:
+        path = path.with_name(f"{path.stem}_{suffix}.csv")
+    if state.csv_segment:
+        path = path.with_name(f"{path.stem}_seg{state.csv_segment}.csv")
+    return path
+
+def get_active_kml(suffix: str = "") -> Path:
     """Returns the KML path for the current log session."""
     if state.log_label:
-        return DATA_DIR / f"Flight_{TEAM_ID:04}_{state.log_label}.kml"
-    return KML_CURRENT
+        path = DATA_DIR / f"Flight_{TEAM_ID:04}_{state.log_label}.kml"
+    else:
+        path = KML_CURRENT
+    if suffix:
+        path = path.with_name(f"{path.stem}_{suffix}.kml")
+    return path
 
 
 def _build_kml(points: list, max_alt: float) -> str:
@@ -518,22 +1142,75 @@ def _build_kml(points: list, max_alt: float) -> str:
         '</kml>'
     )
 
-async def _save_kml():
-    """Writes the current KML data to disk."""
+async def _save_kml(sess: Optional["SourceSession"] = None):
+    """Writes the current KML data of one CanSat (default: the primary) to disk."""
+    sess = sess or _primary
     try:
-        kml_str = _build_kml(list(state.kml_points), state.kml_max_alt)
+        kml_str = _build_kml(list(sess.kml_points), sess.kml_max_alt)
         if kml_str:
-            async with aiofiles.open(get_active_kml(), "w", encoding="utf-8") as f:
+            async with aiofiles.open(get_active_kml(sess.suffix), "w", encoding="utf-8") as f:
                 await f.write(kml_str)
     except Exception as e:
         log_json(level="error", event="kml_save_failed", error=str(e))
 
+class UplinkScheduler:
+    """
+    Multi-lane uplink queue. get() always serves the highest-priority non-empty
+    lane (FIFO within a lane); each lane has its own depth limit and drop counter.
+    """
+
+    def __init__(self, lanes):
+        self.lanes = tuple(name for name, _ in lanes)
+        self.priority = {name: i for i, name in enumerate(self.lanes)}   # 0 = highest
+        self._limit = dict(lanes)
+        self._q: Dict[str, Deque[tuple]] = {name: deque() for name in self.lanes}
+        self._queued = {name: 0 for name in self.lanes}
+        self._dropped = {name: 0 for name in self.lanes}
+        self._ready = asyncio.Event()
+
+    def put_nowait(self, cmd: str, lane: str):
+        """Queue (cmd, enqueue time). Raises asyncio.QueueFull if the lane is full."""
+        q = self._q[lane]
+        if len(q) >= self._limit[lane]:
+            self._dropped[lane] += 1
+            raise asyncio.QueueFull
+        q.append((cmd, time.monotonic()))
+        self._queued[lane] += 1
+        self._ready.set()
+
+    async def get(self) -> tuple:
+        """Wait for the next command: (cmd, enqueue time, lane)."""
+        while True:
+            for lane in self.lanes:
+                q = self._q[lane]
+                if q:
+                    cmd, t_enqueued = q.popleft()
+                    return cmd, t_enqueued, lane
+            self._ready.clear()
+            await self._ready.wait()
+
+    def clear(self, lane: str) -> int:
+        """Discard everything waiting in one lane; returns how many were dropped."""
+        n = len(self._q[lane])
+        self._q[lane].clear()
+        self._dropped[lane] += n
+        return n
+
+    def stats(self) -> dict:
+        return {lane: {"depth": len(self._q[lane]), "limit": self._limit[lane],
+                       "queued": self._queued[lane], "dropped": self._dropped[lane]}
+                for lane in self.lanes}
+
 ring: Deque[str] = deque(maxlen=10_000)   # Keeps the last 10,000 log messages in memory
-ws_clients: Set[WebSocket] = set()        # A list of all web browsers currently connected
-uplink_q: asyncio.Queue[str] = asyncio.Queue(maxsize=100) # A queue (line) of commands waiting to be sent
-_kml_gps_count: int = 0                   # Count valid GPS packets; write KML every 10
+ws_clients: Set["WsClient"] = set()       # A list of all web browsers currently connected
+uplink_q = UplinkScheduler(UPLINK_LANES)  # Commands waiting to be sent, by priority lane
 _csv_write_lock: asyncio.Lock = asyncio.Lock()  # Serialises CSV append so concurrent writers don't interleave bytes
 
+def _queue_uplink(cmd: str, lane: str = "operator"):
+    """Queue a command for the radio in the given priority lane, stamped with its
+    enqueue time for latency tracking. Raises asyncio.QueueFull if the lane is full."""
+    uplink_q.put_nowait(cmd, lane)
+
 def ensure_csv_header(path: Optional[Path] = None):
     """Checks if the CSV file exists. If not, creates it and adds the header row."""
     target = path or get_active_csv()
@@ -541,71 +1218,229 @@ def ensure_csv_header(path: Optional[Path] = None):
         target.write_bytes((CSV_HEADER + "\r\n").encode("utf-8"))
     state.csv_ready = True
 
+def _select_csv_segment():
+    """
+    Skip to the first CSV segment that is missing or already has the current
+    header, so a restart after editing telemetry_config.json never appends
+    the new layout under an old header row.
+    """
+    while True:
+        try:
+            with open(get_active_csv(), encoding="utf-8") as f:
+                first = f.readline().rstrip("\r\n")
+        except FileNotFoundError:
+            return
+        if first == CSV_HEADER:
+            return
+        state.csv_segment += 1
+
+
+class CsvLogWriter:
+    """
+    Long-lived, group-committing appender for the active flight CSV.
+
+    append() only buffers (event loop thread); run() flushes the buffer in a
+    single write on the size or age threshold, off the loop in a worker
+    thread, through a file handle that stays open until reopen() (log switch)
+    or close() (shutdown). One open/write/close per packet becomes one write
+    per CSV_FLUSH_INTERVAL_S at most.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path: Optional[Path] = path    # None: get_active_csv() at next open
+        self._f = None
+        self._f_path: Optional[Path] = None
+        self._held: List[tuple] = []        # (path, text) sealed by start_segment()
+        self._buf: List[str] = []
+        self._buf_bytes = 0
+        self._pending = asyncio.Event()     # buffer is non-empty
+        self._full = asyncio.Event()        # buffer reached CSV_FLUSH_BYTES
+        self._last_fsync = 0.0
+        self.lines = 0
+        self.flushes = 0
+        self.fsyncs = 0
+        self.bytes = 0
+        self.errors = 0
+        self.flush_s = 0.0
+
+    def append(self, lines: List[str]):
+        chunk = "".join(raw + "\r\n" for raw in lines)
+        self._buf.append(chunk)
+        self._buf_bytes += len(chunk)
+        self.lines += len(lines)
+        self._pending.set()
+        if self._buf_bytes >= CSV_FLUSH_BYTES:
+            self._full.set()
+
+    async def run(self):
+        """Flusher task: sleeps until something is buffered, then commits it as a group."""
+        while True:
+            await self._pending.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), CSV_FLUSH_INTERVAL_S)
+            except asyncio.TimeoutError:
+                pass
+            # Shielded: cancelling the task at shutdown must not release the
+            # lock while a worker thread is still writing; close() waits for it.
+            await asyncio.shield(self.flush())
+
+    def target(self) -> Path:
+        return self.path or get_active_csv()
+
+    def start_segment(self, path: Path):
+        """
+        Seal the lines buffered so far for the current file and send every
+        later line to `path` (created with the current CSV_HEADER). Synchronous,
+        so a layout swap can call it between two packets.
+        """
+        if self._buf:
+            self._held.append((self.target(), "".join(self._buf)))
+            self._buf.clear()
+            self._buf_bytes = 0
+        self.path = path
+
+    async def flush(self):
+        async with _csv_write_lock:
+            jobs = self._held
+            self._held = []
+            if self._buf:
+                jobs.append((self.target(), "".join(self._buf)))
+                self._buf.clear()
+            if not jobs:
+                return
+            self._buf_bytes = 0
+            self._pending.clear()
+            self._full.clear()
+            for n, (path, data) in enumerate(jobs):
+                t0 = time.perf_counter()
+                try:
+                    await asyncio.to_thread(self._write, path, data)
+                except OSError as e:
+                    # Keep the lines and try again on the next flush, with a fresh handle.
+                    self.errors += 1
+                    self._held = jobs[n:] + self._held
+                    self._pending.set()
+                    log_json(level="error", event="csv_write_failed", file=str(path), error=str(e))
+                    await asyncio.to_thread(self._close_file)
+                    return
+                self.flush_s += time.perf_counter() - t0
+                self.flushes += 1
+                self.bytes += len(data)
+
+    async def reopen(self, path: Optional[Path] = None):
+        """Commit what is buffered to the current file, then switch to `path`
+        (or whatever get_active_csv() returns when the next flush happens)."""
+        await self.flush()
+        async with _csv_write_lock:
+            await asyncio.to_thread(self._close_file, True)
+            self.path = path
+
+    async def close(self):
+        """Flush, fsync and close (lifespan shutdown)."""
+        await self.flush()
+        async with _csv_write_lock:
+            await asyncio.to_thread(self._close_file, True)
+
+    def stats(self) -> dict:
+        return {
+            "file": str(self.target()),
+            "fsync_policy": CSV_FSYNC_POLICY,
+            "lines": self.lines,
+            "pending_bytes": self._buf_bytes + sum(len(d) for _, d in self._held),
+            "flushes": self.flushes,
+            "fsyncs": self.fsyncs,
+            "bytes": self.bytes,
+            "errors": self.errors,
+            "avg_flush_ms": round(self.flush_s / self.flushes * 1e3, 3) if self.flushes else None,
+        }
+
+    # -- worker-thread side (always under _csv_write_lock) --
+    def _write(self, path: Path, data: str):
+        if self._f is not None and self._f_path != path:
+            self._close_file(True)
+        if self._f is None:
+            new_file = not path.exists()
+            self._f = open(path, "a", encoding="utf-8", newline="")
+            self._f_path = path
+            if new_file:
+                self._f.write(CSV_HEADER + "\r\n")
+        self._f.write(data)
+        self._f.flush()
+        now = time.monotonic()
+        if CSV_FSYNC_POLICY == "always" or (
+                CSV_FSYNC_POLICY == "interval" and now - self._last_fsync >= CSV_FSYNC_INTERVAL_S):
+            os.fsync(self._f.fileno())
+            self._last_fsync = now
+            self.fsyncs += 1
+
+    def _close_file(self, sync: bool = False):
+        f, self._f = self._f, None
+        if f is None:
+            return
+        try:
+            if sync and CSV_FSYNC_POLICY != "never":
+                f.flush()
+                os.fsync(f.fileno())
+                self.fsyncs += 1
+            f.close()
+        except OSError as e:
+            log_json(level="warn", event="csv_close_failed", file=str(self._f_path), error=str(e))
+
+_csv_writer = CsvLogWriter()
+
 # ===================== XBEE API MODE 2 FRAME CODEC =====================
-_API2_ESCAPE_SET = frozenset([0x7E, 0x7D, 0x11, 0x13])
+# (raw byte, escaped pair). 0x7D must come first so the escapes inserted for
+# the other three bytes are not escaped a second time.
+_API2_ESCAPES = (
+    (b'\x7D', b'\x7D\x5D'),
+    (b'\x7E', b'\x7D\x5E'),
+    (b'\x11', b'\x7D\x31'),
+    (b'\x13', b'\x7D\x33'),
+)
 
 def _api2_escape(data: bytes) -> bytes:
-    """Apply API Mode 2 byte-escaping to a raw byte sequence."""
-    out = bytearray()
-    for byte in data:
-        if byte in _API2_ESCAPE_SET:
-            out += bytes([0x7D, byte ^ 0x20])
-        else:
-            out.append(byte)
+    """Apply API Mode 2 byte-escaping to a raw byte sequence (bulk replace, no per-byte loop)."""
+    out = bytes(data)
+    for raw, esc in _API2_ESCAPES:
+        if raw in out:
+            out = out.replace(raw, esc)
+    return out
+
+_API2_MAX_FRAME_LEN = 300   # Longest frame body we accept; anything larger is line noise.
+
+def _api2_unescape(data: bytes) -> bytes:
+    """Undo API Mode 2 byte-escaping in one pass (0x7D 0xXX -> 0xXX ^ 0x20)."""
+    if 0x7D not in data:
+        return bytes(data)
+    parts = bytes(data).split(b'\x7D')
+    out = bytearray(parts[0])
+    for part in parts[1:]:
+        if part:
+            out.append(part[0] ^ 0x20)
+            out += part[1:]
     return bytes(out)
 
-def _read_api2_frame(ser: serial.Serial) -> Optional[dict]:
+def _parse_api2_frame(body: bytes) -> Optional[dict]:
     """
-    Read one API Mode 2 frame from the GCS XBee UART.
+    Interpret one unescaped, checksum-verified API frame body
+    (frame_type .. last data byte, checksum excluded).
 
     Returns one of:
-      {"type": "telemetry", "payload": bytes}   — 0x90 RX Indicator (telemetry CSV)
+      {"type": "telemetry", "payload": bytes,   — 0x90 RX Indicator (telemetry CSV)
+       "src": str}                               —   sender's 64-bit address, 16 hex chars
       {"type": "rssi",      "dbm":    int  }    — 0x88 AT Response for ATDB query
-      None                                       — timeout / bad checksum / other frame
+      {"type": "tx_status", ...}                — 0x8B Transmit Status
+      None                                       — any other frame
     """
-    # Sync to start delimiter — 0x7E is never escaped so we scan for it raw.
-    while True:
-        b = ser.read(1)
-        if not b:
-            return None
-        if b[0] == 0x7E:
-            break
-
-    def _read_unescaped(n: int) -> Optional[bytearray]:
-        buf = bytearray()
-        while len(buf) < n:
-            b = ser.read(1)
-            if not b:
-                return None
-            if b[0] == 0x7D:
-                b2 = ser.read(1)
-                if not b2:
-                    return None
-                buf.append(b2[0] ^ 0x20)
-            else:
-                buf.append(b[0])
-        return buf
-
-    length_raw = _read_unescaped(2)
-    if length_raw is None:
-        return None
-    length = (length_raw[0] << 8) | length_raw[1]
-    if length > 300:
+    length = len(body)
+    if not length:
         return None
-
-    body = _read_unescaped(length + 1)
-    if body is None:
-        return None
-
-    if (sum(body) & 0xFF) != 0xFF:
-        return None
-
     frame_type = body[0]
 
     # 0x90 = Receive Packet (RX Indicator)
     # Header: frame_type(1) + src_64(8) + src_16(2) + options(1) = 12 bytes
     if frame_type == 0x90 and length >= 12:
-        return {"type": "telemetry", "payload": bytes(body[12:length])}
+        return {"type": "telemetry", "payload": bytes(body[12:length]), "src": bytes(body[1:9]).hex().upper()}
 
     # 0x88 = AT Command Response — we use this to read back ATDB (last-hop RSSI).
     # Body layout: frame_type(1) + frame_id(1) + cmd[2] + status(1) + value(N)
@@ -622,11 +1457,95 @@ def _read_api2_frame(ser: serial.Serial) -> Optional[dict]:
     #                  + delivery_status(1) + discovery_status(1) = 7 bytes.
     # delivery_status 0x00 == delivered; anything else == not delivered (no ACK, no route…).
     if frame_type == 0x8B and length >= 7:
-        return {"type": "tx_status", "delivery": body[5], "retries": body[4]}
+        return {"type": "tx_status", "frame_id": body[1], "delivery": body[5], "retries": body[4]}
 
     return None
 
 
+class Api2FrameDecoder:
+    """
+    Incremental API Mode 2 decoder for the GCS XBee UART.
+
+    Feed it whatever ser.read(ser.in_waiting or 1) returned; it keeps partial
+    frames across reads and returns every complete frame (as parsed by
+    _parse_api2_frame) found so far. 0x7E is never escaped, so each frame runs
+    from one start delimiter to the next and can be unescaped in a single pass
+    instead of one ser.read(1) per byte.
+    """
+
+    def __init__(self, on_raw=None):
+        self._buf = bytearray()
+        # Optional callback given the on-wire bytes (0x7E onwards, still escaped)
+        # of every delimited frame — good, bad-checksum, truncated or unknown.
+        self.on_raw = on_raw
+        self.frames = 0         # complete frames with a good checksum
+        self.bad_checksum = 0   # complete frames whose checksum did not add up
+        self.dropped = 0        # oversize / truncated frames discarded while resyncing
+
+    def reset(self):
+        """Forget any partial frame (e.g. after the port was reopened)."""
+        self._buf.clear()
+
+    def feed(self, data: bytes) -> List[dict]:
+        """Consume newly read bytes and return the frames they completed."""
+        buf = self._buf
+        buf += data
+        out: List[dict] = []
+        while True:
+            start = buf.find(0x7E)
+            if start < 0:
+                buf.clear()     # no delimiter anywhere — it is all line noise
+                return out
+            if start:
+                del buf[:start]
+            nxt = buf.find(0x7E, 1)
+            seg = buf[1:nxt] if nxt > 0 else buf[1:]
+            raw = _api2_unescape(seg)   # a trailing lone 0x7D is dropped
+            if nxt < 0 and seg.endswith(b'\x7D') and (
+                    len(raw) < 2 or len(raw) < ((raw[0] << 8) | raw[1]) + 3):
+                # Escape pair split across reads — wait for the rest. Once the
+                # frame is complete a trailing 0x7D is just noise after it.
+                return out
+
+            if len(raw) < 2:
+                if nxt < 0:
+                    return out
+                self.dropped += 1
+                if self.on_raw:
+                    self.on_raw(bytes(buf[:nxt]))
+                del buf[:nxt]
+                continue
+            length = (raw[0] << 8) | raw[1]
+            if length > _API2_MAX_FRAME_LEN or len(raw) < length + 3:
+                if nxt < 0 and length <= _API2_MAX_FRAME_LEN:
+                    return out  # frame still arriving
+                # Oversize, or cut short by the next start delimiter: resync there.
+                self.dropped += 1
+                if self.on_raw:
+                    self.on_raw(bytes(buf[:nxt] if nxt > 0 else buf))
+                if nxt < 0:
+                    buf.clear()
+                    return out
+                del buf[:nxt]
+                continue
+
+            body = raw[2:length + 3]
+            if self.on_raw:
+                self.on_raw(bytes(buf[:nxt] if nxt > 0 else buf))
+            # Anything between the checksum and the next 0x7E is noise; skip it.
+            if nxt < 0:
+                buf.clear()
+            else:
+                del buf[:nxt]
+            if (sum(body) & 0xFF) != 0xFF:
+                self.bad_checksum += 1
+                continue
+            self.frames += 1
+            frame = _parse_api2_frame(body[:-1])
+            if frame is not None:
+                out.append(frame)
+
+
 def _build_db_query() -> bytes:
     """
     Build an API Mode 2 Local AT Command Request (0x08) that queries ATDB.
@@ -640,213 +1559,1021 @@ def _build_db_query() -> bytes:
     body      = bytes(content) + bytes([checksum])
     return b'\x7E' + _api2_escape(len_bytes) + _api2_escape(body)
 
+# The ATDB query never changes — build it once instead of after every packet.
+_DB_QUERY_FRAME = _build_db_query()
 
-def _build_api2_tx_frame(payload: bytes) -> bytes:
-    """
-    Build an API Mode 2 Transmit Request (0x10) frame addressed to PAYLOAD_XBEE_ADDR.
-    Escapes 0x7E, 0x7D, 0x11, 0x13 everywhere except the leading start delimiter.
+
+class Api2TxFrameBuilder:
     """
-    dest_hex = (state.xbee_dh + state.xbee_dl).upper()
-    # Safety: never broadcast. Always send to the single unit set in /config.
-    if dest_hex == XBEE_BROADCAST_ADDR:
-        raise ValueError("refusing to transmit to the XBee broadcast address — pick a specific unit in /config")
-    # Defensive: the destination must be a clean 64-bit (16 hex char) address.
-    # Today the state is only ever set via the validated POST or defaults, but this
-    # guarantees a malformed address can never reach the radio as a short/garbled frame.
-    if len(dest_hex) != 16 or any(ch not in "0123456789ABCDEF" for ch in dest_hex):
-        raise ValueError(f"invalid XBee destination address: {dest_hex!r}")
-
-    content = bytearray([0x10, 0x01])   # frame type: TX Request, frame ID: 1
-    content += bytes.fromhex(dest_hex)  # 64-bit destination (8 bytes) — the /config unit only
-    content += b'\xFF\xFE'             # 16-bit dest = unknown/let stack decide
-    content += b'\x00'                 # broadcast radius = 0
-    content += b'\xC0'                 # options = 0xC0 (DigiMesh)
-    content += payload
+    Builds API Mode 2 Transmit Request (0x10) frames.
 
-    length   = len(content)
-    checksum = (0xFF - (sum(content) & 0xFF)) & 0xFF
+    The addressing part of the header (64-bit destination, 16-bit destination,
+    radius, options) only changes when /api/xbee/config picks another unit, so
+    its escaped bytes and checksum partial sum are cached per destination. Each
+    frame then only adds its frame ID and escapes and sums the payload.
+    """
 
-    len_bytes = bytes([length >> 8, length & 0xFF])
-    body      = bytes(content) + bytes([checksum])
-    return b'\x7E' + _api2_escape(len_bytes) + _api2_escape(body)
+    _HEADER_LEN = 14
+    # Escaped "0x10 <frame id>" prefix for every possible frame ID.
+    _TYPE_AND_ID = tuple(_api2_escape(bytes([0x10, fid])) for fid in range(256))
+
+    def __init__(self):
+        self._dest: Optional[str] = None
+        self._header_esc = b""
+        self._header_sum = 0
+
+    def invalidate(self):
+        """Drop the cached header — call whenever the destination address changes."""
+        self._dest = None
+
+    def _prime(self, dest_hex: str):
+        # Safety: never broadcast. Always send to the single unit set in /config.
+        if dest_hex == XBEE_BROADCAST_ADDR:
+            raise ValueError("refusing to transmit to the XBee broadcast address — pick a specific unit in /config")
+        # Defensive: the destination must be a clean 64-bit (16 hex char) address.
+        # Today the state is only ever set via the validated POST or defaults, but this
+        # guarantees a malformed address can never reach the radio as a short/garbled frame.
+        if len(dest_hex) != 16 or any(ch not in "0123456789ABCDEF" for ch in dest_hex):
+            raise ValueError(f"invalid XBee destination address: {dest_hex!r}")
+
+        header = bytearray()               # frame type (0x10) + frame ID are added per frame
+        header += bytes.fromhex(dest_hex)  # 64-bit destination (8 bytes) — the /config unit only
+        header += b'\xFF\xFE'             # 16-bit dest = unknown/let stack decide
+        header += b'\x00'                 # broadcast radius = 0
+        header += b'\xC0'                 # options = 0xC0 (DigiMesh)
+        self._header_esc = _api2_escape(bytes(header))
+        self._header_sum = sum(header)
+        self._dest = dest_hex
+
+    def build(self, payload: bytes, dest_hex: str, frame_id: int = 1) -> bytes:
+        """Frame `payload` for the 64-bit destination `dest_hex` (16 upper-case hex chars).
+        frame_id 1-255 asks the XBee for a 0x8B Transmit Status carrying that ID."""
+        if dest_hex != self._dest:
+            self._prime(dest_hex)
+        length   = self._HEADER_LEN + len(payload)
+        checksum = (0xFF - ((0x10 + frame_id + self._header_sum + sum(payload)) & 0xFF)) & 0xFF
+        return (b'\x7E'
+                + _api2_escape(bytes([length >> 8, length & 0xFF]))
+                + self._TYPE_AND_ID[frame_id]
+                + self._header_esc
+                + _api2_escape(payload + bytes([checksum])))
+
+_tx_frame_builder = Api2TxFrameBuilder()
+
+
+def _build_api2_tx_frame(payload: bytes, frame_id: int = 1) -> bytes:
+    """
+    Build an API Mode 2 Transmit Request (0x10) frame addressed to the unit set in /config.
+    Escapes 0x7E, 0x7D, 0x11, 0x13 everywhere except the leading start delimiter.
+    """
+    return _tx_frame_builder.build(payload, (state.xbee_dh + state.xbee_dl).upper(), frame_id)
 
 
 # ===================== SERIAL COMMUNICATION (Talking to Hardware) =====================
 import threading
 import time
 import queue
+import select
+import ctypes
+import ctypes.util
 
-# These variables help share the serial connection safely between different parts of the program.
-_serial_port: Optional[serial.Serial] = None
-_serial_lock = threading.Lock()
-_stop_event = threading.Event()
+_stop_event = threading.Event()     # stops every radio link (shutdown)
 
 # --- Single-threaded serial I/O ----------------------------------------------
-# CRITICAL: ALL reads AND writes to _serial_port must happen ONLY inside
-# serial_read_thread_target(). Reading and writing the same tty fd from two
-# different threads makes pyserial's read() raise
+# CRITICAL: ALL reads AND writes to a radio's port must happen ONLY inside that
+# link's own reader thread (RadioLink.run()). Reading and writing the same tty
+# fd from two different threads makes pyserial's read() raise
 #   SerialException: device reports readiness to read but returned no data
 #                    (device disconnected or multiple access on port?)
 # on Linux (e.g. Raspberry Pi). The read loop treats that as a lost link and
 # reconnects — the spurious "auto reconnect on every uplink" bug. macOS tolerates
 # the race, which is why it only surfaces on Linux. So other threads hand outgoing
-# frames to _tx_queue and the reader drains it.
-_tx_queue: "queue.Queue[bytes]" = queue.Queue(maxsize=200)  # outgoing API frames
-_serial_connected = threading.Event()   # set while the port is open & usable
-_reconnect_request = threading.Event()  # set by HTTP handlers to ask for a clean reconnect
-
-
-def _close_serial():
-    """Close and clear the shared port. Called ONLY from the reader thread."""
-    global _serial_port
-    _serial_connected.clear()
-    with _serial_lock:
-        if _serial_port:
-            try:
-                _serial_port.close()
-            except Exception:
-                pass
-            _serial_port = None
-    # Drop any unsent uplinks so they aren't fired late after a reconnect.
-    try:
+# frames to the link's tx_queue and its reader drains it. With several radios
+# this holds per port: one thread per port, each port touched by exactly one
+# thread. (With SERIAL_TRANSPORT = "asyncio" the event loop thread is that single
+# owner for every port instead — see AsyncioSerialTransport.)
+# tx_queue is a priority queue so the lane order chosen by uplink_q survives the
+# hop: items are (lane priority, sequence, frame_id, API frame).
+_tx_seq = itertools.count()   # FIFO tie-break within a lane
+
+
+# --- Serial port inventory ---------------------------------------------------
+# comports() walks sysfs/IOKit and is slow on a Raspberry Pi, so it is not
+# called on every reconnect attempt or /api/serial/ports request. PortWatcher
+# keeps a cached inventory, rescanned when /dev changes (inotify on Linux) or
+# every PORT_POLL_INTERVAL_S where inotify is unavailable (macOS, Windows).
+PORT_POLL_INTERVAL_S = 2.0
+PORT_RESCAN_INTERVAL_S = 30.0   # safety rescan even with inotify
+_IN_ATTRIB, _IN_MOVED_FROM, _IN_MOVED_TO, _IN_CREATE, _IN_DELETE = 0x4, 0x40, 0x80, 0x100, 0x200
+
+
+class PortWatcher:
+    """Cached serial port inventory that wakes waiters when a port (re)appears."""
+
+    def __init__(self):
+        self._ports: list = []
+        self._devices: Set[str] = set()
+        self._cond = threading.Condition()
+        self._generation = 0        # bumped on every inventory change (or kick)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.mode = "idle"
+
+    def refresh(self) -> bool:
+        """Rescan now; returns True if the inventory changed."""
+        try:
+            ports = sorted(serial.tools.list_ports.comports(), key=lambda p: p.device)
+        except Exception as e:
+            log_json(level="warn", event="port_scan_failed", error=str(e))
+            return False
+        devices = {p.device for p in ports}
+        with self._cond:
+            self._ports = ports
+            if devices == self._devices:
+                return False
+            added, removed = devices - self._devices, self._devices - devices
+            self._devices = devices
+            self._generation += 1
+            self._cond.notify_all()
+        if self._thread is not None:
+            log_json(event="serial_ports_changed", added=sorted(added), removed=sorted(removed))
+        return True
+
+    def ports(self) -> list:
+        with self._cond:
+            return list(self._ports)
+
+    def devices(self) -> Set[str]:
+        with self._cond:
+            return set(self._devices)
+
+    def kick(self):
+        """Wake every waiter (config change, shutdown) without a rescan."""
+        with self._cond:
+            self._generation += 1
+            self._cond.notify_all()
+
+    def wait_for(self, device: str, timeout: float) -> bool:
+        """Block until `device` is present, something kicks us, or `timeout` passes."""
+        with self._cond:
+            gen = self._generation
+            self._cond.wait_for(lambda: device in self._devices or self._generation != gen
+                                or self._stop.is_set(), timeout)
+            return device in self._devices
+
+    def wait_for_change(self, timeout: float):
+        """Block until the inventory changes, something kicks us, or `timeout` passes."""
+        with self._cond:
+            gen = self._generation
+            self._cond.wait_for(lambda: self._generation != gen or self._stop.is_set(), timeout)
+
+    def start(self):
+        self.refresh()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="port-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.kick()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    @staticmethod
+    def _inotify_dev() -> Optional[int]:
+        """inotify fd watching /dev for node create/delete/permission changes, or None."""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                return None
+            mask = _IN_CREATE | _IN_DELETE | _IN_ATTRIB | _IN_MOVED_FROM | _IN_MOVED_TO
+            if libc.inotify_add_watch(fd, b"/dev", mask) < 0:
+                os.close(fd)
+                return None
+            return fd
+        except (OSError, AttributeError):
+            return None
+
+    def _run(self):
+        fd = self._inotify_dev()
+        self.mode = "inotify" if fd is not None else "poll"
+        log_json(event="port_watcher_start", mode=self.mode)
+        try:
+            while not self._stop.is_set():
+                if fd is None:
+                    self._stop.wait(PORT_POLL_INTERVAL_S)
+                else:
+                    ready, _, _ = select.select([fd], [], [], PORT_RESCAN_INTERVAL_S)
+                    if ready:
+                        # udev creates the node, then fixes owner/mode: let the
+                        # burst settle so one rescan sees the finished device.
+                        self._stop.wait(0.1)
+                        try:
+                            while os.read(fd, 4096):
+                                pass
+                        except BlockingIOError:
+                            pass
+                if not self._stop.is_set():
+                    self.refresh()
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+_port_watcher = PortWatcher()
+
+
+# --- Raw frame journal -------------------------------------------------------
+# File layout: the 4-byte magic b"GSJ1", then one record per frame:
+#   <f64 unix time> <u8 direction (0 = RX, 1 = TX)> <u16 length> <frame bytes>
+# (little-endian). Frame bytes are exactly what crossed the UART, 0x7E first.
+_JOURNAL_MAGIC = b"GSJ1"
+_JOURNAL_REC = struct.Struct("<dBH")
+JOURNAL_RX, JOURNAL_TX = 0, 1
+
+
+def read_frame_journal(path):
+    """Yield (unix_time, direction, frame_bytes) for every record in a journal file."""
+    with open(path, "rb") as f:
+        if f.read(len(_JOURNAL_MAGIC)) != _JOURNAL_MAGIC:
+            raise ValueError(f"{path} is not a frame journal")
         while True:
-            _tx_queue.get_nowait()
-    except queue.Empty:
-        pass
+            head = f.read(_JOURNAL_REC.size)
+            if len(head) < _JOURNAL_REC.size:
+                return      # clean end, or a record cut off by a crash
+            ts, direction, n = _JOURNAL_REC.unpack(head)
+            frame = f.read(n)
+            if len(frame) < n:
+                return
+            yield ts, direction, frame
 
 
-def _drain_tx_queue(ser: serial.Serial):
+class FrameJournal:
     """
-    Write every queued uplink frame to the radio. Runs in the reader thread so it
-    never races _read_api2_frame(). A write failure propagates to the caller, which
-    treats it as a genuine disconnect and reconnects.
+    Append-only journal of raw API frames.
+
+    rx()/tx() are called from the serial I/O context and only append to a
+    deque; a background thread packs the records and writes them in one
+    buffered write per FRAME_JOURNAL_FLUSH_S, so a slow SD card can never
+    stall the reader. If the writer falls FRAME_JOURNAL_MAX_PENDING frames
+    behind, new frames are dropped and counted instead.
     """
-    while True:
-        try:
-            data = _tx_queue.get_nowait()
-        except queue.Empty:
+
+    def __init__(self, directory: Path, max_bytes: int, keep: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self._pending: Deque[tuple] = deque()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+        self._size = 0
+        self._files_opened = 0
+        self.path: Optional[Path] = None
+        self.records = 0
+        self.bytes = 0
+        self.dropped = 0
+        self.rotations = 0
+        self.errors = 0
+
+    def rx(self, frame: bytes):
+        self.record(JOURNAL_RX, frame)
+
+    def tx(self, frame: bytes):
+        self.record(JOURNAL_TX, frame)
+
+    def record(self, direction: int, frame: bytes):
+        if self._thread is None:
+            return
+        if len(self._pending) >= FRAME_JOURNAL_MAX_PENDING:
+            self.dropped += 1
+            return
+        # Oversize garbage between delimiters is cut to what the u16 length holds.
+        self._pending.append((time.time(), direction, frame[:0xFFFF]))
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="frame-journal", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Flush everything still queued and close the file."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self._thread is not None,
+            "file": str(self.path) if self.path else None,
+            "records": self.records,
+            "bytes": self.bytes,
+            "pending": len(self._pending),
+            "dropped": self.dropped,
+            "rotations": self.rotations,
+            "errors": self.errors,
+        }
+
+    def _run(self):
+        log_json(event="frame_journal_start", dir=str(self.directory))
+        while True:
+            stopping = self._stop.wait(FRAME_JOURNAL_FLUSH_S)
+            self._write_pending()
+            if stopping:
+                break
+        self._close_file()
+        log_json(event="frame_journal_stop", records=self.records, dropped=self.dropped)
+
+    def _write_pending(self):
+        if not self._pending:
             return
-        ser.write(data)
-        ser.flush()
+        out = bytearray()
+        pack = _JOURNAL_REC.pack
+        try:
+            if self._file is None:
+                self._open_file()
+            while self._pending:
+                ts, direction, frame = self._pending.popleft()
+                out += pack(ts, direction, len(frame))
+                out += frame
+                self.records += 1
+                if self._size + len(out) >= self.max_bytes:
+                    self._file_write(out)
+                    out.clear()
+                    self._close_file()
+                    self.rotations += 1
+                    self._open_file()
+            self._file_write(out)
+            self._file.flush()
+        except OSError as e:
+            # Lose this batch rather than wedge the journal; retry with a fresh file.
+            self.errors += 1
+            log_json(level="warn", event="frame_journal_write_failed", error=str(e))
+            self._close_file()
+
+    def _file_write(self, out: bytearray):
+        if out:
+            self._file.write(out)
+            self._size += len(out)
+            self.bytes += len(out)
+
+    def _open_file(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._files_opened += 1
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.path = self.directory / f"frames_{stamp}_{self._files_opened:03d}.gsj"
+        self._file = open(self.path, "ab", buffering=256 * 1024)
+        self._file.write(_JOURNAL_MAGIC)
+        self._size = len(_JOURNAL_MAGIC)
+        for old in sorted(self.directory.glob("frames_*.gsj"))[:-self.keep]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+    def _close_file(self):
+        f, self._file = self._file, None
+        if f is not None:
+            try:
+                f.close()
+            except OSError:
+                pass
+
+_frame_journal = FrameJournal(FRAME_JOURNAL_DIR, FRAME_JOURNAL_MAX_BYTES, FRAME_JOURNAL_KEEP)
+
 
-def serial_read_thread_target(loop):
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (milliseconds) with count/sum/max."""
+
+    BOUNDS_MS = (5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self):
+        self.buckets = [0] * (len(self.BOUNDS_MS) + 1)   # last bucket = overflow
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms: float):
+        i = 0
+        for i, bound in enumerate(self.BOUNDS_MS):
+            if ms <= bound:
+                break
+        else:
+            i = len(self.BOUNDS_MS)
+        self.buckets[i] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def _quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        target, seen = q * self.count, 0
+        for bound, n in zip(self.BOUNDS_MS + (self.max_ms,), self.buckets):
+            seen += n
+            if seen >= target:
+                return float(min(bound, self.max_ms))
+        return self.max_ms
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else None,
+            "p50_ms": self._quantile(0.5),
+            "p95_ms": self._quantile(0.95),
+            "max_ms": round(self.max_ms, 2),
+            "buckets": dict(zip([f"<={b}" for b in self.BOUNDS_MS] + ["inf"], self.buckets)),
+        }
+
+
+class UplinkTracker:
+    """
+    In-flight uplinks keyed by API frame ID (1-255, rotating).
+
+    The event loop allocates an ID when it frames a command, the serial I/O
+    context stamps the write and the 0x8B receipt, and a watchdog task expires
+    anything without a receipt after UPLINK_ACK_TIMEOUT_S. Per-command latency
+    is split into queue (enqueue -> UART write), air (write -> receipt) and total.
+    """
+
+    STAGES = ("queue", "air", "total")
+
+    def __init__(self, timeout_s: float):
+        self.timeout_s = timeout_s
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._inflight: Dict[int, dict] = {}
+        self._hist: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self.sent = 0
+        self.delivered = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.discarded = 0
+
+    @staticmethod
+    def command_name(cmd: str) -> str:
+        """Command keyword operators recognise: "CMD,1043,SIMP,101325" -> "SIMP"."""
+        parts = cmd.split(",", 3)
+        return parts[2] if len(parts) > 2 else cmd
+
+    def allocate(self, cmd: str, t_enqueued: float) -> int:
+        with self._lock:
+            fid = self._next_id
+            for _ in range(255):
+                if fid not in self._inflight:
+                    break
+                fid = fid % 255 + 1
+            # If all 255 are outstanding the oldest is simply overwritten; its
+            # receipt (if it ever comes) is then attributed to the new command.
+            self._next_id = fid % 255 + 1
+            self._inflight[fid] = {"cmd": cmd, "enqueued": t_enqueued, "written": None}
+            self.sent += 1
+            return fid
+
+    def mark_written(self, fid: int, now: float):
+        with self._lock:
+            entry = self._inflight.get(fid)
+            if entry is not None and entry["written"] is None:
+                entry["written"] = now
+
+    def discard(self, fid: int):
+        """The frame was never written (e.g. the TX queue was flushed on reconnect)."""
+        with self._lock:
+            if self._inflight.pop(fid, None) is not None:
+                self.discarded += 1
+
+    def _record(self, entry: dict, now: float) -> dict:
+        hists = self._hist.setdefault(self.command_name(entry["cmd"]),
+                                      {stage: LatencyHistogram() for stage in self.STAGES})
+        written = entry["written"] if entry["written"] is not None else now
+        lat = {
+            "queue": (written - entry["enqueued"]) * 1000.0,
+            "air": (now - written) * 1000.0,
+            "total": (now - entry["enqueued"]) * 1000.0,
+        }
+        for stage, ms in lat.items():
+            hists[stage].add(ms)
+        return lat
+
+    def ack(self, fid: int, delivered: bool, now: float) -> Optional[dict]:
+        """Match a 0x8B receipt. Returns {"cmd", "rtt_ms"} or None if the ID is unknown."""
+        with self._lock:
+            entry = self._inflight.pop(fid, None)
+            if entry is None:
+                return None
+            if delivered:
+                self.delivered += 1
+                lat = self._record(entry, now)
+            else:
+                self.failed += 1
+                lat = {"total": (now - entry["enqueued"]) * 1000.0}
+            return {"cmd": entry["cmd"], "rtt_ms": round(lat["total"], 1)}
+
+    def expire(self, now: float) -> List[dict]:
+        """Remove and return uplinks whose receipt is overdue."""
+        with self._lock:
+            overdue = [fid for fid, e in self._inflight.items()
+                       if now - (e["written"] or e["enqueued"]) > self.timeout_s]
+            out = []
+            for fid in overdue:
+                entry = self._inflight.pop(fid)
+                self.timed_out += 1
+                out.append({"frame_id": fid, "cmd": entry["cmd"], "written": entry["written"] is not None})
+            return out
+
+    def stats(self, now: float) -> dict:
+        with self._lock:
+            return {
+                "sent": self.sent,
+                "delivered": self.delivered,
+                "failed": self.failed,
+                "timed_out": self.timed_out,
+                "discarded": self.discarded,
+                "in_flight": [
+                    {"frame_id": fid, "cmd": e["cmd"],
+                     "age_ms": round((now - e["enqueued"]) * 1000.0, 1),
+                     "written": e["written"] is not None}
+                    for fid, e in self._inflight.items()
+                ],
+                "latency": {name: {stage: h.snapshot() for stage, h in hists.items()}
+                            for name, hists in self._hist.items()},
+            }
+
+_uplink_tracker = UplinkTracker(UPLINK_ACK_TIMEOUT_S)
+
+
+RSSI_POLL_MODES = ("every_n", "max_hz", "on_loss", "every_packet")
+
+class RssiPoller:
     """
-    This function runs in the background (a separate thread).
-    Its job is to:
-    1. Connect to the radio (serial port).
-    2. Listen for incoming data constantly.
-    3. Send any received data to the main program to be processed.
+    Decides after each telemetry packet whether to send an ATDB query.
+    Only ever consulted from the serial I/O context; /api/rssi/policy swaps
+    `cfg` wholesale, which is a single atomic attribute store.
     """
-    global _serial_port
-    
-    log_json(event="serial_thread_start")
 
-    while not _stop_event.is_set():
-        # 1. Try to Connect
-        if _serial_port is None:
+    def __init__(self, cfg: RssiPolicyCfg):
+        self.cfg = cfg
+        self.packets = 0          # telemetry packets seen
+        self.queries = 0          # ATDB queries actually sent
+        self._since_query = 0
+        self._last_query = 0.0
+        self._last_rx = 0
+        self._last_loss = 0
+        self._last_loss_rate = 0.0
+
+    def should_query(self, now: float) -> bool:
+        self.packets += 1
+        self._since_query += 1
+        cfg = self.cfg
+        if cfg.mode == "every_packet":
+            due = True
+        elif cfg.mode == "every_n":
+            due = self._since_query >= cfg.every_n
+        elif cfg.mode == "on_loss":
+            # Loss rate of the primary CanSat over the packets since the previous
+            # query (counters are owned by the event loop; reading two ints here
+            # is race-tolerant).
+            rx, loss = _primary.rx_count, _primary.loss_count
+            d_rx, d_loss = rx - self._last_rx, loss - self._last_loss
+            rate = d_loss / (d_rx + d_loss) if d_rx + d_loss > 0 else 0.0
+            due = rate > self._last_loss_rate or now - self._last_query >= cfg.max_age_s
+            if due:
+                self._last_rx, self._last_loss, self._last_loss_rate = rx, loss, rate
+        else:  # "max_hz"
+            due = now - self._last_query >= 1.0 / cfg.max_hz
+        if due:
+            self.queries += 1
+            self._since_query = 0
+            self._last_query = now
+        return due
+
+    def stats(self) -> dict:
+        return {**self.cfg.model_dump(), "packets": self.packets, "queries": self.queries}
+
+_rssi_poller = RssiPoller(RssiPolicyCfg())
+
+def _telemetry_item(payload: bytes) -> Optional[tuple]:
+    """(line, values) for the RF data of a 0x90 frame: values from the packed
+    binary decoder, or None for a CSV text line. None if there is no line."""
+    try:
+        if _packed_decoder is not None and _packed_decoder.matches(payload):
+            return _packed_decoder.decode(payload)
+        line = payload.decode(errors="ignore").rstrip("\r\n")
+        return (line, None) if line else None
+    except Exception as e:
+        log_json(level="warn", event="telemetry_decode_error", error=str(e), payload=payload.hex())
+        return None
+
+def _dispatch_frame(frame: dict, write, broadcast) -> None:
+    """
+    Act on one decoded API frame. Shared by both serial transports:
+      write(data)      — send bytes to the radio from the port's own I/O context
+      broadcast(dict)  — budgeted WebSocket broadcast
+    Telemetry goes through the bounded _telemetry_handoff ring as a
+    (line, values, source address) triple; values is None for a CSV text
+    line, or the record values the packed binary decoder already produced.
+    """
+    if frame["type"] == "telemetry":
+        item = _telemetry_item(frame["payload"])
+        if item is not None:
+            _telemetry_handoff.push(item + (frame["src"],))
+        # Query RSSI from the local GCS XBee when the sampling policy says so.
+        # ATDB is a LOCAL command — written from the port's own I/O context
+        # so it can never race the read.
+        if _rssi_poller.should_query(time.monotonic()):
+            try:
+                write(_DB_QUERY_FRAME)
+            except Exception:
+                pass
+
+    elif frame["type"] == "rssi":
+        # No broadcast of its own: the value is folded into the next telemetry packet.
+        state.rssi_dbm = frame["dbm"]
+
+    elif frame["type"] == "tx_status":
+        # Delivery receipt for one uplink (0x00 = delivered), matched by frame ID.
+        state.last_tx_status = frame["delivery"]
+        ok = frame["delivery"] == 0
+        match = _uplink_tracker.ack(frame["frame_id"], ok, time.monotonic())
+        broadcast({
+            "type": "tx_status",
+            "frame_id": frame["frame_id"],
+            "delivery": frame["delivery"],
+            "ok": ok,
+            "retries": frame["retries"],
+            **(match or {}),
+        })
+
+class RadioLink:
+    """
+    One ground radio: an XBee on its own serial port, with its own reader
+    thread (or asyncio transport), TX queue and reconnect logic. Every link
+    feeds the same telemetry pipeline — a packet heard by two radios is
+    logged twice but flagged as a duplicate by the CanSat's SequenceTracker
+    and only shown once — and uplinks go
+    out through the first connected link (uplink_link()).
+
+    The first link is the one /api/serial/config controls (it follows
+    state.cfg); extra links get a fixed port from GS_EXTRA_RADIOS or
+    POST /api/radios.
+    """
+
+    def __init__(self, name: str, cfg: Optional[SerialCfg] = None):
+        self.name = name
+        self._cfg = cfg
+        self.port: Optional[serial.Serial] = None
+        self.lock = threading.Lock()
+        self.tx_queue: "queue.PriorityQueue[tuple]" = queue.PriorityQueue(maxsize=200)
+        self.connected = threading.Event()          # set while the port is open & usable
+        self.reconnect_request = threading.Event()  # set by HTTP handlers to ask for a clean reconnect
+        self.stop_event = threading.Event()         # stops just this link (DELETE /api/radios)
+        self.thread: Optional[threading.Thread] = None
+        self.transport: Optional["AsyncioSerialTransport"] = None
+        self.task: Optional[asyncio.Task] = None
+        self.frames = 0         # API frames decoded on this link
+        self.connects = 0
+
+    @property
+    def cfg(self) -> SerialCfg:
+        return self._cfg if self._cfg is not None else state.cfg
+
+    def stopping(self) -> bool:
+        return _stop_event.is_set() or self.stop_event.is_set()
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        """Start this link's reader: a thread, or a loop task with the asyncio transport."""
+        if SERIAL_TRANSPORT == "asyncio" and AsyncioSerialTransport.supported():
+            # The event loop owns the port: no reader thread at all.
+            self.transport = AsyncioSerialTransport(loop, self)
+            self.task = asyncio.create_task(self.transport.run())
+        else:
+            # A thread, because reading is blocking.
+            self.thread = threading.Thread(target=self.run, args=(loop,), daemon=True,
+                                           name=f"serial-{self.name}")
+            self.thread.start()
+
+    async def stop(self):
+        """Stop this link's reader and close its port."""
+        self.stop_event.set()
+        _port_watcher.kick()    # the reader may be parked waiting for its port
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        if self.thread is not None:
+            await asyncio.to_thread(self.thread.join, 2)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "port": self.cfg.port,
+            "baud": self.cfg.baud,
+            "connected": self.connected.is_set(),
+            "transport": "asyncio" if self.transport is not None else "thread",
+            "frames": self.frames,
+            "connects": self.connects,
+            "tx_depth": self.tx_queue.qsize(),
+        }
+
+    def close(self):
+        """Close and clear the port. Called ONLY from this link's reader thread."""
+        self.connected.clear()
+        with self.lock:
+            if self.port:
+                try:
+                    self.port.close()
+                except Exception:
+                    pass
+                self.port = None
+        # Drop any unsent uplinks so they aren't fired late after a reconnect.
+        try:
+            while True:
+                _, _, fid, _ = self.tx_queue.get_nowait()
+                _uplink_tracker.discard(fid)
+        except queue.Empty:
+            pass
+
+    def drain_tx(self, ser: serial.Serial):
+        """
+        Write every queued uplink frame to the radio, highest-priority lane first.
+        Runs in the reader thread so it
+        never races the serial read. A write failure propagates to the caller, which
+        treats it as a genuine disconnect and reconnects.
+        """
+        while True:
             try:
-                # Check if the selected port actually exists
-                available_ports = [p.device for p in serial.tools.list_ports.comports()]
-                if state.cfg.port not in available_ports:
-                    # If not found, log an error and wait 5 seconds before trying again
-                    log_json(level="error", event="port_not_found", port=state.cfg.port, available=available_ports)
-                    time.sleep(5)
+                _, _, fid, data = self.tx_queue.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                ser.write(data)
+                ser.flush()
+            except Exception:
+                _uplink_tracker.discard(fid)    # never sent: no receipt to wait for
+                raise
+            _frame_journal.tx(data)
+            _uplink_tracker.mark_written(fid, time.monotonic())
+
+    def run(self, loop):
+        """
+        This function runs in the background (a separate thread).
+        Its job is to:
+        1. Connect to the radio (serial port).
+        2. Listen for incoming data constantly.
+        3. Send any received data to the main program to be processed.
+        """
+        log_json(event="serial_thread_start", radio=self.name)
+        decoder = Api2FrameDecoder(on_raw=_frame_journal.rx)
+
+        def write(data: bytes):
+            self.port.write(data)
+            self.port.flush()
+            _frame_journal.tx(data)
+
+        def broadcast(payload: dict):
+            _thread_broadcast(payload, loop)
+
+        def status(connected: bool, port: str):
+            _thread_broadcast({"type": "serial_status", "connected": connected, "port": port,
+                               "radio": self.name}, loop)
+
+        while not self.stopping():
+            # 1. Try to Connect
+            if self.port is None:
+                port, baud = self.cfg.port, self.cfg.baud
+                try:
+                    # Check if the selected port actually exists (cached inventory)
+                    available_ports = _port_watcher.devices()
+                    if port not in available_ports:
+                        # If not found, log an error and wait up to 5 seconds — the
+                        # port watcher wakes us the moment the port reappears.
+                        log_json(level="error", event="port_not_found", radio=self.name, port=port,
+                                 available=sorted(available_ports))
+                        _port_watcher.wait_for(port, 5)
+                        continue
+
+                    log_json(event="serial_connecting", radio=self.name, port=port, baud=baud)
+                    # Short read timeout bounds uplink latency: the loop returns from
+                    # read() promptly to drain the TX queue. Safe at 115200 — a single
+                    # API frame arrives contiguously and won't truncate within 0.2s.
+                    ser = serial.Serial(port, baud, timeout=0.2)
+
+                    # Safely save the connection object
+                    with self.lock:
+                        self.port = ser
+                    decoder.reset()   # never splice a stale partial frame onto the new link
+                    self.connected.set()
+                    self.connects += 1
+                    # We just opened with the current cfg, so any pending request is satisfied.
+                    self.reconnect_request.clear()
+                    log_json(event="serial_connected", radio=self.name, port=port)
+                    status(True, port)
+                except SerialException as e:
+                    msg = str(e)
+                    if "Access is denied" in msg:
+                        print(f"\n[!!!] SERIAL ERROR: Access Denied on {port}. Close other apps (VSCode, CoolTerm)!\n")
+                    log_json(level="warn", event="serial_open_failed", radio=self.name, port=port, error=msg)
+                    _port_watcher.wait_for_change(2)   # e.g. udev still fixing permissions
+                    continue
+                except Exception as e:
+                    log_json(level="warn", event="serial_open_failed", radio=self.name, port=port, error=str(e))
+                    _port_watcher.wait_for_change(2)
                     continue
 
-                log_json(event="serial_connecting", port=state.cfg.port, baud=state.cfg.baud)
-                # Short read timeout bounds uplink latency: the loop returns from
-                # read() promptly to drain the TX queue. Safe at 115200 — a single
-                # API frame arrives contiguously and won't truncate within 0.2s.
-                ser = serial.Serial(state.cfg.port, state.cfg.baud, timeout=0.2)
-
-                # Safely save the connection object
-                with _serial_lock:
-                    _serial_port = ser
-                _serial_connected.set()
-                # We just opened with the current cfg, so any pending request is satisfied.
-                _reconnect_request.clear()
-                log_json(event="serial_connected", port=state.cfg.port)
-                _thread_broadcast({"type": "serial_status", "connected": True, "port": state.cfg.port}, loop)
-            except SerialException as e:
-                msg = str(e)
-                if "Access is denied" in msg:
-                    print(f"\n[!!!] SERIAL ERROR: Access Denied on {state.cfg.port}. Close other apps (VSCode, CoolTerm)!\n")
-                log_json(level="warn", event="serial_open_failed", port=state.cfg.port, error=msg)
-                time.sleep(2)
-                continue
+            # 2. Read + Write Loop — ALL I/O on this port happens in THIS thread only,
+            #    so a uplink write can never race the blocking read below (which on
+            #    Linux would raise "multiple access on port" and force a spurious reconnect).
+            port = self.cfg.port
+            try:
+                # Honor a clean-reconnect request from an HTTP handler (e.g. config change).
+                if self.reconnect_request.is_set():
+                    self.reconnect_request.clear()
+                    log_json(event="serial_reconnect_request", radio=self.name, port=port)
+                    self.close()
+                    status(False, port)
+                    continue
+
+                ser = self.port
+                if ser and ser.is_open:
+                    # Flush any queued uplink frames first (single-threaded write).
+                    self.drain_tx(ser)
+
+                    # Bulk read: everything already buffered by the driver, or block
+                    # (up to the 0.2 s timeout) for the first byte of the next frame.
+                    # The decoder keeps partial frames until the rest arrives.
+                    data = ser.read(ser.in_waiting or 1)
+                    if not data:
+                        continue  # timeout — port is still fine
+
+                    frames = decoder.feed(data)
+                    self.frames += len(frames)
+                    for frame in frames:
+                        _dispatch_frame(frame, write, broadcast)
+                else:
+                    # Port object missing or closed — clean up and reconnect.
+                    self.close()
+                    status(False, port)
+                    _port_watcher.wait_for_change(1)
+
             except Exception as e:
-                log_json(level="warn", event="serial_open_failed", port=state.cfg.port, error=str(e))
-                time.sleep(2)
-                continue
+                # A genuine read/write failure (real disconnect). Close and reconnect.
+                log_json(level="error", event="serial_read_error", radio=self.name, error=str(e))
+                self.close()
+                status(False, port)
+                _port_watcher.wait_for_change(1)   # the unplug itself usually ends this wait
+
+        # Cleanup when the program stops
+        self.close()
+        log_json(event="serial_thread_stop", radio=self.name)
+
+_radios: List[RadioLink] = [RadioLink("radio0")]    # [0] follows state.cfg; see start_radio_links()
+
+def uplink_link() -> Optional[RadioLink]:
+    """The link uplinks go out on: the first connected one, in link order."""
+    for link in _radios:
+        if link.connected.is_set():
+            return link
+    return None
 
-        # 2. Read + Write Loop — ALL serial I/O happens in THIS thread only, so a
-        #    uplink write can never race the blocking read below (which on Linux
-        #    would raise "multiple access on port" and force a spurious reconnect).
-        try:
-            # Honor a clean-reconnect request from an HTTP handler (e.g. config change).
-            if _reconnect_request.is_set():
-                _reconnect_request.clear()
-                log_json(event="serial_reconnect_request", port=state.cfg.port)
-                _close_serial()
-                _thread_broadcast({"type": "serial_status", "connected": False, "port": state.cfg.port}, loop)
-                continue
+def start_radio_links(loop: asyncio.AbstractEventLoop):
+    """Start radio0 plus one link per GS_EXTRA_RADIOS port."""
+    for port in EXTRA_RADIO_PORTS:
+        if any(link.cfg.port == port for link in _radios):
+            log_json(level="warn", event="radio_port_in_use", port=port)
+            continue
+        _radios.append(RadioLink(f"radio{len(_radios)}", SerialCfg(port=port, baud=DEFAULT_BAUD)))
+    for link in _radios:
+        link.start(loop)
 
-            if _serial_port and _serial_port.is_open:
-                # Flush any queued uplink frames first (single-threaded write).
-                _drain_tx_queue(_serial_port)
+class AsyncioSerialTransport:
+    """
+    Event-loop serial transport (SERIAL_TRANSPORT = "asyncio").
 
-                frame = _read_api2_frame(_serial_port)
-                if frame is None:
-                    pass  # timeout or bad checksum — port is still fine
+    The port is opened non-blocking and its fd registered with loop.add_reader,
+    so every read, decode, telemetry hand-off and uplink write happens on the
+    event loop thread. That keeps the same single-writer rule as the reader
+    thread (one context owns the fd) without a cross-thread wakeup per packet.
+    """
 
-                elif frame["type"] == "telemetry":
-                    try:
-                        line = frame["payload"].decode(errors="ignore").rstrip("\r\n")
-                        if line:
-                            try:
-                                asyncio.run_coroutine_threadsafe(handle_telemetry_line(line), loop)
-                            except RuntimeError:
-                                pass
-                    except Exception:
-                        pass
-                    # Query RSSI of this packet from the local GCS XBee immediately.
-                    # ATDB is a LOCAL command — write it here in the same (and only)
-                    # I/O thread so it can never race the read above.
-                    try:
-                        _serial_port.write(_build_db_query())
-                        _serial_port.flush()
-                    except Exception:
-                        pass
-
-                elif frame["type"] == "rssi":
-                    state.rssi_dbm = frame["dbm"]
-                    _thread_broadcast({"type": "rssi", "dbm": frame["dbm"]}, loop)
-
-                elif frame["type"] == "tx_status":
-                    # Delivery receipt for the last uplink command (0x00 = delivered).
-                    state.last_tx_status = frame["delivery"]
-                    _thread_broadcast({
-                        "type": "tx_status",
-                        "delivery": frame["delivery"],
-                        "ok": frame["delivery"] == 0,
-                        "retries": frame["retries"],
-                    }, loop)
-            else:
-                # Port object missing or closed — clean up and reconnect.
-                _close_serial()
-                _thread_broadcast({"type": "serial_status", "connected": False, "port": state.cfg.port}, loop)
-                time.sleep(1)
+    def __init__(self, loop: asyncio.AbstractEventLoop, link: RadioLink):
+        self.loop = loop
+        self.link = link
+        self.decoder = Api2FrameDecoder(on_raw=_frame_journal.rx)
+        self._ser: Optional[serial.Serial] = None
+        self._lost = asyncio.Event()
+
+    @staticmethod
+    def supported() -> bool:
+        return os.name == "posix"
+
+    def write(self, data: bytes):
+        """Send bytes to the radio. Only ever called on the event loop thread."""
+        if self._ser is None:
+            raise SerialException("serial not connected")
+        # No flush(): tcdrain would block the loop until the UART has shifted the
+        # bytes out. The kernel tty buffer takes a few hundred bytes immediately.
+        self._ser.write(data)
+        _frame_journal.tx(data)
+
+    def _on_readable(self):
+        ser = self._ser
+        if ser is None:
+            return
+        try:
+            data = ser.read(ser.in_waiting or 1)
+        except Exception as e:
+            # Readable-but-empty means the device went away (pyserial raises).
+            log_json(level="error", event="serial_read_error", radio=self.link.name, error=str(e))
+            self._lost.set()
+            return
+        frames = self.decoder.feed(data)
+        self.link.frames += len(frames)
+        for frame in frames:
+            _dispatch_frame(frame, self._write_quiet, _loop_broadcast)
 
+    def _write_quiet(self, data: bytes):
+        try:
+            self.write(data)
         except Exception as e:
-            # A genuine read/write failure (real disconnect). Close and reconnect.
-            log_json(level="error", event="serial_read_error", error=str(e))
-            _close_serial()
-            _thread_broadcast({"type": "serial_status", "connected": False, "port": state.cfg.port}, loop)
-            time.sleep(1)
+            log_json(level="error", event="serial_write_error", radio=self.link.name, error=str(e))
+            self._lost.set()
+
+    def _close(self):
+        link = self.link
+        link.connected.clear()
+        ser, self._ser = self._ser, None
+        if ser is not None:
+            try:
+                self.loop.remove_reader(ser.fileno())
+            except Exception:
+                pass
+            try:
+                ser.close()
+            except Exception:
+                pass
+        with link.lock:
+            link.port = None
 
-    # Cleanup when the program stops
-    _close_serial()
-    log_json(event="serial_thread_stop")
+    async def _open(self) -> bool:
+        link = self.link
+        port, baud = link.cfg.port, link.cfg.baud
+        try:
+            available_ports = _port_watcher.devices()
+            if port not in available_ports:
+                log_json(level="error", event="port_not_found", radio=link.name, port=port,
+                         available=sorted(available_ports))
+                await asyncio.to_thread(_port_watcher.wait_for, port, 5)
+                return False
+            log_json(event="serial_connecting", radio=link.name, port=port, baud=baud, transport="asyncio")
+            ser = await asyncio.to_thread(serial.Serial, port, baud, timeout=0)
+        except Exception as e:
+            log_json(level="warn", event="serial_open_failed", radio=link.name, port=port, error=str(e))
+            return False
+        self._ser = ser
+        with link.lock:
+            link.port = ser
+        self.decoder.reset()
+        self._lost.clear()
+        self.loop.add_reader(ser.fileno(), self._on_readable)
+        link.connected.set()
+        link.connects += 1
+        link.reconnect_request.clear()
+        log_json(event="serial_connected", radio=link.name, port=port, transport="asyncio")
+        await broadcast_ws({"type": "serial_status", "connected": True, "port": port, "radio": link.name})
+        return True
+
+    async def run(self):
+        """Connect, then supervise the link until cancelled; reconnects like the thread does."""
+        link = self.link
+        log_json(event="serial_transport_start", radio=link.name, transport="asyncio")
+        try:
+            while True:
+                if self._ser is None:
+                    if not await self._open():
+                        if self._ser is None and link.cfg.port in _port_watcher.devices():
+                            await asyncio.to_thread(_port_watcher.wait_for_change, 2)
+                        continue
+                # Nothing to do here while the loop delivers reads; wake up to
+                # notice a lost link or a reconnect request from /api/serial/config.
+                try:
+                    await asyncio.wait_for(self._lost.wait(), timeout=0.25)
+                except asyncio.TimeoutError:
+                    pass
+                if self._lost.is_set() or link.reconnect_request.is_set():
+                    if link.reconnect_request.is_set():
+                        link.reconnect_request.clear()
+                        log_json(event="serial_reconnect_request", radio=link.name, port=link.cfg.port)
+                    self._close()
+                    await broadcast_ws({"type": "serial_status", "connected": False, "port": link.cfg.port,
+                                        "radio": link.name})
+                    await asyncio.to_thread(_port_watcher.wait_for_change, 1)
+        finally:
+            self._close()
+            log_json(event="serial_transport_stop", radio=link.name, transport="asyncio")
 
 async def serial_writer_worker():
     """
@@ -855,36 +2582,66 @@ async def serial_writer_worker():
     It must NOT write to the serial port directly: that would put a write on a
     different thread from the blocking read, which trips pyserial's "multiple
     access on port" error on Linux and causes a reconnect on every uplink. Instead
-    it builds the API frame and pushes the bytes onto _tx_queue, which the single
-    serial I/O thread drains between reads.
+    it builds the API frame and pushes the bytes onto the link's tx_queue, which
+    that link's serial I/O thread drains between reads. With the asyncio transport
+    the loop itself owns the port, so the frame is written straight out from here.
     """
     while True:
         # Wait for a command to appear in the queue
-        cmd = await uplink_q.get()
+        cmd, t_enqueued, lane = await uplink_q.get()
         try:
-            # Fast-fail with clear feedback if the radio isn't connected.
-            if not _serial_connected.is_set():
+            # Fast-fail with clear feedback if no radio is connected.
+            link = uplink_link()
+            if link is None:
                 log_json(level="warn", event="uplink_dropped_no_serial", cmd=cmd)
                 await broadcast_ws({"type": "error", "message": "UPLINK FAILED: Serial not connected."})
                 continue
 
             # Wrap the command in an API Mode 2 Transmit Request frame (0x10) and
             # hand it to the reader thread for the actual write.
-            data = _build_api2_tx_frame((cmd + "\r\n").encode())
+            # Each frame gets its own rotating ID so its 0x8B receipt can be matched.
+            fid = _uplink_tracker.allocate(cmd, t_enqueued)
+            data = _build_api2_tx_frame((cmd + "\r\n").encode(), fid)
             try:
-                _tx_queue.put_nowait(data)
+                if link.transport is not None:
+                    link.transport.write(data)
+                    _uplink_tracker.mark_written(fid, time.monotonic())
+                else:
+                    link.tx_queue.put_nowait((uplink_q.priority[lane], next(_tx_seq), fid, data))
             except queue.Full:
+                _uplink_tracker.discard(fid)
                 log_json(level="warn", event="uplink_dropped_tx_full", cmd=cmd)
                 await broadcast_ws({"type": "error", "message": "UPLINK FAILED: TX buffer full."})
                 continue
+            except Exception as e:
+                # The asyncio transport refused the write (port gone): the frame
+                # never left, so free its ID instead of timing out on a receipt.
+                _uplink_tracker.discard(fid)
+                log_json(level="error", event="uplink_write_failed", cmd=cmd, radio=link.name, error=str(e))
+                await broadcast_ws({"type": "error", "message": f"UPLINK FAILED: {e}"})
+                continue
 
-            log_json(subsystem="uplink", sent=cmd)
-            ring.append(json.dumps({"uplink": cmd}))
+            log_json(subsystem="uplink", sent=cmd, frame_id=fid, radio=link.name)
+            ring.append(json.dumps({"uplink": cmd, "frame_id": fid}))
 
         except Exception as e:
             log_json(level="error", event="uplink_error", error=str(e), cmd=cmd)
             await broadcast_ws({"type": "error", "message": f"UPLINK ERROR: {e}"})
 
+async def uplink_ack_watchdog():
+    """Once a second, report uplinks whose 0x8B receipt never arrived."""
+    while True:
+        await asyncio.sleep(1.0)
+        for item in _uplink_tracker.expire(time.monotonic()):
+            log_json(level="warn", event="uplink_ack_timeout", **item)
+            await broadcast_ws({
+                "type": "tx_status",
+                "frame_id": item["frame_id"],
+                "cmd": item["cmd"],
+                "ok": False,
+                "timeout": True,
+            })
+
 # ===================== TELEMETRY PIPELINE (Processing Data) =====================
 def now_utc_iso() -> str:
     """Returns the current time in UTC as a string."""
@@ -892,150 +2649,1040 @@ def now_utc_iso() -> str:
 
 _BROADCAST_BUDGET = 64  # Maximum simultaneously-scheduled broadcasts.
 _pending_broadcasts: Set[asyncio.Future] = set()
+_broadcast_drops = 0    # Broadcasts skipped because the budget was exhausted (see /api/health).
 
-def _thread_broadcast(payload: dict, loop) -> None:
-    """Call broadcast_ws from a non-async thread. Drops the broadcast if too
-    many are already pending so a slow event loop cannot grow an unbounded
+def _budgeted_broadcast(payload: dict, schedule) -> None:
+    """Schedule broadcast_ws(payload) via schedule(coro). Drops the broadcast if
+    too many are already pending so a slow event loop cannot grow an unbounded
     scheduling queue under high TX rates."""
+    global _broadcast_drops
     if len(_pending_broadcasts) >= _BROADCAST_BUDGET:
+        _broadcast_drops += 1
         return
+    coro = broadcast_ws(payload)
     try:
-        fut = asyncio.run_coroutine_threadsafe(broadcast_ws(payload), loop)
+        fut = schedule(coro)
     except RuntimeError:
+        coro.close()
         return
     _pending_broadcasts.add(fut)
     fut.add_done_callback(_pending_broadcasts.discard)
 
+def _thread_broadcast(payload: dict, loop) -> None:
+    """Call broadcast_ws from a non-async thread (budgeted, see above)."""
+    _budgeted_broadcast(payload, lambda coro: asyncio.run_coroutine_threadsafe(coro, loop))
+
+def _loop_broadcast(payload: dict) -> None:
+    """Call broadcast_ws from synchronous code already running on the event loop."""
+    _budgeted_broadcast(payload, asyncio.ensure_future)
+
+def _json_text(obj) -> str:
+    """
+    Compact JSON text for the wire (WebSocket, ring, /api/logs); orjson if
+    available. An int wider than 64 bits (a corrupted counter) is too much
+    for orjson and goes through json instead. Either way NaN/Infinity come
+    out as null, as orjson writes them (a browser's JSON.parse rejects NaN).
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj).decode()
+        except TypeError:
+            pass
+    return json.dumps(_json_finite(obj), separators=(",", ":"))
+
+def _json_finite(obj):
+    """obj with every non-finite float replaced by None (nested dicts/lists too)."""
+    if type(obj) is float:
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _json_finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_json_finite(v) for v in obj]
+    return obj
+
+class WsClient:
+    """
+    One connected browser with its own outbound queue and sender task.
+    Broadcasting only queues (no await on the socket), so a slow link delays
+    nobody but itself: not ingest, not the other clients.
+
+    Messages go out in the order they were queued. Control messages
+    (log_switched, kml_saved, errors, tx_status, ...) are always delivered.
+    Telemetry is latest-value: at most one telemetry message waits, and a newer
+    packet replaces it, so a client that falls behind skips stale packets
+    (counted in `dropped`) and always gets the freshest one next.
+    A client that can't keep up even with control messages, or whose socket
+    write has been stuck for WS_SEND_STALL_S, is disconnected.
+
+    A client may subscribe (see subscribe()) to just some telemetry fields
+    and message types; until then it gets everything.
+    """
+
+    def __init__(self, ws: WebSocket, info: str, binary: bool = False):
+        self.ws = ws
+        self.info = info
+        self.binary = binary    # WS_BINARY_PROTOCOL: telemetry goes out as WsBinaryFrame
+        self._frame_base = (None, 0)    # (encoder, seq) of the last binary frame sent
+        self.fields: Optional[tuple] = None         # telemetry fields sent (record order); None: all
+        self.types: Optional[frozenset] = None      # message types sent ("telemetry", "tx_status", ...); None: all
+        self.rate_hz: Optional[float] = None        # telemetry windows per second (TelemetryDecimator); None: every packet
+        # (order, text, enqueue time); the sender takes the lower order of the two heads.
+        self._control: Deque[tuple] = deque()
+        self._telemetry: Deque[tuple] = deque()
+        self._order = 0
+        self._ready = asyncio.Event()
+        self._sending_since = 0.0
+        self.closed = False
+        self.task: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.dropped = 0        # stale telemetry packets skipped because the client fell behind
+        self.bytes = 0
+        self.high_water = 0     # most control messages queued at once
+        self.lag_ms = 0.0       # enqueue -> written, last message
+        self.lag_ms_max = 0.0
+        self._lag_ms_total = 0.0
+
+    def subscribe(self, msg: dict) -> dict:
+        """
+        Apply a {"type": "subscribe", ...} message from the client:
+            "fields":  ["altitude_m", "state", ...]  only these telemetry fields
+            "exclude": ["gs_raw_line"]               every field but these
+            "types":   ["telemetry", "tx_status"]    only these message types
+            "rate_hz": 2                             at most this many telemetry
+                                                     messages a second, with window
+                                                     min/max (TelemetryDecimator)
+        A key left out (or null) means everything, at the full rate. Returns
+        the reply for the client; unknown field names are ignored and listed.
+        """
+        known = TelemetryRecord._fields
+        fields, exclude, types = msg.get("fields"), msg.get("exclude"), msg.get("types")
+        rate_hz = msg.get("rate_hz")
+        for name, value in (("fields", fields), ("exclude", exclude), ("types", types)):
+            if value is not None and not (isinstance(value, list) and all(isinstance(v, str) for v in value)):
+                return {"type": "error", "message": f"subscribe: {name} must be a list of strings"}
+        if rate_hz is not None and (isinstance(rate_hz, bool) or not isinstance(rate_hz, (int, float))
+                                    or not 0 < rate_hz <= 1000):
+            return {"type": "error", "message": "subscribe: rate_hz must be a number above 0"}
+        wanted = set(fields) if fields is not None else set(known)
+        wanted -= set(exclude or ())
+        chosen = tuple(f for f in known if f in wanted)
+        if not chosen:
+            return {"type": "error", "message": "subscribe: no known telemetry field left"}
+        self.fields = None if len(chosen) == len(known) else chosen
+        self.types = None if types is None else frozenset(types)
+        self.rate_hz = None if rate_hz is None else float(rate_hz)
+        log_json(event="ws_subscribed", client=self.info, fields=len(chosen),
+                 types=None if types is None else sorted(self.types), rate_hz=self.rate_hz)
+        return {"type": "subscribed", "fields": list(chosen), "types": types, "rate_hz": self.rate_hz,
+                "unknown": sorted(set(fields or ()) - set(known))}
+
+    def wants(self, msg_type: Optional[str]) -> bool:
+        return self.types is None or msg_type is None or msg_type in self.types
+
+    def send_control(self, text: str):
+        if self._stalled():
+            return
+        if len(self._control) >= WS_CLIENT_CONTROL_DEPTH:
+            self.close("control_overflow")
+            return
+        self._order += 1
+        self._control.append((self._order, text, time.monotonic()))
+        if len(self._control) > self.high_water:
+            self.high_water = len(self._control)
+        self._ready.set()
+
+    def send_telemetry(self, text: str):
+        if self._stalled():
+            return
+        if self._telemetry:
+            self._telemetry.clear()
+            self.dropped += 1
+        self._order += 1
+        self._telemetry.append((self._order, text, time.monotonic()))
+        self._ready.set()
+
+    def _stalled(self) -> bool:
+        if self.closed:
+            return True
+        if self._sending_since and time.monotonic() - self._sending_since > WS_SEND_STALL_S:
+            self.close("send_stalled")
+            return True
+        return False
+
+    async def run(self):
+        """Sender task: write queued messages to the socket one at a time."""
+        try:
+            while True:
+                await self._ready.wait()
+                control, telemetry = self._control, self._telemetry
+                if control and (not telemetry or control[0][0] < telemetry[0][0]):
+                    _, text, t = control.popleft()
+                elif telemetry:
+                    _, text, t = telemetry.popleft()
+                else:
+                    self._ready.clear()
+                    continue
+                self._sending_since = time.monotonic()
+                if type(text) is WsBinaryFrame:
+                    # A delta only follows the frame it was taken against; after a
+                    # skipped (stale) packet or a new schema the client gets a full one.
+                    frame, (encoder, seq) = text, self._frame_base
+                    try:
+                        text = frame.delta() if frame.encoder is encoder and frame.seq == seq + 1 else None
+                        if text is None:
+                            text = frame.full()
+                    except (struct.error, OverflowError, TypeError, ValueError) as e:
+                        # A value the wire format can't carry: skip this packet,
+                        # not the client (the socket is fine).
+                        log_json(level="warn", event="ws_frame_encode_failed", client=self.info, error=str(e))
+                        self._sending_since = 0.0
+                        self._frame_base = (None, 0)
+                        continue
+                    self._frame_base = (frame.encoder, frame.seq)
+                    await self.ws.send_bytes(text)
+                else:
+                    await self.ws.send_text(text)
+                now = time.monotonic()
+                self._sending_since = 0.0
+                lag = (now - t) * 1e3
+                self.lag_ms = lag
+                self._lag_ms_total += lag
+                if lag > self.lag_ms_max:
+                    self.lag_ms_max = lag
+                self.sent += 1
+                self.bytes += len(text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.close("send_failed", str(e))
+
+    def close(self, reason: str, error: Optional[str] = None):
+        """Stop sending and disconnect; ws_telemetry() cleans up when its receive ends."""
+        if self.closed:
+            return
+        self.closed = True
+        _ws_leave(self)
+        log_json(level="info", event="ws_client_dropped", client=self.info, reason=reason,
+                 error=error, sent=self.sent, dropped=self.dropped, remaining=len(ws_clients))
+        if self.task is not None and self.task is not asyncio.current_task():
+            self.task.cancel()
+        asyncio.ensure_future(self._close_socket())
+
+    async def _close_socket(self):
+        try:
+            await asyncio.wait_for(self.ws.close(code=1013), timeout=1.0)
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "client": self.info,
+            "protocol": WS_BINARY_PROTOCOL if self.binary else "json",
+            "fields": None if self.fields is None else len(self.fields),
+            "types": None if self.types is None else sorted(self.types),
+            "rate_hz": self.rate_hz,
+            "sent": self.sent,
+            "bytes": self.bytes,
+            "dropped": self.dropped,
+            "queued": len(self._control) + len(self._telemetry),
+            "high_water": self.high_water,
+            "lag_ms": {"last": round(self.lag_ms, 2), "max": round(self.lag_ms_max, 2),
+                       "avg": round(self._lag_ms_total / self.sent, 2) if self.sent else None},
+        }
+
 async def broadcast_ws(payload: dict):
-    """Sends a JSON message to all connected web browsers in parallel so a
-    single slow client cannot back-pressure the telemetry pipeline."""
-    text = json.dumps(payload)
-    clients = list(ws_clients)
-    if not clients:
+    """Sends a JSON message to all connected web browsers. Only queues it on
+    each client (WsClient), so no client can back-pressure the caller."""
+    await broadcast_text(_json_text(payload), msg_type=payload.get("type"))
+
+async def broadcast_text(text: str, channel: Optional[Set[WsClient]] = None,
+                         msg_type: Optional[str] = None):
+    """broadcast_ws() for a payload that is already encoded (a JSON object).
+    With a channel (a SourceSession's clients) only those browsers get it;
+    clients that subscribed to other message types skip it. Everything but
+    pings is numbered and kept for replay (WsStreamLog)."""
+    if msg_type != "ping":
+        _, text = _ws_stream.stamp(text, msg_type, channel)
+    for client in list(ws_clients if channel is None else channel):
+        if client.wants(msg_type):
+            client.send_control(text)
+
+class WsStreamLog:
+    """
+    Sequence numbers for the /ws/telemetry stream, and the most recent
+    stamped messages for clients that reconnect. Each broadcast message gets
+    the next number, spliced in as its first key ({"seq": 41, ...}), before
+    it is encoded for any client, so every client sees the same number for
+    the same message (binary frames carry it in their header). Pings are not
+    numbered. `epoch` changes on every server start; a client resuming from
+    another epoch can't be caught up and is told so.
+    """
+
+    def __init__(self, depth: int):
+        self.epoch = os.urandom(4).hex()
+        self.last = 0
+        self._log: Deque[tuple] = deque(maxlen=depth)     # (seq, channel or None, type, text)
+
+    def stamp(self, text: str, msg_type: Optional[str], channel: Optional[Set["WsClient"]] = None) -> tuple:
+        """(seq, text with "seq") for one broadcast JSON object; `channel` is the
+        session's client set for per-CanSat messages, None for station-wide."""
+        self.last += 1
+        text = '{"seq":%d,%s' % (self.last, text[1:])
+        self._log.append((self.last, channel, msg_type, text))
+        return self.last, text
+
+    def replay(self, since: int, epoch: Optional[str], client: "WsClient") -> str:
+        """
+        The {"type": "replay", ...} message for a client that connected with
+        ?since=: every kept message after `since` that the client would have
+        received, in order, as "messages". "complete" is false when some of
+        them are no longer kept (or the server restarted since); the client
+        then has to fall back to /api/logs. Without an epoch (first connect)
+        only the stream position is sent.
+        """
+        texts = []
+        complete = True
+        if epoch is None:
+            pass
+        elif epoch != self.epoch:
+            complete = False
+        elif since < self.last:
+            first = self._log[0][0] if self._log else self.last + 1
+            complete = since >= first - 1
+            for seq, channel, msg_type, text in itertools.islice(self._log, max(0, since - first + 1), None):
+                if (channel is None or client in channel) and client.wants(msg_type):
+                    texts.append(text)
+        head = _json_text({"type": "replay", "epoch": self.epoch, "since": since, "last": self.last,
+                           "complete": complete, "count": len(texts)})
+        return head[:-1] + ',"messages":[' + ",".join(texts) + "]}"
+
+    def stats(self) -> dict:
+        return {"epoch": self.epoch, "seq": self.last, "kept": len(self._log)}
+
+_ws_stream = WsStreamLog(WS_REPLAY_DEPTH)
+
+class TelemetryDecimator:
+    """
+    Telemetry for clients that asked for a lower rate (WsClient.rate_hz),
+    shared by every client of a session with the same fields and rate.
+    Packets are folded into windows of 1/rate_hz seconds; each closed window
+    becomes one JSON message: the window's last packet (so it reads like any
+    telemetry message) plus
+        "agg": {"n": packets, "window_s": ..., "min": {field: ...}, "max": {...}}
+    over every numeric field, so a peak between two updates is not lost.
+    """
+
+    def __init__(self, fields: Optional[tuple], rate_hz: float):
+        self.fields = fields
+        self.rate_hz = rate_hz
+        self.window = 0
+        self.seq = 0        # stream seq of the window's last packet
+        self.n = 0
+        self.last: Optional[dict] = None
+        self.mins: dict = {}
+        self.maxs: dict = {}
+
+    def add(self, payload: dict, now: float, seq: int = 0) -> Optional[str]:
+        """Fold in one packet; returns the previous window's message if this
+        packet starts a new window."""
+        window = int(now * self.rate_hz)
+        out = self.flush() if self.n and window != self.window else None
+        last = payload if self.fields is None else {k: payload[k] for k in self.fields}
+        if not self.n:
+            self.window = window
+            self.mins = {k: v for k, v in last.items() if type(v) in (int, float)}
+            self.maxs = dict(self.mins)
+        else:
+            mins, maxs = self.mins, self.maxs
+            for k, v in last.items():
+                if type(v) not in (int, float):
+                    continue
+                lo = mins.get(k)
+                if lo is None:
+                    mins[k] = maxs[k] = v
+                elif v < lo:
+                    mins[k] = v
+                elif v > maxs[k]:
+                    maxs[k] = v
+        self.last = last
+        self.seq = seq
+        self.n += 1
+        return out
+
+    def due(self, now: float) -> bool:
+        return self.n > 0 and int(now * self.rate_hz) != self.window
+
+    def flush(self) -> str:
+        msg = {"seq": self.seq}
+        msg.update(self.last)
+        msg["agg"] = {"n": self.n, "window_s": round(1.0 / self.rate_hz, 6), "min": self.mins, "max": self.maxs}
+        self.n = 0
+        self.last = None
+        return _json_text(msg)
+
+def broadcast_telemetry(text: str, channel: Set[WsClient], payload: Optional[dict] = None,
+                        binary_frame=None, decimators: Optional[dict] = None,
+                        stream: Optional[WsStreamLog] = None) -> str:
+    """
+    Queue a telemetry packet for a channel; for a client that has fallen
+    behind it replaces the one still unsent. `text` is the full JSON encoding.
+    Every other encoding a client needs (its field subscription, binary
+    frames from `binary_frame(fields, seq)`, a rate-limited window from the
+    session's `decimators`) is built once per packet and shared by all
+    clients that asked for the same thing. Returns `text` with its stream
+    "seq" from `stream` (the live WsStreamLog by default).
+    """
+    seq, text = (stream or _ws_stream).stamp(text, "telemetry", channel)
+    # Kept apart: a (fields, 1.0) window key would equal a (fields, True)
+    # binary key, since 1.0 == True.
+    encoded = {}        # (fields, binary) -> this packet's encoding
+    windows = {}        # (fields, rate_hz) -> closed window's message, or None
+    now = time.monotonic()
+    for client in channel:
+        if client.types is not None and "telemetry" not in client.types:
+            continue
+        if client.rate_hz is not None and decimators is not None:
+            key = (client.fields, client.rate_hz)
+            if key not in windows:
+                dec = decimators.get(key)
+                if dec is None:
+                    dec = decimators[key] = TelemetryDecimator(*key)
+                windows[key] = dec.add(payload, now, seq)
+            if windows[key] is not None:
+                client.send_telemetry(windows[key])
+            continue
+        key = (client.fields, client.binary and binary_frame is not None)
+        if key == (None, False):
+            client.send_telemetry(text)
+            continue
+        enc = encoded.get(key)
+        if enc is None:
+            if key[1]:
+                enc = binary_frame(client.fields, seq)
+            else:
+                projected = {"seq": seq}
+                projected.update((k, payload[k]) for k in client.fields)
+                enc = _json_text(projected)
+            encoded[key] = enc
+        client.send_telemetry(enc)
+    return text
+
+async def ws_decimation_flusher():
+    """Close the windows of rate-limited clients when no packet does (the
+    downlink went quiet), and forget windows no client asks for anymore."""
+    while True:
+        await asyncio.sleep(WS_DECIMATION_TICK_S)
+        now = time.monotonic()
+        for sess in _source_sessions():
+            if not sess.decimators:
+                continue
+            for key, dec in list(sess.decimators.items()):
+                clients = [c for c in sess.clients if (c.fields, c.rate_hz) == key]
+                if not clients:
+                    del sess.decimators[key]
+                elif dec.due(now):
+                    text = dec.flush()
+                    for client in clients:
+                        if client.wants("telemetry"):
+                            client.send_telemetry(text)
+
+def _send_ws_schema():
+    """Give every binary client its current WsBinarySchema (after a reload)."""
+    for client in list(ws_clients | _replay_clients):
+        if client.binary:
+            client.send_control(ws_binary_schema(client.fields).message)
+
+class PipelineStats:
+    """Cumulative wall time spent in each telemetry pipeline stage."""
+
+    def __init__(self):
+        self.total_s: Dict[str, float] = {}
+        self.count: Dict[str, int] = {}
+
+    def add(self, stage: str, seconds: float):
+        self.total_s[stage] = self.total_s.get(stage, 0.0) + seconds
+        self.count[stage] = self.count.get(stage, 0) + 1
+
+    def mark(self) -> tuple:
+        """Opaque snapshot for snapshot(since=...) to report only what came after it."""
+        return dict(self.total_s), dict(self.count)
+
+    def snapshot(self, since: Optional[tuple] = None) -> Dict[str, dict]:
+        base_s, base_n = since or ({}, {})
+        out = {}
+        for stage, total in self.total_s.items():
+            n = self.count[stage] - base_n.get(stage, 0)
+            if n:
+                t = total - base_s.get(stage, 0.0)
+                out[stage] = {"count": n, "total_ms": round(t * 1e3, 3), "avg_us": round(t / n * 1e6, 2)}
+        return out
+
+_pipeline_stats = PipelineStats()
+
+class SequenceTracker:
+    """
+    Packet accounting from the CanSat's packet_count, O(1) per packet.
+
+    Two bitmaps cover the last `window` numbers below the highest one seen:
+    which arrived, and which are accounted for (arrived or already counted
+    lost). A gap is counted lost as soon as it opens, so the UI reacts at once;
+    a packet that then fills the gap is "reordered" and taken back out of the
+    loss count. A number that already arrived with the same line is a retry
+    duplicate. More than `reorder` behind the highest number, or a number that
+    already arrived with a different line, means the counter was reset
+    (CanSat reboot): a new run starts without counting anything lost. The
+    reset check comes first, so a reboot that lands on a number lost earlier
+    is not taken for a late packet. Loss bursts are recorded as the gaps first
+    appear.
+    """
+
+    NEW, REORDERED, DUPLICATE, RESET = "new", "reordered", "duplicate", "reset"
+
+    def __init__(self, window: int = SEQ_WINDOW, modulus: int = SEQ_MODULUS,
+                 bursts: int = SEQ_BURST_HISTORY, reorder: int = SEQ_REORDER_MAX):
+        self.window = window
+        self.reorder = min(reorder, window - 1)
+        self.modulus = modulus
+        self._mask = (1 << window) - 1
+        self._bursts = deque(maxlen=bursts)
+        self.reset()
+
+    def reset(self):
+        """Forget everything (new log)."""
+        self.highest: Optional[int] = None
+        self._seen = 0          # bit i: packet highest-i arrived
+        self._known = 0         # bit i: packet highest-i arrived or was counted lost
+        self._lines: List[Optional[str]] = [None] * self.window   # line per number, by seq % window
+        self.received = 0
+        self.lost = 0
+        self.duplicates = 0
+        self.reordered = 0
+        self.resets = 0
+        self.unsequenced = 0
+        self.max_burst = 0
+        self.burst_count = 0
+        self._bursts.clear()
+
+    def observe(self, seq: Optional[int], raw: str) -> str:
+        """Classify one packet as NEW, REORDERED, DUPLICATE or RESET and count it."""
+        if seq is None:
+            self.unsequenced += 1
+            return self.NEW
+        slot = seq % self.window
+        if self.highest is None:
+            return self._restart(seq, raw, slot, counted=False)
+        ahead = (seq - self.highest) % self.modulus
+        if 0 < ahead < self.modulus // 2:
+            if ahead >= self.window:
+                self._seen, self._known = 1, 1
+            else:
+                self._seen = ((self._seen << ahead) | 1) & self._mask
+                self._known = ((self._known << ahead) | ((1 << ahead) - 1)) & self._mask
+            if ahead > 1:
+                gap = ahead - 1
+                self.lost += gap
+                self.burst_count += 1
+                if gap > self.max_burst:
+                    self.max_burst = gap
+                self._bursts.append((seq - gap, gap))
+            self.highest = seq
+            self._lines[slot] = raw
+            self.received += 1
+            return self.NEW
+
+        back = (self.modulus - ahead) % self.modulus
+        if back > self.reorder:
+            return self._restart(seq, raw, slot)
+        bit = 1 << back
+        if self._seen & bit:
+            if self._lines[slot] == raw:
+                self.duplicates += 1
+                return self.DUPLICATE
+            return self._restart(seq, raw, slot)
+        if self._known & bit:
+            self.lost -= 1          # counted lost when the gap opened
+        self._seen |= bit
+        self._known |= bit
+        self._lines[slot] = raw
+        self.received += 1
+        self.reordered += 1
+        return self.REORDERED
+
+    def _restart(self, seq: int, raw: str, slot: int, counted: bool = True) -> str:
+        self.highest = seq
+        self._seen = self._known = 1
+        self._lines = [None] * self.window
+        self._lines[slot] = raw
+        self.received += 1
+        if counted:
+            self.resets += 1
+            return self.RESET
+        return self.NEW
+
+    def stats(self) -> dict:
+        recent = list(self._bursts)
+        return {
+            "window": self.window,
+            "highest": self.highest,
+            "received": self.received,
+            "lost": self.lost,
+            "duplicates": self.duplicates,
+            "reordered": self.reordered,
+            "resets": self.resets,
+            "unsequenced": self.unsequenced,
+            # Still missing among the last `window` numbers.
+            "window_lost": bin(self._known & ~self._seen).count("1"),
+            "bursts": {
+                "count": self.burst_count,
+                "max": self.max_burst,
+                "recent_mean": round(sum(n for _, n in recent) / len(recent), 2) if recent else None,
+                "recent": [{"first": first, "length": n} for first, n in recent[-8:]],
+            },
+        }
+
+class SourceSession:
+    """
+    One CanSat's telemetry stream, keyed by the sender's 64-bit XBee address:
+    its own packet counters and SequenceTracker, CSV and KML files, log ring
+    and WebSocket channel, so two CanSats (or a payload and a probe) in the
+    air at once never mix their loss stats or flight paths.
+
+    The primary session owns the plain files (Flight_1043_<label>.csv), the
+    /api/logs ring and the default WebSocket channel; it is claimed by the
+    first address heard in a log, and lines with no address (/api/ingest,
+    simulation) go there too. Every other address gets the same files with
+    its low 32 bits (the XBee "DL" on its label) appended.
+
+    A session that is not `live` (a capture replay) has its own files and
+    statistics too, but shares nothing with the live link: no receiver RSSI
+    is attached to its packets, and they are only broadcast if it is given
+    a channel and a `stream` of its own (replay_capture(broadcast=True)).
+    """
+
+    def __init__(self, src: Optional[str], suffix: str, csv_writer: CsvLogWriter,
+                 log_ring: Deque[str], live: bool = True):
+        self.src = src
+        self.suffix = suffix
+        self.live = live
+        self.csv_writer = csv_writer
+        self.ring = log_ring
+        self.clients: Set[WsClient] = set()
+        self.stream: Optional[WsStreamLog] = _ws_stream if live else None  # numbers its broadcasts; None: not broadcast
+        self.tracker = SequenceTracker()
+        self.flusher: Optional[asyncio.Task] = None     # csv_writer.run(), secondary sessions only
+        self.ws_encoders: Dict[Optional[tuple], WsBinaryEncoder] = {}  # per field subscription
+        self.decimators: Dict[tuple, TelemetryDecimator] = {}  # per (fields, rate_hz) subscription
+        self.reset()
+
+    def reset(self):
+        """Fresh statistics and flight path (new log)."""
+        self.rx_count = 0           # Total packets received
+        self.loss_count = 0         # Total packets lost
+        self.last_pkt: Optional[int] = None     # The ID number of the last packet we saw
+        # KML auto-save: collect GPS points for Google Earth export
+        self.kml_points: Deque = deque(maxlen=3000)     # [{lat, lon, alt, state}]
+        self.kml_max_alt = 0.0      # Track max altitude for KML metadata
+        self.kml_gps_count = 0      # Count valid GPS packets; write KML every 10
+        self.kml_landed_saved = False           # True after final KML save on LANDED state
+        self.last_current_a: Optional[float] = None     # Most recent current reading (A)
+        self.tracker.reset()
+        self.ring.clear()
+
+    def binary_frame(self, rec: tuple, fields: Optional[tuple] = None, seq: int = 0) -> WsBinaryFrame:
+        """This packet (stream `seq`) for the channel's binary clients
+        subscribed to `fields` (delta against the last one)."""
+        schema = ws_binary_schema(fields)
+        encoder = self.ws_encoders.get(fields)
+        if encoder is None or encoder.schema is not schema:
+            if len(self.ws_encoders) >= 64:
+                in_use = {client.fields for client in self.clients if client.binary}
+                for key in [k for k in self.ws_encoders if k not in in_use]:
+                    del self.ws_encoders[key]
+            encoder = self.ws_encoders[fields] = WsBinaryEncoder(schema)
+        return encoder.frame(rec, seq)
+
+    def summary(self) -> dict:
+        return {
+            "src": self.src,
+            "primary": self is _primary,
+            "csv": str(get_active_csv(self.suffix)),
+            "kml": str(get_active_kml(self.suffix)),
+            "rx": {"received": self.rx_count, "lost": self.loss_count},
+            "last_pkt": self.last_pkt,
+            "clients": len(self.clients),
+        }
+
+_primary = SourceSession(None, "", _csv_writer, ring)
+_sessions: Dict[str, SourceSession] = {}        # source address -> session (primary included once claimed)
+_ws_waiting: Dict[str, Set[WsClient]] = {}      # ?src= channels whose CanSat hasn't been heard yet
+_replay_clients: Set[WsClient] = set()          # ?src=replay: replay_capture(broadcast=True) telemetry only
+_ws_replay_stream = WsStreamLog(WS_REPLAY_DEPTH)   # its own numbers, so a replay never crowds the live log
+
+def _source_sessions() -> List[SourceSession]:
+    """The primary session followed by every other one."""
+    return [_primary] + [s for s in _sessions.values() if s is not _primary]
+
+def _session_for(src: Optional[str]) -> SourceSession:
+    """The session for a source address, opened on its first packet (event loop only)."""
+    if src is None:
+        return _primary
+    sess = _sessions.get(src)
+    if sess is not None:
+        return sess
+    if _primary.src is None:
+        sess = _primary
+        sess.src = src
+    else:
+        sess = SourceSession(src, src[-8:], CsvLogWriter(), deque(maxlen=10_000))
+        sess.csv_writer.path = get_active_csv(sess.suffix)
+        sess.flusher = asyncio.create_task(sess.csv_writer.run())
+    _sessions[src] = sess
+    for key in [k for k in _ws_waiting if src.endswith(k)]:
+        sess.clients |= _ws_waiting.pop(key)
+    log_json(event="source_session_opened", src=src, primary=sess is _primary,
+             file=str(get_active_csv(sess.suffix)))
+    _loop_broadcast({"type": "source_session", "src": src, "primary": sess is _primary,
+                     "file": get_active_csv(sess.suffix).name})
+    return sess
+
+def _ws_join(ws: WsClient, src: str = ""):
+    """Add a browser to a telemetry channel: the primary CanSat's by default,
+    or the one whose address (full 16 hex chars, or the last 8) is `src`.
+    src=replay is the replay-only channel: broadcast replays and nothing else."""
+    src = src.strip().upper()
+    if src == "REPLAY":
+        _replay_clients.add(ws)
         return
-    results = await asyncio.gather(
-        *[ws.send_text(text) for ws in clients],
-        return_exceptions=True,
-    )
-    for ws, res in zip(clients, results):
-        if isinstance(res, Exception):
-            ws_clients.discard(ws)
-            log_json(level="info", event="ws_client_disconnected", remaining=len(ws_clients))
+    ws_clients.add(ws)
+    if not src:
+        _primary.clients.add(ws)
+        return
+    for addr, sess in _sessions.items():
+        if addr.endswith(src):
+            sess.clients.add(ws)
+            return
+    _ws_waiting.setdefault(src, set()).add(ws)
+
+def _ws_leave(ws: WsClient):
+    ws_clients.discard(ws)
+    _replay_clients.discard(ws)
+    for sess in _source_sessions():
+        sess.clients.discard(ws)
+    for waiting in _ws_waiting.values():
+        waiting.discard(ws)
+
+async def _close_secondary_sessions():
+    """Commit and close every non-primary session's CSV (log switch, shutdown)."""
+    for src, sess in list(_sessions.items()):
+        if sess is _primary:
+            continue
+        del _sessions[src]
+        # Its browsers wait for the CanSat's next packet, in the new session.
+        _ws_waiting.setdefault(src, set()).update(sess.clients)
+        if sess.flusher is not None:
+            sess.flusher.cancel()
+            await asyncio.gather(sess.flusher, return_exceptions=True)
+        await sess.csv_writer.close()
+
+class TelemetryHandoff:
+    """
+    Bounded ring that carries telemetry lines from the serial reader to the
+    event loop.
+
+    push() may be called from any thread. The loop is only woken when the ring
+    goes from empty to non-empty, and the consumer task then takes everything
+    queued so far as one batch for handle_telemetry_batch(). If the loop stalls
+    (e.g. a KML rebuild) the ring fills up to `maxlen`; after that the oldest
+    lines are dropped and counted instead of piling up unbounded coroutines.
+    A capture replay runs its own ring with its own `handler`.
+    """
+
+    def __init__(self, maxlen: int, handler=None, name: str = "radio"):
+        self.maxlen = maxlen
+        self.handler = handler      # async handler(batch); None: handle_telemetry_batch
+        self.name = name
+        self._ring: Deque = deque()   # str lines or (line, values, src) triples
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._wake_pending = False
+        self._overflowing = False
+        self._busy = False
+        self.pushed = 0       # lines accepted
+        self.dropped = 0      # lines discarded because the ring was full
+        self.overflows = 0    # separate full-ring episodes
+        self.batches = 0      # batches handed to the pipeline (== loop wakeups used)
+        self.high_water = 0   # deepest the ring has been
+
+    def push(self, line: Union[str, tuple]):
+        """Queue a line, or a (line, values, source address) triple from the radio."""
+        with self._lock:
+            if len(self._ring) >= self.maxlen:
+                if not self._overflowing:
+                    self._overflowing = True
+                    self.overflows += 1
+                self._ring.popleft()
+                self.dropped += 1
+            self._ring.append(line)
+            self.pushed += 1
+            depth = len(self._ring)
+            if depth > self.high_water:
+                self.high_water = depth
+            wake = not self._wake_pending and self._ready is not None
+            if wake:
+                self._wake_pending = True
+        if wake:
+            if threading.get_ident() == self._loop_thread:
+                self._ready.set()
+            else:
+                try:
+                    self._loop.call_soon_threadsafe(self._ready.set)
+                except RuntimeError:
+                    pass  # loop closed during shutdown
+
+    def _take(self) -> List[str]:
+        with self._lock:
+            batch = list(self._ring)
+            self._ring.clear()
+            self._wake_pending = False
+            self._overflowing = False
+            return batch
+
+    async def run(self):
+        """Consumer task: one wakeup, one batch, one pass through the pipeline."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._ready = asyncio.Event()
+        self._ready.set()   # pick up anything pushed before the consumer started
+        reported_drops = 0
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            batch = self._take()
+            if self.dropped != reported_drops:
+                log_json(level="warn", event="telemetry_handoff_overflow", handoff=self.name,
+                         dropped=self.dropped - reported_drops, total_dropped=self.dropped)
+                reported_drops = self.dropped
+            if not batch:
+                continue
+            self.batches += 1
+            self._busy = True
+            try:
+                await (self.handler or handle_telemetry_batch)(batch)
+            except Exception as e:
+                log_json(level="error", event="telemetry_batch_error", handoff=self.name,
+                         error=str(e), lines=len(batch))
+            finally:
+                self._busy = False
+
+    def idle(self) -> bool:
+        """True when nothing is queued and no batch is being processed."""
+        return not self._ring and not self._busy
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self._ring),
+            "maxlen": self.maxlen,
+            "pushed": self.pushed,
+            "dropped": self.dropped,
+            "overflows": self.overflows,
+            "batches": self.batches,
+            "high_water": self.high_water,
+        }
+
+_telemetry_handoff = TelemetryHandoff(TELEMETRY_HANDOFF_DEPTH)
 
 async def handle_telemetry_line(raw: str):
     """
     Core function that handles each line of data received from the CanSat.
     Saves the raw line unconditionally FIRST, then parses it for the UI.
     """
+    await handle_telemetry_batch([raw])
 
-    # ── STEP 0: Save RAW line unconditionally ────────────────────────────────
-    # Every byte the CanSat sends is written to disk immediately, before any
-    # parsing or validation. Nothing is ever discarded or lost.
-    # Lock ensures concurrent writers (live serial + sim) never interleave bytes.
+async def handle_telemetry_batch(lines: list):
+    """
+    handle_telemetry_line() for several lines at once: the raw lines go to the
+    CSV in a single write, then each is parsed and broadcast in order.
+    An item may also be a (line, values, source address) triple from the
+    radio (values from the packed binary decoder, or None); it goes to that
+    CanSat's session. Plain lines belong to the primary session.
+    """
+    if all(type(item) is str for item in lines):
+        groups = {_primary: [(raw, None) for raw in lines]}
+    else:
+        groups = {}
+        for item in lines:
+            if type(item) is str:
+                sess, item = _primary, (item, None)
+            else:
+                sess, item = _session_for(item[2]), item[:2]
+            groups.setdefault(sess, []).append(item)
+
+    for sess, items in groups.items():
+        await _handle_session_batch(sess, items)
+
+async def _handle_session_batch(sess: SourceSession, items: list):
+    """handle_telemetry_batch() for one session's (line, values) pairs."""
+    # ── STEP 1: Save RAW lines unconditionally ───────────────────────────
+    # Every line the CanSat sends is queued for the CSV before any parsing or
+    # validation, so nothing is ever discarded. The writer commits it to disk
+    # within CSV_FLUSH_INTERVAL_S, together with whatever else arrived meanwhile.
     if state.csv_ready:
-        async with _csv_write_lock:
-            async with aiofiles.open(get_active_csv(), "a", encoding="utf-8", newline="") as f:
-                await f.write(raw + "\r\n")
+        t0 = time.perf_counter()
+        sess.csv_writer.append([item[0] for item in items])
+        _pipeline_stats.add("csv_write", time.perf_counter() - t0)
+
+    # ── STEP 1a: Sequence check — a duplicate goes no further ────────────
+    # The same packet heard twice (a DigiMesh retry, or two ground radios) is
+    # the same bytes from the CanSat: it stays in the CSV like every line, but
+    # is only counted in the sequence stats, not parsed or shown again.
+    for raw, values in items:
+        seq = _telemetry_parser.sequence(raw)
+        verdict = sess.tracker.observe(seq, raw)
+        if verdict is SequenceTracker.DUPLICATE:
+            continue
+        if verdict is SequenceTracker.RESET:
+            log_json(level="warn", event="packet_counter_reset", src=sess.src, packet_count=seq,
+                     resets=sess.tracker.resets)
+        sess.loss_count = sess.tracker.lost
+        try:
+            await _process_telemetry_line(raw, values, sess)
+        except Exception as e:
+            # One bad line (already in the CSV) must not cost the rest of the batch.
+            log_json(level="error", event="telemetry_line_failed", src=sess.src, error=str(e), raw=raw)
 
-    # ── STEP 1: Parse fields for UI display ──────────────────────────────
-    reader = csv.reader([raw], skipinitialspace=True)
-    try:
-        parts = next(reader)
-    except StopIteration:
-        return
+async def _process_telemetry_line(raw: str, values: Optional[list] = None,
+                                  sess: Optional[SourceSession] = None):
+    """Parse one (already saved and sequence-checked) telemetry line, update its
+    session and broadcast it. `values` are the record values when the packet
+    was already decoded."""
+    t0 = time.perf_counter()
+    sess = sess or _primary
 
-    parts = [p.strip() for p in parts]
+    # ── STEP 1b: Parse fields for UI display ─────────────────────────────
+    if values is None:
+        values = _telemetry_parser.parse_values(raw)
 
     # If the packet has too few fields, show it in the UI log and stop here.
     # The raw data is already saved to CSV above so nothing is lost.
-    min_required = len([x for x in TELEMETRY_CONFIG if not x.get("optional", False)])
-    if len(parts) < min_required:
-        ring.append(json.dumps({"bad_line": raw}))
+    if values is None:
+        sess.ring.append(json.dumps({"bad_line": raw}))
         return
 
-    parsed_data = {}
-    for i, cfg in enumerate(TELEMETRY_CONFIG):
-        key = cfg.get("internal_key")
-        dtype = cfg.get("type")
-        val_str = (parts[i] if i < len(parts) else "").strip()
-        try:
-            if dtype == "int":
-                value = int(val_str) if val_str else 0
-            elif dtype == "float":
-                value = float(val_str) if val_str else 0.0
-            else:
-                value = val_str
-        except ValueError:
-            if dtype == "int":   value = 0
-            elif dtype == "float": value = 0.0
-            else:                value = ""
-        if key:
-            parsed_data[key] = value
-
-    # ── STEP 2: Build Telemetry object for WebSocket broadcast ───────────────
+    # ── STEP 2: Build the telemetry record for WebSocket broadcast ───────────
     # Increment rx_count FIRST so gs_rx_count is correct (was off-by-one).
-    state.rx_count += 1
-    parsed_data["gs_ts_utc"]    = now_utc_iso()
-    parsed_data["gs_rx_count"]  = state.rx_count
-    parsed_data["gs_loss_total"] = state.loss_count
-    parsed_data["gs_raw_line"]  = raw
-
-    try:
-        tel = Telemetry(**parsed_data)
-    except Exception as e:
-        log_json(level="warn", event="telemetry_parse_error", error=str(e), raw=raw)
-        return
+    sess.rx_count += 1
+    values += (now_utc_iso(), sess.rx_count, sess.loss_count, state.rssi_dbm if sess.live else None, raw)
+    rec = TelemetryRecord._make(values)
 
+    if TELEMETRY_STRICT:
+        try:
+            payload = Telemetry(**rec._asdict()).model_dump()
+        except Exception as e:
+            log_json(level="warn", event="telemetry_parse_error", error=str(e), raw=raw)
+            return
+    else:
+        payload = rec._asdict()
+    t1 = time.perf_counter()
+    _pipeline_stats.add("parse", t1 - t0)
 
     # 4b) Auto-save KML (Google Earth) — collect GPS points and write to disk
-    gps_lat = parsed_data.get("gps_lat", 0.0)
-    gps_lon = parsed_data.get("gps_lon", 0.0)
-    gps_sats = parsed_data.get("gps_sats", 0)
-    alt_m = parsed_data.get("altitude_m", 0.0)
+    gps_lat = rec.gps_lat
+    gps_lon = rec.gps_lon
+    gps_sats = rec.gps_sats
+    alt_m = rec.altitude_m
     if isinstance(gps_lat, (int, float)) and isinstance(gps_lon, (int, float)):
         if gps_lat != 0.0 and gps_lon != 0.0 and gps_sats > 3:  # Only save with good GPS fix (>3 sats, matches UI)
-            global _kml_gps_count
-            state.kml_points.append({
+            sess.kml_points.append({
                 "lat":          gps_lat,
                 "lon":          gps_lon,
                 "alt":          max(0, alt_m),                              # barometric AGL
-                "gps_alt":      float(parsed_data.get("gps_altitude_m") or 0),  # GPS ASL (absolute)
-                "state":        parsed_data.get("state", "UNKNOWN"),
+                "gps_alt":      float(rec.gps_altitude_m or 0),             # GPS ASL (absolute)
+                "state":        rec.state or "UNKNOWN",
                 "ts":           now_utc_iso(),                              # UTC for gx:Track animation
-                "mission_time": str(parsed_data.get("mission_time", "")),
+                "mission_time": str(rec.mission_time),
             })
-            if alt_m > state.kml_max_alt:
-                state.kml_max_alt = alt_m
-            _kml_gps_count += 1
-            if _kml_gps_count % 10 == 0:  # write KML to disk every 10 valid GPS packets
-                await _save_kml()
+            if alt_m > sess.kml_max_alt:
+                sess.kml_max_alt = alt_m
+            sess.kml_gps_count += 1
+            if sess.kml_gps_count % 10 == 0:  # write KML to disk every 10 valid GPS packets
+                await _save_kml(sess)
 
     # Final KML save on landing — triggered once per session
-    current_flight_state = parsed_data.get("state", "")
-    if current_flight_state == "LANDED" and not state.kml_landed_saved:
-        state.kml_landed_saved = True
-        await _save_kml()
-        kml_path = get_active_kml()
-        log_json(event="kml_landing_save", file=str(kml_path))
-        await broadcast_ws({"type": "kml_saved", "file": kml_path.name})
+    current_flight_state = rec.state
+    if current_flight_state == "LANDED" and not sess.kml_landed_saved:
+        sess.kml_landed_saved = True
+        await _save_kml(sess)
+        kml_path = get_active_kml(sess.suffix)
+        log_json(event="kml_landing_save", src=sess.src, file=str(kml_path))
+        if sess.live:
+            await broadcast_text(_json_text({"type": "kml_saved", "file": kml_path.name}), sess.clients, "kml_saved")
 
     # 5) Update counters (rx_count already incremented in step 2)
-    state.last_current_a = parsed_data.get("current_a")
+    sess.last_current_a = rec.current_a
     # [REQ-78] Count the number of received packets
-    
-    # Packet Loss Calculation (Sequence-based)
-    # [REQ-65] Uses packet_count field from telemetry to detect gaps accurately
-    pkt = parsed_data.get("packet_count", 0)
-    if state.last_pkt is not None and pkt > 0:
-        if pkt > state.last_pkt + 1:
-            state.loss_count += pkt - state.last_pkt - 1
-    state.last_pkt = pkt
+    # [REQ-65] Packet loss comes from packet_count gaps (SequenceTracker, step 1)
+    sess.last_pkt = rec.packet_count
 
     # 6) Send to UI
-    payload = tel.model_dump()
+    t2 = time.perf_counter()
+    _pipeline_stats.add("state", t2 - t1)
+
+    # Encode once: the same text goes to every client and, wrapped, into the ring.
+    text = _json_text(payload)
+    if sess.stream is not None:
+        text = broadcast_telemetry(text, sess.clients, payload,
+                                   lambda fields, seq: sess.binary_frame(rec, fields, seq), sess.decimators,
+                                   sess.stream)
+    sess.ring.append('{"telemetry":' + text + '}')
+    _pipeline_stats.add("broadcast", time.perf_counter() - t2)
+
+# ===================== TELEMETRY CONFIG HOT RELOAD =====================
+def _read_telemetry_layout() -> dict:
+    """Load and compile telemetry_config.json (worker thread)."""
+    with open(TELEMETRY_CONFIG_PATH, "r") as f:
+        return compile_telemetry_layout(json.load(f))
+
+async def reload_telemetry_config() -> dict:
+    """Recompile telemetry_config.json off the loop and swap it in if it changed.
+    A broken file (half-saved, bad JSON, bad layout) is logged and ignored."""
+    try:
+        layout = await asyncio.to_thread(_read_telemetry_layout)
+    except (OSError, ValueError) as e:
+        log_json(level="warn", event="telemetry_config_reload_failed", error=str(e))
+        return {"ok": False, "error": str(e), "version": TELEMETRY_CONFIG_VERSION}
+    if layout["fields"] == TELEMETRY_CONFIG and layout["packed"] == TELEMETRY_PACKED:
+        return {"ok": True, "changed": False, "version": TELEMETRY_CONFIG_VERSION}
+
+    new_segment = _apply_telemetry_layout(layout)
+    _send_ws_schema()   # queued ahead of the first packet in the new layout
+    csv_path = get_active_csv()
+    log_json(event="telemetry_config_reloaded", version=TELEMETRY_CONFIG_VERSION,
+             columns=len(TELEMETRY_CONFIG), packed=_packed_decoder is not None,
+             new_csv_segment=new_segment, file=str(csv_path))
+    await broadcast_ws({"type": "telemetry_config", "version": TELEMETRY_CONFIG_VERSION,
+                        "columns": len(TELEMETRY_CONFIG), "file": csv_path.name})
+    return {"ok": True, "changed": True, "version": TELEMETRY_CONFIG_VERSION,
+            "new_csv_segment": new_segment, "file": str(csv_path)}
+
+def _config_file_signature():
+    try:
+        st = os.stat(TELEMETRY_CONFIG_PATH)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
 
-    await broadcast_ws(payload)
-    ring.append(json.dumps({"telemetry": payload}))
+async def telemetry_config_watcher():
+    """Background task: reload telemetry_config.json whenever it is saved."""
+    sig = _config_file_signature()
+    while True:
+        await asyncio.sleep(TELEMETRY_CONFIG_POLL_S)
+        new_sig = _config_file_signature()
+        if new_sig != sig:
+            sig = new_sig
+            if new_sig is not None:     # deleted: keep running on the current layout
+                await reload_telemetry_config()
 
 # ===================== SIMULATION MODE (Testing) =====================
 sim_task: Optional[asyncio.Task] = None
@@ -1086,7 +3733,7 @@ async def sim_file_streamer(file_path: Path):
                 # Non-blocking put — preserves 1 Hz cadence even if queue is full.
                 if msg is not None:
                     try:
-                        uplink_q.put_nowait(msg)
+                        _queue_uplink(msg, "bulk")
                     except asyncio.QueueFull:
                         log_json(level="warn", event="sim_drop_full_queue", line=msg)
 
@@ -1100,6 +3747,165 @@ async def sim_file_streamer(file_path: Path):
             
     log_json(event="sim_complete", file=str(file_path))
 
+# ===================== REPLAY (Recorded captures) =====================
+def _load_replay_source(path: Path, realtime: bool) -> tuple:
+    """
+    Read a capture into (format, total_bytes, [(t_offset_s, chunk), ...]).
+    A frame journal replays its RX frames; any other file is treated as raw
+    bytes straight off the UART. At full speed everything is re-chunked into
+    REPLAY_CHUNK_BYTES pieces, the way a busy serial port hands them over.
+    """
+    with open(path, "rb") as f:
+        is_journal = f.read(len(_JOURNAL_MAGIC)) == _JOURNAL_MAGIC
+    if is_journal:
+        fmt = "journal"
+        records = [(ts, frame) for ts, direction, frame in read_frame_journal(path) if direction == JOURNAL_RX]
+        t_first = records[0][0] if records else 0.0
+        chunks = [(ts - t_first, frame) for ts, frame in records]
+    else:
+        fmt = "raw"
+        data = path.read_bytes()
+        byte_s = 10.0 / REPLAY_RAW_BAUD     # 8N1: ten bit times per byte
+        chunks = [(i * byte_s, data[i:i + REPLAY_CHUNK_BYTES])
+                  for i in range(0, len(data), REPLAY_CHUNK_BYTES)]
+    total = sum(len(c) for _, c in chunks)
+    if not realtime and fmt == "journal":
+        data = b"".join(c for _, c in chunks)
+        chunks = [(0.0, data[i:i + REPLAY_CHUNK_BYTES]) for i in range(0, len(data), REPLAY_CHUNK_BYTES)]
+    return fmt, total, chunks
+
+async def replay_capture(path: Path, realtime: bool = False, speed: float = 1.0,
+                         broadcast: bool = False) -> dict:
+    """
+    Feed a recorded capture through the same decoder and telemetry pipeline
+    as the live radio: Api2FrameDecoder -> telemetry frames ->
+    handle_telemetry_batch's per-session step (sequence check, CSV, parse,
+    KML, encode). It runs in its own session (SourceSession, not live) with
+    its own CSV (Flight_1043_replay.csv) and SequenceTracker, so a replay
+    never touches the live link. RSSI replies and delivery receipts
+    (0x88/0x8B) in the capture are skipped, so a recorded receipt can never
+    confirm a live uplink.
+
+    With `broadcast`, telemetry also takes the rest of the live path: a
+    TelemetryHandoff ring of its own (same depth as the radio's) and a
+    broadcast to the replay-only channel (/ws/telemetry?src=replay),
+    numbered in its own WsStreamLog. Live dashboards never see it.
+
+    Returns a report with frames/sec, time per stage and every drop counter
+    touched on the way (with `broadcast`, also the ring's and the replay
+    viewers' stale-packet drops).
+    """
+    fmt, total_bytes, chunks = await asyncio.to_thread(_load_replay_source, path, realtime)
+    decoder = Api2FrameDecoder()
+    csv_path = get_active_csv("replay")
+    await asyncio.to_thread(ensure_csv_header, csv_path)
+    sess = SourceSession(None, "replay", CsvLogWriter(csv_path), deque(maxlen=10_000), live=False)
+    sess.flusher = asyncio.create_task(sess.csv_writer.run())
+    handoff = handoff_task = None
+    if broadcast:
+        sess.clients, sess.stream = _replay_clients, _ws_replay_stream
+        handoff = TelemetryHandoff(TELEMETRY_HANDOFF_DEPTH, lambda batch: _handle_session_batch(sess, batch),
+                                   name="replay")
+        handoff_task = asyncio.create_task(handoff.run())
+        viewers0 = {client: (client.sent, client.dropped) for client in _replay_clients}
+    lines = skipped = 0
+
+    stages0 = _pipeline_stats.mark()
+    decode_s = dispatch_s = 0.0
+    log_json(event="replay_start", file=str(path), format=fmt, bytes=total_bytes,
+             realtime=realtime, speed=speed, broadcast=broadcast, csv=str(csv_path))
+
+    t_start = time.perf_counter()
+    try:
+        for t_offset, chunk in chunks:
+            if realtime:
+                delay = t_start + t_offset / speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            t0 = time.perf_counter()
+            frames = decoder.feed(chunk)
+            t1 = time.perf_counter()
+            items = []
+            for frame in frames:
+                if frame["type"] != "telemetry":
+                    skipped += 1
+                    continue
+                item = _telemetry_item(frame["payload"])
+                if item is not None:
+                    items.append(item)
+            decode_s += t1 - t0
+            dispatch_s += time.perf_counter() - t1
+            if items:
+                lines += len(items)
+                if handoff is None:
+                    await _handle_session_batch(sess, items)
+                else:
+                    for item in items:
+                        handoff.push(item)
+                    await asyncio.sleep(0)  # the consumer's turn, as between two serial reads
+        if handoff is not None:
+            while not handoff.idle():
+                await asyncio.sleep(0.005)
+        elapsed = time.perf_counter() - t_start
+    finally:
+        if handoff_task is not None:
+            handoff_task.cancel()
+            await asyncio.gather(handoff_task, return_exceptions=True)
+        sess.flusher.cancel()
+        await asyncio.gather(sess.flusher, return_exceptions=True)
+        await sess.csv_writer.close()
+
+    stages = {"decode": {"total_ms": round(decode_s * 1e3, 3)},
+              "dispatch": {"total_ms": round(dispatch_s * 1e3, 3)}}
+    stages.update(_pipeline_stats.snapshot(since=stages0))
+    report = {
+        "file": str(path),
+        "format": fmt,
+        "realtime": realtime,
+        "speed": speed,
+        "bytes": total_bytes,
+        "elapsed_s": round(elapsed, 3),
+        "frames": decoder.frames,
+        "frames_per_s": round(decoder.frames / elapsed, 1) if elapsed else None,
+        "telemetry_lines": lines,
+        "csv": str(csv_path),
+        "sequence": sess.tracker.stats(),
+        "stages": stages,
+        "drops": {
+            "bad_checksum": decoder.bad_checksum,
+            "decoder_resync": decoder.dropped,
+        },
+        "skipped_frames": skipped,
+        "broadcast": broadcast,
+    }
+    if handoff is not None:
+        # Counted over the viewers still connected at the end, since the replay began.
+        viewers = [(client, viewers0.get(client, (0, 0))) for client in _replay_clients]
+        report["handoff"] = handoff.stats()
+        report["viewers"] = {
+            "clients": len(viewers),
+            "sent": sum(client.sent - sent0 for client, (sent0, _) in viewers),
+            "dropped": sum(client.dropped - dropped0 for client, (_, dropped0) in viewers),
+        }
+        report["drops"]["handoff_overflow"] = handoff.dropped
+        report["drops"]["ws_stale"] = report["viewers"]["dropped"]
+    log_json(event="replay_complete", **report)
+    return report
+
+replay_task: Optional[asyncio.Task] = None
+replay_report: Optional[dict] = None
+
+async def _replay_runner(path: Path, realtime: bool, speed: float, broadcast: bool):
+    global replay_report
+    try:
+        replay_report = await replay_capture(path, realtime, speed, broadcast)
+    except asyncio.CancelledError:
+        log_json(event="replay_cancelled", file=str(path))
+        raise
+    except Exception as e:
+        log_json(level="error", event="replay_error", error=str(e), file=str(path))
+        replay_report = {"file": str(path), "error": str(e)}
+
 async def sim_sender(file_path: Path):
     """
     Reads a file with pressure data and sends it to the CanSat to simulate flight.
@@ -1110,7 +3916,7 @@ async def sim_sender(file_path: Path):
     # 1. Enable Simulation Mode
     state.sim_enabled = True
     try:
-        uplink_q.put_nowait(f"CMD,{TEAM_ID:04},SIM,ENABLE")
+        _queue_uplink(f"CMD,{TEAM_ID:04},SIM,ENABLE")
     except asyncio.QueueFull:
         log_json(level="warn", event="sim_drop_full_queue", line="SIM,ENABLE")
     log_json(event="sim_command", cmd="SIM,ENABLE")
@@ -1118,7 +3924,7 @@ async def sim_sender(file_path: Path):
 
     # 2. Activate Simulation Mode
     try:
-        uplink_q.put_nowait(f"CMD,{TEAM_ID:04},SIM,ACTIVATE")
+        _queue_uplink(f"CMD,{TEAM_ID:04},SIM,ACTIVATE")
     except asyncio.QueueFull:
         log_json(level="warn", event="sim_drop_full_queue", line="SIM,ACTIVATE")
     log_json(event="sim_command", cmd="SIM,ACTIVATE")
@@ -1138,30 +3944,49 @@ async def lifespan(app: FastAPI):
     SHUTDOWN: It cleans up and closes the connections.
     """
     # Startup logic
-    log_json(event="startup", team=TEAM_ID, server_serial=USE_SERVER_SERIAL)
+    log_json(event="startup", team=TEAM_ID, server_serial=USE_SERVER_SERIAL, transport=SERIAL_TRANSPORT)
     _validate_presets()  # warn early if a preset address was mis-edited
     _load_xbee_addr()   # restore the last-selected XBee address (survives restart)
+    _port_watcher.start()   # initial port scan + hotplug watch
     _select_serial_port_at_startup()
+    _select_csv_segment()
     ensure_csv_header()
 
     tasks = []
-    serial_thread = None
 
     loop = asyncio.get_running_loop()
 
+    # Drains the serial -> loop telemetry ring in batches.
+    tasks.append(asyncio.create_task(_telemetry_handoff.run()))
+    # Group-commits raw lines to the flight CSV.
+    tasks.append(asyncio.create_task(_csv_writer.run()))
+    # Picks up telemetry_config.json edits without a restart.
+    tasks.append(asyncio.create_task(telemetry_config_watcher()))
+    # Sends the rate-limited telemetry windows due when no packet arrives.
+    tasks.append(asyncio.create_task(ws_decimation_flusher()))
+
+    if USE_SERVER_SERIAL and FRAME_JOURNAL_ENABLED:
+        _frame_journal.start()
+
     if USE_SERVER_SERIAL:
-        # Start Serial Reader Thread (this needs to be a thread because reading is blocking)
-        serial_thread = threading.Thread(target=serial_read_thread_target, args=(loop,), daemon=True)
-        serial_thread.start()
+        if SERIAL_TRANSPORT not in ("thread", "asyncio"):
+            log_json(level="warn", event="unknown_serial_transport", transport=SERIAL_TRANSPORT)
+        elif SERIAL_TRANSPORT == "asyncio" and not AsyncioSerialTransport.supported():
+            log_json(level="warn", event="serial_transport_fallback", reason="asyncio transport needs POSIX")
+        # One reader (thread or loop task) per radio link.
+        start_radio_links(loop)
 
         # Start Serial Writer Task (this can be an async task)
         tasks.append(asyncio.create_task(serial_writer_worker()))
+        tasks.append(asyncio.create_task(uplink_ack_watchdog()))
 
     # Keep the WebSocket connection alive with a ping every 10 seconds
     async def ws_ping():
         while True:
             await asyncio.sleep(10)
             await broadcast_ws({"type": "ping"})
+            if _replay_clients:
+                await broadcast_text('{"type":"ping"}', _replay_clients, "ping")
 
     tasks.append(asyncio.create_task(ws_ping()))
 
@@ -1174,15 +3999,21 @@ async def lifespan(app: FastAPI):
     all_tasks = list(tasks)
     if sim_task and not sim_task.done():
         all_tasks.append(sim_task)
+    if replay_task and not replay_task.done():
+        all_tasks.append(replay_task)
     for t in all_tasks:
         t.cancel()
     if all_tasks:
         await asyncio.gather(*all_tasks, return_exceptions=True)
+    await _csv_writer.close()   # commit the last buffered lines and fsync
+    await _close_secondary_sessions()
 
-    # Signal serial thread to stop and wait.
+    # Signal the serial readers to stop and wait.
     _stop_event.set()
-    if serial_thread:
-        serial_thread.join(timeout=2)
+    for link in _radios:
+        await link.stop()
+    _port_watcher.stop()
+    _frame_journal.stop()   # flush frames still queued for disk
 
 app = FastAPI(title="CanSat Ground Station (Python)", lifespan=lifespan)
 
@@ -1193,30 +4024,64 @@ app = FastAPI(title="CanSat Ground Station (Python)", lifespan=lifespan)
 async def api_health():
     """Returns the current status of the system."""
     return {
-        "serial": {"port": state.cfg.port, "baud": state.cfg.baud, "server_serial": USE_SERVER_SERIAL},
+        "serial": {"port": state.cfg.port, "baud": state.cfg.baud, "server_serial": USE_SERVER_SERIAL,
+                   "transport": _radios[0].stats()["transport"]},
+        "radios": [link.stats() for link in _radios],
         "csv": str(CSV_CURRENT),
-        "rx": {"received": state.rx_count, "lost": state.loss_count},
+        "rx": {"received": _primary.rx_count, "lost": _primary.loss_count},
+        "sequence": _primary.tracker.stats(),
+        "sources": len(_sessions),
         "last_cmd": state.last_cmd,
-        "current_a": state.last_current_a,
+        "current_a": _primary.last_current_a,
         "rssi_dbm": state.rssi_dbm,
+        "rssi_poll": _rssi_poller.stats(),
+        "handoff": _telemetry_handoff.stats(),
+        "broadcast_dropped": _broadcast_drops,
+        "ws": {"clients": len(ws_clients),
+               "binary_clients": sum(1 for c in ws_clients if c.binary),
+               "stream": _ws_stream.stats(),
+               "replay_clients": len(_replay_clients),
+               "subscriptions": len({(c.fields, c.types, c.rate_hz) for c in ws_clients
+                                     if c.fields is not None or c.types is not None or c.rate_hz is not None}),
+               "telemetry_dropped": sum(c.dropped for c in ws_clients),
+               "max_lag_ms": max((round(c.lag_ms, 2) for c in ws_clients), default=None)},
+        "csv_writer": _csv_writer.stats(),
+        "journal": _frame_journal.stats(),
+        "pipeline": _pipeline_stats.snapshot(),
     }
 
 @app.get("/api/logs")
-async def api_logs(n: int = 500):
-    """Returns the last N log messages."""
+async def api_logs(n: int = 500, src: str = ""):
+    """Returns the last N log messages (of the CanSat `src`, default the primary)."""
     n = max(1, min(n, 5000))
+    log_ring = ring
+    if src:
+        sess = next((s for a, s in _sessions.items() if a.endswith(src.strip().upper())), None)
+        if sess is None:
+            raise HTTPException(404, detail=f"no telemetry from {src} yet")
+        log_ring = sess.ring
     # Slice the deque from the right without copying the entire buffer.
     from itertools import islice
-    start = max(0, len(ring) - n)
-    return list(islice(ring, start, len(ring)))
+    start = max(0, len(log_ring) - n)
+    # Ring entries are already JSON text; skip FastAPI's per-item jsonable_encoder pass.
+    return Response(_json_text(list(islice(log_ring, start, len(log_ring)))), media_type="application/json")
+
+@app.get("/api/ws/clients")
+async def api_ws_clients():
+    """Per-browser WebSocket send metrics: sent, dropped (stale telemetry skipped), queue, lag."""
+    return [c.stats() for c in ws_clients]
+
+@app.get("/api/sources")
+async def api_sources():
+    """Every CanSat heard in this log: address, files, counters, WebSocket clients."""
+    return [sess.summary() for sess in _source_sessions()]
 
 # ---- Serial config / ports ----
 @app.get("/api/serial/ports")
 async def api_serial_ports():
     """Lists all available USB serial ports."""
-    # list_ports.comports() is a blocking OS call — run off the event loop.
-    raw = await asyncio.to_thread(serial.tools.list_ports.comports)
-    ports = [{"port": p.device, "info": f"{p.description} {p.hwid}"} for p in raw]
+    # Served from the hotplug-maintained cache — no comports() scan per request.
+    ports = [{"port": p.device, "info": f"{p.description} {p.hwid}"} for p in _port_watcher.ports()]
     return {"ports": ports}
 
 @app.get("/api/serial/bauds")
@@ -1234,15 +4099,76 @@ async def api_serial_set(cfg: SerialCfg):
     """Updates serial settings and reconnects."""
     if cfg.baud not in BAUD_PRESETS:
         raise HTTPException(400, detail="baud not allowed")
+    # Same rule as POST /api/radios: radio0 can't move onto another link's port.
+    if any(link.cfg.port == cfg.port for link in _radios[1:]):
+        raise HTTPException(409, detail=f"{cfg.port} is already in use by a radio link")
     state.cfg = cfg
     log_json(event="cfg_changed", port=cfg.port, baud=cfg.baud)
     
     # Ask the reader thread to reconnect in-thread. Closing the fd from this
     # threadpool thread while the reader is blocked in read() would itself trip
     # the "multiple access on port" error, so we never touch the port here.
-    _reconnect_request.set()
+    _radios[0].reconnect_request.set()
+    _port_watcher.kick()    # wake a reader parked waiting for the old port
     return {"ok": True}
 
+# ---- Extra radio links ----
+@app.get("/api/radios")
+async def api_radios():
+    """Every ground radio link: port, connection, frames decoded, uplink queue."""
+    return {"radios": [link.stats() for link in _radios], "uplink": getattr(uplink_link(), "name", None)}
+
+@app.post("/api/radios")
+async def api_radios_add(cfg: SerialCfg):
+    """Start another radio link on its own port (diversity antenna, second ground radio)."""
+    if not USE_SERVER_SERIAL:
+        raise HTTPException(409, detail="server-side serial is disabled")
+    if cfg.baud not in BAUD_PRESETS:
+        raise HTTPException(400, detail="baud not allowed")
+    # One reader per port: a second link on the same port would break the
+    # single-thread I/O rule (see RadioLink).
+    if any(link.cfg.port == cfg.port for link in _radios):
+        raise HTTPException(409, detail=f"{cfg.port} is already in use by a radio link")
+    n = max(int(link.name[5:]) for link in _radios) + 1
+    link = RadioLink(f"radio{n}", cfg)
+    _radios.append(link)
+    link.start(asyncio.get_running_loop())
+    log_json(event="radio_added", radio=link.name, port=cfg.port, baud=cfg.baud)
+    return {"ok": True, **link.stats()}
+
+@app.delete("/api/radios/{name}")
+async def api_radios_remove(name: str):
+    """Stop an extra radio link (radio0 is configured with /api/serial/config)."""
+    link = next((l for l in _radios[1:] if l.name == name), None)
+    if link is None:
+        raise HTTPException(404, detail=f"no extra radio link {name}")
+    _radios.remove(link)
+    await link.stop()
+    log_json(event="radio_removed", radio=name, port=link.cfg.port)
+    return {"ok": True}
+
+# ---- Uplink delivery tracking ----
+@app.get("/api/uplink/stats")
+async def api_uplink_stats():
+    """In-flight uplinks by frame ID plus per-command latency histograms
+    (queue = enqueue -> UART write, air = write -> 0x8B receipt, total)."""
+    return {**_uplink_tracker.stats(time.monotonic()), "lanes": uplink_q.stats()}
+
+# ---- RSSI sampling policy ----
+@app.get("/api/rssi/policy")
+async def api_rssi_policy_get():
+    """Returns the ATDB sampling policy and how many queries it has sent."""
+    return _rssi_poller.stats()
+
+@app.post("/api/rssi/policy")
+async def api_rssi_policy_set(cfg: RssiPolicyCfg):
+    """Changes how often RSSI is sampled. Takes effect on the next packet."""
+    if cfg.mode not in RSSI_POLL_MODES:
+        raise HTTPException(400, detail=f"mode must be one of {', '.join(RSSI_POLL_MODES)}")
+    _rssi_poller.cfg = cfg
+    log_json(event="rssi_policy_changed", **cfg.model_dump())
+    return {"ok": True, **cfg.model_dump()}
+
 # ---- Command uplink ----
 @app.post("/api/command")
 async def api_command(body: CommandBody):
@@ -1260,7 +4186,7 @@ async def api_command(body: CommandBody):
 
     # Non-blocking enqueue so a saturated uplink does not stall HTTP responses.
     try:
-        uplink_q.put_nowait(uplink)
+        _queue_uplink(uplink)
     except asyncio.QueueFull:
         log_json(level="warn", event="uplink_queue_full", cmd=uplink)
         raise HTTPException(status_code=503, detail="Uplink queue full — retry shortly")
@@ -1274,6 +4200,10 @@ async def api_command(body: CommandBody):
         state.sim_enabled = False
         if sim_task and not sim_task.done():
             sim_task.cancel()
+        # SIMP lines still waiting must not trickle out after the disable.
+        dropped = uplink_q.clear("bulk")
+        if dropped:
+            log_json(event="sim_bulk_flushed", dropped=dropped)
 
     if cmd_upper == "SIM,ACTIVATE":
         if state.sim_enabled:
@@ -1309,6 +4239,56 @@ async def api_sim_start(file: Optional[str] = None):
     sim_task = asyncio.create_task(sim_sender(path))
     return {"ok": True, "running": True, "file": str(path)}
 
+# ---- Telemetry layout (telemetry_config.json) ----
+@app.get("/api/telemetry/config")
+async def api_telemetry_config():
+    """The telemetry layout currently in use."""
+    return {
+        "version": TELEMETRY_CONFIG_VERSION,
+        "columns": [item.get("csv_header", "") for item in TELEMETRY_CONFIG],
+        "packed": _packed_decoder is not None,
+        "csv": str(get_active_csv()),
+    }
+
+@app.post("/api/telemetry/config/reload")
+async def api_telemetry_config_reload():
+    """Re-read telemetry_config.json now instead of waiting for the file watcher."""
+    return await reload_telemetry_config()
+
+# ---- Replay of recorded captures ----
+@app.post("/api/replay")
+async def api_replay_start(file: str, realtime: bool = False, speed: float = 1.0, broadcast: bool = False):
+    """Replay a frame journal or raw capture through the telemetry pipeline;
+    with broadcast=true also through a hand-off ring to /ws/telemetry?src=replay."""
+    global replay_task, replay_report
+    path = Path(file)
+    if not path.is_absolute():
+        # Bare names are looked up next to main.py, then in the journal and data folders.
+        for base in (ROOT_DIR, FRAME_JOURNAL_DIR, DATA_DIR):
+            if (base / file).exists():
+                path = base / file
+                break
+    if not path.is_file():
+        raise HTTPException(404, detail=f"no such capture: {file}")
+    if speed <= 0:
+        raise HTTPException(400, detail="speed must be > 0")
+    if replay_task and not replay_task.done():
+        raise HTTPException(409, detail="a replay is already running")
+    replay_report = None
+    replay_task = asyncio.create_task(_replay_runner(path, realtime, speed, broadcast))
+    return {"ok": True, "running": True, "file": str(path), "broadcast": broadcast}
+
+@app.get("/api/replay")
+async def api_replay_status():
+    """Whether a replay is running, and the report of the last finished one."""
+    return {"running": bool(replay_task and not replay_task.done()), "report": replay_report}
+
+@app.post("/api/replay/stop")
+async def api_replay_stop():
+    if replay_task and not replay_task.done():
+        replay_task.cancel()
+    return {"ok": True, "running": False}
+
 # ---- Browser \u2192 Server telemetry ingest ----
 @app.post("/api/ingest")
 async def api_ingest(body: IngestBody):
@@ -1319,6 +4299,101 @@ async def api_ingest(body: IngestBody):
     await handle_telemetry_line(line)
     return {"ok": True}
 
+def _ingest_lines(text: str) -> tuple:
+    """
+    Telemetry lines from an ingest body: plain text with one CSV line per
+    line, or NDJSON with one {"line": "..."} object (or JSON string) per
+    line; the two may be mixed. Returns (lines, rejected count).
+    """
+    lines, rejected = [], 0
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line[0] in '{"':
+            try:
+                obj = json.loads(line)
+                line = (obj.get("line") if isinstance(obj, dict) else obj).strip()
+            except (ValueError, AttributeError):
+                rejected += 1
+                continue
+            if not line:
+                continue
+        lines.append(line)
+    return lines, rejected
+
+def _ingest_source(src: str) -> Optional[str]:
+    """Validate an ingest ?src= (the sending CanSat's 64-bit address)."""
+    src = src.strip().upper()
+    if not src:
+        return None
+    if len(src) != 16 or not all(ch in "0123456789ABCDEF" for ch in src):
+        raise ValueError("src must be a 64-bit XBee address (16 hex chars)")
+    return src
+
+async def ingest_batch(lines: List[str], src: Optional[str] = None) -> None:
+    """Push many lines through the pipeline, INGEST_CHUNK_LINES per batch, then
+    commit that CanSat's CSV once."""
+    for i in range(0, len(lines), INGEST_CHUNK_LINES):
+        chunk = lines[i:i + INGEST_CHUNK_LINES]
+        await handle_telemetry_batch(chunk if src is None else [(line, None, src) for line in chunk])
+        await asyncio.sleep(0)      # let live telemetry and other requests in
+    await _session_for(src).csv_writer.flush()
+
+async def _read_ingest_body(request: Request) -> bytes:
+    """The request body, read as it streams in; 413 as soon as it passes
+    INGEST_MAX_BYTES (or its Content-Length says it will), so an oversized
+    upload is never held in memory."""
+    too_large = HTTPException(413, detail=f"batch larger than {INGEST_MAX_BYTES} bytes")
+    try:
+        declared = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPException(400, detail="bad Content-Length")
+    if declared > INGEST_MAX_BYTES:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > INGEST_MAX_BYTES:
+            raise too_large
+    return bytes(body)
+
+async def ingest_backlog(lines: List[str], src: Optional[str] = None) -> None:
+    """
+    Stored lines (a backlog upload) only go into that CanSat's CSV, committed
+    at once. They are not sequence-checked, counted or broadcast: old packet
+    numbers would otherwise look like a counter reset plus thousands of lost
+    packets to the live SequenceTracker, and reach browsers as live data.
+    """
+    sess = _session_for(src)
+    if state.csv_ready:
+        sess.csv_writer.append(lines)
+    await sess.csv_writer.flush()
+    log_json(event="ingest_backlog", src=sess.src, lines=len(lines), file=str(sess.csv_writer.target()))
+
+@app.post("/api/ingest/batch")
+async def api_ingest_batch(request: Request, src: str = "", live: bool = False):
+    """
+    Many telemetry lines in one request: plain text or NDJSON, see
+    _ingest_lines(). By default they are a backlog and only appended to the
+    CSV (ingest_backlog()); with ?live=true (a remote receiver forwarding what
+    it hears now) they go through the whole pipeline like radio packets.
+    ?src= files them under that CanSat's session instead of the primary one.
+    """
+    try:
+        src = _ingest_source(src)
+    except ValueError as e:
+        raise HTTPException(400, detail=str(e))
+    body = await _read_ingest_body(request)
+    lines, rejected = _ingest_lines(body.decode("utf-8", errors="replace"))
+    if not lines:
+        raise HTTPException(400, detail="empty")
+    if live:
+        await ingest_batch(lines, src)
+    else:
+        await ingest_backlog(lines, src)
+    return {"ok": True, "lines": len(lines), "rejected": rejected, "live": live}
+
 # ---- Log switching ----
 @app.get("/api/log/current")
 async def api_log_current():
@@ -1342,29 +4417,28 @@ async def api_log_set(body: LogBody):
         label = re.sub(r"[^a-zA-Z0-9_\-]", "", raw)[:32]
 
         # Save the current session's KML before switching so no data is lost
-        await _save_kml()
+        for sess in _source_sessions():
+            await _save_kml(sess)
+        # ...and commit every buffered line to the old CSV. Other CanSats'
+        # sessions are closed; they reopen on their next packet in the new log.
+        await _csv_writer.flush()
+        await _close_secondary_sessions()
 
         state.log_label = label
+        state.csv_segment = 0
+        _select_csv_segment()
 
         # Create the new CSV with a header if it doesn't exist yet
         new_csv = get_active_csv()
         ensure_csv_header(new_csv)
+        await _csv_writer.reopen(new_csv)
 
-        # Reset KML state so this log gets its own flight path
-        state.kml_points.clear()
-        state.kml_max_alt = 0.0
-        state.kml_landed_saved = False
-        global _kml_gps_count
-        _kml_gps_count = 0
-
-        # Reset packet-loss and receive counters — fresh per-log statistics
-        state.last_pkt   = None
-        state.rx_count   = 0
-        state.loss_count = 0
-
-        # Clear ring buffer so reconnect-replay only ever shows this log's data.
-        # The new log's CSV is the authoritative history source after this point.
-        ring.clear()
+        # Reset KML state so this log gets its own flight path, and the
+        # packet-loss and receive counters — fresh per-log statistics. This
+        # also clears the ring so reconnect-replay only ever shows this log's
+        # data; the new log's CSV is the authoritative history source after this point.
+        # The primary CanSat stays primary in the new log.
+        _primary.reset()
 
         display = label or "default"
         log_json(event="log_switched", label=display, file=str(new_csv))
@@ -1485,29 +4559,90 @@ async def api_csv_save_now(payload: dict = Body(...)):
 
 # ---- WebSocket Endpoint ----
 @app.websocket("/ws/telemetry")
-async def ws_telemetry(ws: WebSocket):
+async def ws_telemetry(ws: WebSocket, src: str = "", since: Optional[int] = None, epoch: str = ""):
     """
     Manages the live connection to the browser.
-    When a browser connects, it adds it to the list to receive updates.
+    When a browser connects, it adds it to the list to receive updates:
+    telemetry of the primary CanSat, or of the one at address `src`
+    (?src=<16 hex chars, or the last 8>), plus every station-wide message.
+    ?src=replay is the replay-only channel: telemetry of a broadcast capture
+    replay (POST /api/replay?broadcast=true), numbered on its own, and pings.
+    A client offering the WS_BINARY_PROTOCOL subprotocol gets telemetry as
+    binary frames (WsBinarySchema); everything else stays JSON text. A client
+    may send {"type": "subscribe", ...} at any time to narrow what it gets
+    (WsClient.subscribe); the reply is a "subscribed" message.
+    Broadcast messages carry a "seq" number. With ?since=<seq> the first
+    message is a "replay" (WsStreamLog.replay): with the matching &epoch=,
+    everything this client missed after that seq; without, just the
+    stream's epoch and position.
+    """
+    binary = WS_BINARY_PROTOCOL in ws.scope.get("subprotocols", ())
+    await ws.accept(subprotocol=WS_BINARY_PROTOCOL if binary else None)
+    c = ws.client
+    c_info = f"{c.host}:{c.port}" if c else "unknown"
+    client = WsClient(ws, c_info, binary)
+    client.task = asyncio.create_task(client.run())
+    if binary:
+        client.send_control(ws_binary_schema().message)
+    _ws_join(client, src)
+    if since is not None:
+        # Queued before any live message can be, so nothing is missed or doubled.
+        stream = _ws_replay_stream if client in _replay_clients else _ws_stream
+        client.send_control(stream.replay(since, epoch or None, client))
+    log_json(event="ws_connected", client=c_info, protocol=WS_BINARY_PROTOCOL if binary else "json",
+             since=since)
+    try:
+        while True:
+            msg = await ws.receive_text()   # also how a disconnect is noticed
+            try:
+                msg = json.loads(msg)
+            except ValueError:
+                continue
+            if isinstance(msg, dict) and msg.get("type") == "subscribe":
+                reply = client.subscribe(msg)
+                client.send_control(_json_text(reply))
+                if client.binary and reply["type"] == "subscribed":
+                    client.send_control(ws_binary_schema(client.fields).message)
+    except (WebSocketDisconnect, RuntimeError):
+        pass    # RuntimeError: the socket was closed by WsClient.close()
+    finally:
+        # Cleanup when disconnected
+        _ws_leave(client)
+        client.closed = True
+        client.task.cancel()
+        log_json(event="ws_disconnected", client=c_info, sent=client.sent, dropped=client.dropped,
+                 max_lag_ms=round(client.lag_ms_max, 2))
+
+
+@app.websocket("/ws/ingest")
+async def ws_ingest(ws: WebSocket, src: str = ""):
+    """
+    Streaming ingest: every text message is one batch (plain lines or NDJSON,
+    as for /api/ingest/batch) and is answered with
+    {"type": "ingest_ack", "lines": n, "rejected": n, "total": n}.
     """
+    try:
+        src = _ingest_source(src)
+    except ValueError as e:
+        await ws.close(code=1008, reason=str(e))
+        return
     await ws.accept()
-    ws_clients.add(ws)
-    
     c = ws.client
     c_info = f"{c.host}:{c.port}" if c else "unknown"
-    log_json(event="ws_connected", client=c_info)
+    log_json(event="ws_ingest_connected", client=c_info, src=src)
+    total = 0
     try:
         while True:
-            await ws.receive_text()   # Keep waiting for messages (detects disconnects)
+            lines, rejected = _ingest_lines(await ws.receive_text())
+            if lines:
+                await ingest_batch(lines, src)
+                total += len(lines)
+            await ws.send_text(_json_text({"type": "ingest_ack", "lines": len(lines),
+                                           "rejected": rejected, "total": total}))
     except WebSocketDisconnect:
         pass
     finally:
-        # Cleanup when disconnected
-        ws_clients.discard(ws)
-        c = ws.client
-        c_info = f"{c.host}:{c.port}" if c else "unknown"
-        log_json(event="ws_disconnected", client=c_info)
-
+        log_json(event="ws_ingest_disconnected", client=c_info, lines=total)
 
 
 # ---- XBee address config ----
@@ -1550,6 +4685,7 @@ def _load_xbee_addr():
                 raise ValueError("address field not 8 hex chars")
             bytes.fromhex(v)
         state.xbee_dh, state.xbee_dl = dh, dl
+        _tx_frame_builder.invalidate()
         log_json(event="xbee_addr_restored", dh=dh, dl=dl)
     except Exception as e:
         log_json(level="warn", event="xbee_load_failed", error=str(e))
@@ -1592,6 +4728,7 @@ async def api_xbee_set(body: XBeeCfg):
     old = state.xbee_dh + state.xbee_dl
     state.xbee_dh = dh
     state.xbee_dl = dl
+    _tx_frame_builder.invalidate()   # next uplink rebuilds the cached header for this unit
     _save_xbee_addr()   # persist so it survives a restart
     log_json(event="xbee_addr_changed", old=old, new=dh + dl)
     await broadcast_ws({"type": "xbee_addr", "dh": dh, "dl": dl, "full": dh + dl})
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: bulk Api2FrameDecoder vs. the old one-byte-at-a-time reader.
+
+Builds a synthetic downlink capture (0x90 telemetry frames interleaved with
+0x88 ATDB responses, escapes included) and decodes it both ways from an
+in-memory serial port, so only the Python decoding cost is measured.
+
+    python scripts/bench_api2_decoder.py [--frames 20000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import main  # noqa: E402
+
+
+class MemorySerial:
+    """Just enough of serial.Serial to replay a byte string."""
+
+    def __init__(self, data: bytes, chunk: int):
+        self._data = data
+        self._pos = 0
+        self._chunk = chunk   # bytes the "driver" has buffered per bulk read
+
+    @property
+    def in_waiting(self) -> int:
+        return min(self._chunk, len(self._data) - self._pos)
+
+    def read(self, n: int = 1) -> bytes:
+        out = self._data[self._pos:self._pos + n]
+        self._pos += len(out)
+        return out
+
+
+def legacy_read_api2_frame(ser):
+    """The per-byte reader the serial thread used before Api2FrameDecoder."""
+    while True:
+        b = ser.read(1)
+        if not b:
+            return None
+        if b[0] == 0x7E:
+            break
+
+    def _read_unescaped(n):
+        buf = bytearray()
+        while len(buf) < n:
+            b = ser.read(1)
+            if not b:
+                return None
+            if b[0] == 0x7D:
+                b2 = ser.read(1)
+                if not b2:
+                    return None
+                buf.append(b2[0] ^ 0x20)
+            else:
+                buf.append(b[0])
+        return buf
+
+    length_raw = _read_unescaped(2)
+    if length_raw is None:
+        return None
+    length = (length_raw[0] << 8) | length_raw[1]
+    if length > 300:
+        return None
+    body = _read_unescaped(length + 1)
+    if body is None:
+        return None
+    if (sum(body) & 0xFF) != 0xFF:
+        return None
+    return main._parse_api2_frame(bytes(body[:length])) or {}
+
+
+def _frame(content: bytes) -> bytes:
+    checksum = (0xFF - (sum(content) & 0xFF)) & 0xFF
+    body = content + bytes([checksum])
+    return b'\x7E' + main._api2_escape(bytes([len(content) >> 8, len(content) & 0xFF])) + main._api2_escape(body)
+
+
+def build_capture(n: int) -> bytes:
+    src = bytes.fromhex("0013A200428945CD") + b'\xFF\xFE' + b'\x01'
+    out = bytearray()
+    for i in range(n):
+        line = (f"1043,00:{i // 60 % 60:02d}:{i % 60:02d},{i + 1},F,DESCENT,{500 - i % 500:.1f},"
+                f"24.3,101.1,8.1,0.42,1.1,-0.3,0.2,0.01,0.02,9.81,00:00:{i % 60:02d},"
+                f"512.4,13.7563,100.5018,{7 + i % 5},CXON,ARMED,0,123.4,87.2\r\n")
+        out += _frame(b'\x90' + src + line.encode())
+        out += _frame(b'\x88\x01DB\x00' + bytes([40 + i % 50]))
+    return bytes(out)
+
+
+def bench(capture: bytes, frames: int, chunk: int):
+    ser = MemorySerial(capture, chunk)
+    t0 = time.perf_counter()
+    got_legacy = 0
+    while ser._pos < len(capture):
+        if legacy_read_api2_frame(ser) is not None:
+            got_legacy += 1
+    t_legacy = time.perf_counter() - t0
+
+    ser = MemorySerial(capture, chunk)
+    dec = main.Api2FrameDecoder()
+    t0 = time.perf_counter()
+    got_bulk = 0
+    while ser._pos < len(capture):
+        got_bulk += len(dec.feed(ser.read(ser.in_waiting or 1)))
+    t_bulk = time.perf_counter() - t0
+
+    assert got_legacy == got_bulk == frames, (got_legacy, got_bulk, frames)
+    print(f"chunk={chunk:>5} B  per-byte: {frames / t_legacy:>10,.0f} frames/s   "
+          f"bulk: {frames / t_bulk:>10,.0f} frames/s   speedup x{t_legacy / t_bulk:.1f}")
+
+
+def main_():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--frames", type=int, default=20000, help="telemetry frames to synthesise")
+    args = ap.parse_args()
+    capture = build_capture(args.frames)
+    print(f"capture: {len(capture):,} bytes, {args.frames * 2:,} frames")
+    for chunk in (64, 512, 4096):
+        bench(capture, args.frames * 2, chunk)
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Benchmark: one-line /api/ingest vs. /api/ingest/batch vs. the /ws/ingest stream.
+
+Pushes the same synthetic telemetry lines through each ingest path of the
+running app (in-process, via FastAPI's TestClient, so there is no network in
+the numbers) and reports lines/s. Every path must leave each line in the CSV
+exactly once. CSV/KML output goes to a temporary directory.
+
+    python scripts/bench_ingest.py [--lines 5000] [--per-message 200]
+"""
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import main  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+def make_lines(n: int, first: int = 1) -> list:
+    # No GPS fix (0 sats): the periodic KML rewrite would otherwise dominate.
+    return [(f"1043,00:{i // 60 % 60:02d}:{i % 60:02d},{i},F,DESCENT,{500 - i % 500:.1f},"
+             f"24.3,101.1,8.1,0.42,1.1,-0.3,0.2,0.01,0.02,9.81,00:00:{i % 60:02d},"
+             f"512.4,13.7563,100.5018,0,CXON,ARMED,0,123.4,87.2") for i in range(first, first + n)]
+
+
+def csv_lines() -> int:
+    with open(main.get_active_csv(), encoding="utf-8") as f:
+        return sum(1 for _ in f) - 1
+
+
+def main_():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--lines", type=int, default=5000)
+    ap.add_argument("--per-message", type=int, default=200, help="lines per /ws/ingest message")
+    args = ap.parse_args()
+
+    main.logger.setLevel(logging.WARNING)
+    main.USE_SERVER_SERIAL = False
+    n = args.lines
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        main.DATA_DIR = tmp
+        main.CSV_CURRENT = tmp / "Flight_ingest.csv"
+        main.KML_CURRENT = tmp / "Flight_ingest.kml"
+        with TestClient(main.app) as client:
+            results = {}
+            # Packet numbers keep rising across the runs so none is a duplicate.
+            lines = make_lines(n, 1)
+            t0 = time.perf_counter()
+            for line in lines:
+                client.post("/api/ingest", json={"line": line})
+            client.portal.call(main._csv_writer.flush)
+            results["POST /api/ingest (1 line each)"] = time.perf_counter() - t0
+            assert csv_lines() == n
+
+            lines = make_lines(n, n + 1)
+            t0 = time.perf_counter()
+            r = client.post("/api/ingest/batch?live=true", content="\n".join(lines),
+                            headers={"Content-Type": "text/plain"})
+            results["POST /api/ingest/batch?live=true"] = time.perf_counter() - t0
+            assert r.json()["lines"] == n, r.text
+            assert csv_lines() == 2 * n
+
+            lines = make_lines(n, 2 * n + 1)
+            k = args.per_message
+            t0 = time.perf_counter()
+            with client.websocket_connect("/ws/ingest") as ws:
+                for i in range(0, n, k):
+                    ws.send_text("\n".join(lines[i:i + k]))
+                    ack = ws.receive_json()
+            results[f"WS /ws/ingest ({k} lines/message)"] = time.perf_counter() - t0
+            assert ack["total"] == n, ack
+            assert csv_lines() == 3 * n
+
+    base = results["POST /api/ingest (1 line each)"]
+    for name, t in results.items():
+        print(f"{name:<36} {n / t:>10,.0f} lines/s   x{base / t:.1f}")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Throughput benchmark: replay a capture through the full telemetry pipeline.
+
+Feeds a frame journal (logs/frames/*.gsj) or a raw UART byte capture through
+main.replay_capture() — decoder, sequence check, CSV append, parse, KML and
+JSON encoding, in the replay's own session — and prints the report. CSV/KML
+output goes to a temporary directory. Without a file, a synthetic journal of
+--frames telemetry frames is generated first.
+
+With --broadcast the packets also go through the replay's hand-off ring and
+out to --viewers simulated viewers on the replay channel (/ws/telemetry?src=replay),
+each taking --viewer-ms per send; the report then has the ring's and the
+viewers' drop counts.
+
+    python scripts/bench_replay.py [capture.gsj|capture.bin] [--frames 5000] [--realtime] [--speed 1.0]
+                                   [--broadcast [--viewers 4] [--viewer-ms 0]]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import main  # noqa: E402
+
+
+def _frame(content: bytes) -> bytes:
+    checksum = (0xFF - (sum(content) & 0xFF)) & 0xFF
+    return (b'\x7E' + main._api2_escape(bytes([len(content) >> 8, len(content) & 0xFF]))
+            + main._api2_escape(content + bytes([checksum])))
+
+
+def synth_journal(path: Path, frames: int, rate: float = 10.0):
+    """Write a journal of `frames` telemetry frames at `rate` Hz, each followed by an ATDB reply."""
+    src = bytes.fromhex("0013A200428945CD") + b'\xFF\xFE' + b'\x01'
+    t0 = time.time()
+    with open(path, "wb") as f:
+        f.write(main._JOURNAL_MAGIC)
+        for i in range(frames):
+            line = (f"1043,00:{i // 60 % 60:02d}:{i % 60:02d},{i + 1},F,DESCENT,{500 - i % 500:.1f},"
+                    f"24.3,101.1,8.1,0.42,1.1,-0.3,0.2,0.01,0.02,9.81,00:00:{i % 60:02d},"
+                    f"512.4,13.7563,100.5018,{7 + i % 5},CXON,ARMED,0,123.4,87.2\r\n")
+            for frame in (_frame(b'\x90' + src + line.encode()),
+                          _frame(b'\x88\x01DB\x00' + bytes([40 + i % 50]))):
+                f.write(main._JOURNAL_REC.pack(t0 + i / rate, main.JOURNAL_RX, len(frame)) + frame)
+
+
+class FakeSocket:
+    """Just enough of a starlette WebSocket: a send takes `delay` seconds."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.delay)
+
+    send_bytes = send_text
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def amain(args, capture: Path):
+    viewers = []
+    if args.broadcast:
+        for i in range(args.viewers):
+            client = main.WsClient(FakeSocket(args.viewer_ms / 1e3), f"viewer{i}")
+            client.task = asyncio.create_task(client.run())
+            main._ws_join(client, "replay")
+            viewers.append(client)
+    try:
+        return await main.replay_capture(capture, realtime=args.realtime, speed=args.speed,
+                                         broadcast=args.broadcast)
+    finally:
+        for client in viewers:
+            main._ws_leave(client)
+            client.task.cancel()
+
+
+def main_():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("capture", nargs="?", help="frame journal or raw byte capture")
+    ap.add_argument("--frames", type=int, default=5000, help="synthetic telemetry frames when no capture is given")
+    ap.add_argument("--realtime", action="store_true", help="pace by the recorded timestamps")
+    ap.add_argument("--speed", type=float, default=1.0, help="real-time speed-up factor")
+    ap.add_argument("--broadcast", action="store_true", help="through the hand-off ring to the replay channel")
+    ap.add_argument("--viewers", type=int, default=4, help="simulated replay channel viewers (--broadcast)")
+    ap.add_argument("--viewer-ms", type=float, default=0.0, help="per-send delay of each viewer")
+    args = ap.parse_args()
+
+    main.logger.setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        main.DATA_DIR = tmp
+        main.CSV_CURRENT = tmp / "Flight_bench.csv"
+        main.KML_CURRENT = tmp / "Flight_bench.kml"
+        if args.capture:
+            capture = Path(args.capture)
+        else:
+            capture = tmp / "synthetic.gsj"
+            synth_journal(capture, args.frames)
+        report = asyncio.run(amain(args, capture))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main_()
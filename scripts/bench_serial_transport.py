@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Benchmark: threaded serial reader vs. the asyncio (loop.add_reader) transport.
+
+A pseudo-terminal stands in for the XBee: a feeder thread writes 0x90
+telemetry frames into the master side at a fixed rate, and each transport
+reads the slave side exactly as it would a real UART. Reports per-packet
+latency (frame written -> line reaches handle_telemetry_batch) and process CPU
+time per packet. POSIX only.
+
+    python scripts/bench_serial_transport.py [--packets 2000] [--rate 200]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import main  # noqa: E402
+from serial.tools.list_ports_common import ListPortInfo  # noqa: E402
+
+
+def _frame(line: str) -> bytes:
+    content = b'\x90' + bytes.fromhex("0013A200428945CD") + b'\xFF\xFE\x01' + line.encode()
+    checksum = (0xFF - (sum(content) & 0xFF)) & 0xFF
+    return (b'\x7E' + main._api2_escape(bytes([len(content) >> 8, len(content) & 0xFF]))
+            + main._api2_escape(content + bytes([checksum])))
+
+
+async def run_once(transport: str, packets: int, rate: float) -> dict:
+    master, slave = os.openpty()
+    path = os.ttyname(slave)
+    main.serial.tools.list_ports.comports = lambda: [ListPortInfo(path)]
+    main._port_watcher.refresh()   # the transports read the cached inventory
+    main.state.cfg.port = path
+    link = main.RadioLink("bench")     # follows state.cfg, like radio0
+    main.state.csv_ready = False
+
+    sent = {}
+    latencies = []
+    done = asyncio.Event()
+
+    async def record(items):
+        now = time.perf_counter()
+        for line, _values, _src in items:
+            latencies.append(now - sent[int(line.split(",", 3)[2])])
+        if len(latencies) >= packets:
+            done.set()
+
+    main.handle_telemetry_batch = record
+    loop = asyncio.get_running_loop()
+    consumer = asyncio.create_task(main._telemetry_handoff.run())
+
+    if transport == "thread":
+        link.thread = threading.Thread(target=link.run, args=(loop,), daemon=True)
+        link.thread.start()
+    else:
+        link.transport = main.AsyncioSerialTransport(loop, link)
+        link.task = asyncio.create_task(link.transport.run())
+    while not link.connected.is_set():
+        await asyncio.sleep(0.01)
+
+    stop = threading.Event()
+
+    def drain():
+        # Swallow the ATDB queries the transport writes back so the pty never fills.
+        os.set_blocking(master, False)
+        while not stop.is_set():
+            try:
+                os.read(master, 4096)
+            except BlockingIOError:
+                time.sleep(0.001)
+            except OSError:
+                return
+
+    def feed():
+        period = 1.0 / rate
+        t_next = time.perf_counter()
+        for i in range(1, packets + 1):
+            line = f"1043,00:00:01,{i},F,DESCENT,412.3,24.3,101.1,8.1,0.42,1.1,-0.3,0.2,0.01,0.02,9.81," \
+                   f"00:00:01,512.4,13.7563,100.5018,8,CXON,ARMED,0,123.4,87.2\r\n"
+            frame = _frame(line)
+            t_next += period
+            delay = t_next - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            sent[i] = time.perf_counter()
+            os.write(master, frame)
+
+    drainer = threading.Thread(target=drain, daemon=True)
+    drainer.start()
+    cpu0 = time.process_time()
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    await asyncio.wait_for(done.wait(), timeout=packets / rate + 30)
+    cpu = time.process_time() - cpu0
+    feeder.join()
+
+    await link.stop()
+    consumer.cancel()
+    await asyncio.gather(consumer, return_exceptions=True)
+    stop.set()
+    drainer.join()
+    os.close(master)
+    os.close(slave)
+
+    lat = sorted(latencies)
+    return {
+        "p50_us": lat[len(lat) // 2] * 1e6,
+        "p99_us": lat[int(len(lat) * 0.99) - 1] * 1e6,
+        "mean_us": statistics.fmean(lat) * 1e6,
+        # Includes the feeder/drain threads; their share is the same for both runs.
+        "cpu_us_per_pkt": cpu / packets * 1e6,
+    }
+
+
+async def amain(args):
+    for transport in ("thread", "asyncio"):
+        r = await run_once(transport, args.packets, args.rate)
+        print(f"{transport:>8}: latency p50 {r['p50_us']:8.1f} us  p99 {r['p99_us']:8.1f} us  "
+              f"mean {r['mean_us']:8.1f} us   cpu {r['cpu_us_per_pkt']:8.1f} us/pkt (incl. feeder)")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--packets", type=int, default=2000)
+    ap.add_argument("--rate", type=float, default=200.0, help="packets per second")
+    main.logger.setLevel(logging.WARNING)
+    asyncio.run(amain(ap.parse_args()))
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: compiled TelemetryParser vs. the old per-line csv.reader parse.
+
+Parses synthetic lines in the 26-field flight layout of telemetry_config.json
+both ways, checks they produce identical dicts, and reports lines/sec. Then
+times building the broadcast payload: TelemetryRecord vs. pydantic Telemetry,
+and decoding the same packet from an example packed binary layout.
+
+    python scripts/bench_telemetry_parser.py [--lines 100000]
+"""
+import argparse
+import copy
+import csv
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import main  # noqa: E402
+
+
+def legacy_parse(raw: str, config: list):
+    """The per-line parse _process_telemetry_line did before TelemetryParser."""
+    reader = csv.reader([raw], skipinitialspace=True)
+    try:
+        parts = next(reader)
+    except StopIteration:
+        return None
+    parts = [p.strip() for p in parts]
+    min_required = len([x for x in config if not x.get("optional", False)])
+    if len(parts) < min_required:
+        return None
+    parsed_data = {}
+    for i, cfg in enumerate(config):
+        key = cfg.get("internal_key")
+        dtype = cfg.get("type")
+        val_str = (parts[i] if i < len(parts) else "").strip()
+        try:
+            if dtype == "int":
+                value = int(val_str) if val_str else 0
+            elif dtype == "float":
+                value = float(val_str) if val_str else 0.0
+            else:
+                value = val_str
+        except ValueError:
+            if dtype == "int":   value = 0
+            elif dtype == "float": value = 0.0
+            else:                value = ""
+        if key:
+            parsed_data[key] = value
+    return parsed_data
+
+
+def make_lines(n: int) -> list:
+    return [(f"1043,00:{i // 60 % 60:02d}:{i % 60:02d},{i + 1},F,DESCENT,{500 - i % 500:.1f},"
+             f"24.3,101.1,8.1,0.42,1.1,-0.3,0.2,0.01,0.02,9.81,00:00:{i % 60:02d},"
+             f"512.4,13.7563,100.5018,{7 + i % 5},CXON,ARMED,0,123.4,87.2") for i in range(n)]
+
+
+# Odd lines the two parsers must agree on: blanks, junk numbers, padding, quoting.
+EDGE_CASES = [
+    "1043,00:00:01,7,F,DESCENT,,24.3,101.1,8.1,0.42,1.1,-0.3,0.2,0.01,0.02,9.81,00:00:01,512.4,13.7,100.5,x,CXON,ARMED,0,1,2",
+    " 1043 , 00:00:01 ,7, F ,DESCENT,1e3,24.3,101.1,8.1,0.42,1.1,-0.3,0.2,0.01,0.02,9.81,,512.4,13.7,100.5,8,CXON,ARMED,0,1,2",
+    '1043,00:00:01,7,F,"DES,CENT",1,24.3,101.1,8.1,0.42,1.1,-0.3,0.2,0.01,0.02,9.81,t,512.4,13.7,100.5,8,"CX ON",ARMED,0,1,2',
+    "1043,00:00:01,7,F,DESCENT,1,24.3,101.1,8.1,0.42,1.1,-0.3,0.2,0.01,0.02,9.81,t,512.4,13.7,100.5,8,CXON,ARMED,0,1,2,extra",
+    "1043,00:00:01,7",
+    "",
+]
+
+
+# Example packed layout for the flight columns: (struct code, extra column options).
+PACKED_EXAMPLE = {
+    "team_id": ("H", {}), "mission_time": ("I", {"format": "hms"}), "packet_count": ("I", {}),
+    "mode": ("B", {"enum": ["F", "S"]}),
+    "state": ("B", {"enum": ["BOOT", "LAUNCH_PAD", "ASCENT", "APOGEE", "DESCENT",
+                             "PROBE_RELEASE", "PAYLOAD_RELEASE", "LANDED"]}),
+    "altitude_m": ("i", {"scale": 0.1}), "temperature_c": ("h", {"scale": 0.1}),
+    "pressure_kpa": ("H", {"scale": 0.01}), "voltage_v": ("H", {"scale": 0.01}),
+    "current_a": ("h", {"scale": 0.01}),
+    "gyro_r_dps": ("h", {"scale": 0.1}), "gyro_p_dps": ("h", {"scale": 0.1}), "gyro_y_dps": ("h", {"scale": 0.1}),
+    "accel_r_dps2": ("h", {"scale": 0.01}), "accel_p_dps2": ("h", {"scale": 0.01}), "accel_y_dps2": ("h", {"scale": 0.01}),
+    "gps_time": ("I", {"format": "hms"}), "gps_altitude_m": ("i", {"scale": 0.1}),
+    "gps_lat": ("i", {"scale": 1e-7, "decimals": 5}), "gps_lon": ("i", {"scale": 1e-7, "decimals": 5}),
+    "gps_sats": ("B", {}), "cmd_echo": ("8s", {}), "arm_state": ("B", {"enum": ["DISARMED", "ARMED"]}),
+    "deploy": ("B", {"enum": ["0", "1"]}), "yaw": ("h", {"scale": 0.1}), "heading_gps": ("h", {"scale": 0.1}),
+}
+
+
+def packed_decoder(config: list):
+    cfg = copy.deepcopy(config)
+    for col in cfg:
+        code, extra = PACKED_EXAMPLE[col["internal_key"]]
+        col["pack"] = code
+        col.update(extra)
+    return main.PackedTelemetryDecoder(
+        cfg, {"marker": 0xA5}, main._TELEMETRY_SENSOR_FIELDS,
+        tuple(main.Telemetry.model_fields[f].default for f in main._TELEMETRY_SENSOR_FIELDS))
+
+
+def main_():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--lines", type=int, default=100000)
+    args = ap.parse_args()
+
+    config = main.TELEMETRY_CONFIG
+    parser = main.TelemetryParser(config)
+    lines = make_lines(args.lines)
+    for raw in EDGE_CASES + lines[:1000]:
+        assert parser.parse(raw) == legacy_parse(raw, config), raw
+
+    t0 = time.perf_counter()
+    for raw in lines:
+        legacy_parse(raw, config)
+    t_legacy = time.perf_counter() - t0
+
+    parse = parser.parse
+    t0 = time.perf_counter()
+    for raw in lines:
+        parse(raw)
+    t_compiled = time.perf_counter() - t0
+
+    print(f"{len(config)} fields, {args.lines:,} lines")
+    print(f"  legacy:   {args.lines / t_legacy:>12,.0f} lines/s")
+    print(f"  compiled: {args.lines / t_compiled:>12,.0f} lines/s   speedup x{t_legacy / t_compiled:.1f}")
+
+    # Line -> broadcast payload dict, ground-station fields included.
+    gs = ("2024-06-08T12:00:00.000Z", 1, 0, -60)
+    t0 = time.perf_counter()
+    for raw in lines:
+        d = legacy_parse(raw, config)
+        d.update(zip(main._TELEMETRY_GS_FIELDS, gs + (raw,)))
+        main.Telemetry(**d).model_dump()
+    t_model = time.perf_counter() - t0
+
+    parse_values, make = main._telemetry_parser.parse_values, main.TelemetryRecord._make
+    t0 = time.perf_counter()
+    for raw in lines:
+        values = parse_values(raw)
+        values += gs + (raw,)
+        make(values)._asdict()
+    t_record = time.perf_counter() - t0
+
+    print(f"  pydantic Telemetry payload: {args.lines / t_model:>12,.0f} packets/s")
+    print(f"  TelemetryRecord payload:    {args.lines / t_record:>12,.0f} packets/s   speedup x{t_model / t_record:.1f}")
+
+    # The same packet as a packed binary payload (marker + struct), if the
+    # config has exactly the flight columns the example layout covers.
+    if {c.get("internal_key") for c in config} != set(PACKED_EXAMPLE):
+        return
+    dec = packed_decoder(config)
+    sample = (1043, 3723, 57, 0, 4, 4123, 243, 10110, 812, 42, 11, -3, 2, 1, 2, 981,
+              3723, 5124, 137563000, 1005018000, 8, b"CXON", 1, 0, 1234, 872)
+    payloads = [bytes([0xA5]) + dec._struct.pack(*sample)] * args.lines
+    ascii_line, values = dec.decode(payloads[0])
+    assert values == parse_values(ascii_line), ascii_line
+    assert ascii_line.startswith("1043,01:02:03,57,F,DESCENT,412.3,24.3,101.10,8.12,0.42,"), ascii_line
+    assert ",13.75630,100.50180,8,CXON,ARMED,0,123.4,87.2" in ascii_line, ascii_line
+    ascii_payloads = [(ascii_line + "\r\n").encode()] * args.lines
+    t0 = time.perf_counter()
+    for payload in payloads:
+        dec.decode(payload)
+    t_packed = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for payload in ascii_payloads:
+        parse_values(payload.decode(errors="ignore").rstrip("\r\n"))
+    t_ascii = time.perf_counter() - t0
+    print(f"  payload: {len(ascii_payloads[0])} B ASCII vs {dec.size} B packed")
+    print(f"  ASCII payload -> values:           {args.lines / t_ascii:>12,.0f} packets/s")
+    print(f"  packed payload -> values + CSV line: {args.lines / t_packed:>10,.0f} packets/s   x{t_ascii / t_packed:.2f}")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Benchmark: bytes and encode time per packet, JSON vs. the binary WebSocket protocol.
+
+Builds telemetry records for a synthetic flight (climb, apogee, descent with
+sensor noise) and encodes each one as the JSON text JSON clients get and as
+WsBinarySchema full and delta frames. Every frame is decoded back and checked
+against the record. Reports average bytes per packet and packets/s encoded,
+and the sizes for a client subscribed to everything but the raw line.
+
+    python scripts/bench_ws_binary.py [--packets 20000]
+"""
+import argparse
+import random
+import struct
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import main  # noqa: E402
+
+
+def make_lines(n: int) -> list:
+    rnd = random.Random(1043)
+    lines = []
+    for i in range(1, n + 1):
+        t = i / 4
+        alt = max(0.0, 700 - abs(t - 60) ** 2 * 0.2) + rnd.uniform(-0.3, 0.3)
+        state = "ASCENT" if t < 60 else "DESCENT" if alt > 1 else "LANDED"
+        gyro = [rnd.uniform(-5, 5) for _ in range(3)]
+        accel = [rnd.uniform(-0.2, 0.2) for _ in range(2)] + [9.81 + rnd.uniform(-0.1, 0.1)]
+        sec = int(t)
+        lines.append(
+            f"1043,00:{sec // 60 % 60:02d}:{sec % 60:02d},{i},F,{state},{alt:.1f},{24.3 - alt / 150:.1f},"
+            f"{101.3 - alt / 85:.2f},{8.1 - i / 1e5:.2f},{0.42 + rnd.uniform(-0.02, 0.02):.2f},"
+            + ",".join(f"{g:.2f}" for g in gyro + accel)
+            + f",00:{sec // 60 % 60:02d}:{sec % 60:02d},{alt + 512.4:.1f},"
+              f"{13.7563 + i * 1e-6:.6f},{100.5018 - i * 1e-6:.6f},{8 + i // 400 % 3},CXON,ARMED,0,"
+              f"{rnd.uniform(0, 360):.1f},{rnd.uniform(0, 360):.1f}")
+    return lines
+
+
+def decode(buf: bytes, schema: main.WsBinarySchema, prev: list) -> list:
+    """Reference decoder (same as decodeBinaryTelemetry in ui/app.js)."""
+    kind = buf[0]
+    n = len(schema.fields)
+    bits = buf[9:9 + (n + 7) // 8]
+    off = 9 + len(bits)
+    vals = list(prev) if kind == schema.DELTA else [None] * n
+    for i, (_, t) in enumerate(schema.fields):
+        if not bits[i >> 3] & (1 << (i & 7)):
+            continue
+        if t == "str":
+            (size,) = struct.unpack_from("<H", buf, off)
+            vals[i] = buf[off + 2:off + 2 + size].decode()
+            off += 2 + size
+        elif t == "i32":
+            vals[i] = struct.unpack_from("<i", buf, off)[0]
+            off += 4
+        elif t == "f32":
+            vals[i] = float("%.7g" % struct.unpack_from("<f", buf, off)[0])
+            off += 4
+        else:
+            vals[i] = struct.unpack_from("<d", buf, off)[0]
+            off += 8
+    assert off == len(buf)
+    return vals
+
+
+def main_():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--packets", type=int, default=20000)
+    args = ap.parse_args()
+
+    schema = main.WsBinarySchema(main.TELEMETRY_CONFIG, 1)
+    records = []
+    for i, raw in enumerate(make_lines(args.packets), 1):
+        values = main._telemetry_parser.parse_values(raw)
+        values += (main.now_utc_iso(), i, 0, -60 - i // 100 % 20, raw)
+        records.append(main.TelemetryRecord._make(values))
+
+    # Correctness: every frame decodes back to the record (floats to 7 digits).
+    enc = main.WsBinaryEncoder(schema)
+    prev = None
+    keys = [k for k, _ in schema.fields]
+    for rec in records[:2000]:
+        frame = enc.frame(rec)
+        prev = decode(frame.delta() or frame.full(), schema, prev)
+        for k, v in zip(keys, prev):
+            want = getattr(rec, k)
+            if k == "gs_ts_utc":
+                assert abs(v - main.datetime.fromisoformat(want).timestamp() * 1000) < 1e-3
+            elif isinstance(want, float) and dict(schema.fields)[k] == "f32":
+                assert v == float("%.7g" % want) or abs(v - want) <= abs(want) * 1e-6, (k, v, want)
+            else:
+                assert v == want, (k, v, want)
+
+    n = len(records)
+    t0 = time.perf_counter()
+    json_bytes = sum(len(main._json_text(rec._asdict())) for rec in records)
+    t_json = time.perf_counter() - t0
+
+    enc = main.WsBinaryEncoder(schema)
+    t0 = time.perf_counter()
+    full_bytes = sum(len(enc.frame(rec).full()) for rec in records)
+    t_full = time.perf_counter() - t0
+
+    enc = main.WsBinaryEncoder(schema)
+    t0 = time.perf_counter()
+    delta_bytes = 0
+    for rec in records:
+        frame = enc.frame(rec)
+        delta_bytes += len(frame.delta() or frame.full())
+    t_delta = time.perf_counter() - t0
+
+    # What a client subscribed without the raw echo gets (see WsClient.subscribe).
+    no_raw = tuple(f for f in main.TelemetryRecord._fields if f != "gs_raw_line")
+    enc = main.WsBinaryEncoder(main.WsBinarySchema(main.TELEMETRY_CONFIG, 1, no_raw))
+    sub_bytes = 0
+    for rec in records:
+        frame = enc.frame(rec)
+        sub_bytes += len(frame.delta() or frame.full())
+    sub_json = sum(len(main._json_text({k: v for k, v in rec._asdict().items() if k in no_raw}))
+                   for rec in records)
+
+    raw_bytes = sum(len(rec.gs_raw_line) + 2 for rec in records)
+    print(f"{n:,} packets, {len(schema.fields)} fields")
+    print(f"  JSON text:     {json_bytes / n:7.1f} B/packet   {n / t_json:>9,.0f} packets/s")
+    print(f"  binary full:   {full_bytes / n:7.1f} B/packet   {n / t_full:>9,.0f} packets/s   x{json_bytes / full_bytes:.1f} smaller")
+    print(f"  binary delta:  {delta_bytes / n:7.1f} B/packet   {n / t_delta:>9,.0f} packets/s   x{json_bytes / delta_bytes:.1f} smaller")
+    print(f"    of which gs_raw_line: {raw_bytes / n:.1f} B/packet")
+    print(f"  subscribed without gs_raw_line: JSON {sub_json / n:.1f} B/packet, "
+          f"binary delta {sub_bytes / n:.1f} B/packet   x{json_bytes / sub_bytes:.1f} smaller than full JSON")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Benchmark: WebSocket fan-out cost seen by the telemetry pipeline.
+
+Runs packets through main.handle_telemetry_batch() at a fixed rate while
+--clients fake browsers are connected, --slow of them on a link that takes
+--slow-ms per send. Compares the per-client queues (WsClient) with the old
+broadcast, which awaited every send_text() through asyncio.gather, and reports
+pipeline time per packet plus what the clients actually received. The last run
+has every client subscribed at --client-rate Hz (window last/min/max).
+
+    python scripts/bench_ws_fanout.py [--packets 400] [--rate 20] [--clients 20] [--slow 2] [--slow-ms 200] [--client-rate 2]
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import main  # noqa: E402
+
+
+class FakeSocket:
+    """Just enough of a starlette WebSocket: send_text() takes `delay` seconds."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.received = 0
+        self.bytes = 0
+
+    async def send_text(self, text: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        else:
+            await asyncio.sleep(0)
+        self.received += 1
+        self.bytes += len(text)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def legacy_broadcast(text: str, sockets: list):
+    """The broadcast before WsClient: one gather over every client per message."""
+    await asyncio.gather(*[ws.send_text(text) for ws in sockets], return_exceptions=True)
+
+
+def line(i: int) -> str:
+    return (f"1043,00:00:{i % 60:02d},{i},F,DESCENT,412.3,24.3,101.1,8.1,0.42,1.1,-0.3,0.2,0.01,0.02,9.81,"
+            f"00:00:01,512.4,13.7563,100.5018,0,CXON,ARMED,0,123.4,87.2")
+
+
+async def run(mode: str, args) -> dict:
+    main._primary.reset()
+    sockets = [FakeSocket(args.slow_ms / 1e3 if i < args.slow else 0.0) for i in range(args.clients)]
+    clients = []
+    if mode != "legacy":
+        for i, ws in enumerate(sockets):
+            client = main.WsClient(ws, f"fake{i}")
+            if mode == "decimated":
+                client.rate_hz = args.client_rate
+            client.task = asyncio.create_task(client.run())
+            main._ws_join(client)
+            clients.append(client)
+    else:
+        real = main.broadcast_telemetry
+        pending = []
+        main.broadcast_telemetry = lambda text, channel, *_: pending.append(text) or text
+
+    times = []
+    period = 1.0 / args.rate
+    t_next = time.perf_counter()
+    for i in range(1, args.packets + 1):
+        t_next += period
+        delay = t_next - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        t0 = time.perf_counter()
+        await main.handle_telemetry_batch([line(i)])
+        if mode == "legacy":
+            for text in pending:
+                await legacy_broadcast(text, sockets)
+            pending.clear()
+        times.append(time.perf_counter() - t0)
+    await asyncio.sleep(args.slow_ms / 1e3 * 2 + 0.1)
+
+    if mode != "legacy":
+        for client in clients:
+            client.close("bench")
+    else:
+        main.broadcast_telemetry = real
+    fast = [ws.received for ws in sockets[args.slow:]]
+    slow = [ws.received for ws in sockets[:args.slow]]
+    return {
+        "p50_ms": statistics.median(times) * 1e3,
+        "max_ms": max(times) * 1e3,
+        "behind_s": max(0.0, time.perf_counter() - t_next),
+        "fast_received": min(fast) if fast else 0,
+        "slow_received": min(slow) if slow else 0,
+        "dropped": sum(c.dropped for c in clients),
+        "bytes": sum(ws.bytes for ws in sockets),
+    }
+
+
+async def amain(args):
+    for mode in ("legacy", "queues", "decimated"):
+        r = await run(mode, args)
+        print(f"{mode:>9}: pipeline p50 {r['p50_ms']:7.2f} ms  max {r['max_ms']:7.2f} ms   "
+              f"fast clients got {r['fast_received']}/{args.packets}   "
+              f"slow clients got {r['slow_received']}   stale dropped {r['dropped']}   "
+              f"{r['bytes'] / 1024:,.0f} KiB sent")
+
+
+def main_():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--packets", type=int, default=400)
+    ap.add_argument("--rate", type=float, default=20.0, help="packets per second")
+    ap.add_argument("--clients", type=int, default=20)
+    ap.add_argument("--slow", type=int, default=2, help="clients on a slow link")
+    ap.add_argument("--slow-ms", type=float, default=200.0, help="per-send delay of a slow client")
+    ap.add_argument("--client-rate", type=float, default=2.0, help="rate_hz of every client in the last run")
+    args = ap.parse_args()
+
+    main.logger.setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        main.DATA_DIR = tmp
+        main.CSV_CURRENT = tmp / "Flight_fanout.csv"
+        main.KML_CURRENT = tmp / "Flight_fanout.kml"
+        asyncio.run(amain(args))
+
+
+if __name__ == "__main__":
+    main_()
@@ -77,6 +77,12 @@ if (!window.__DGS_BOOTED__) {
       // Command verification — last sent command awaiting echo from the payload
       lastSentCmd: null,
       lastCmdVerified: false,
+      // Binary telemetry (WS_BINARY_PROTOCOL): field layout + previous packet for deltas
+      wireSchema: null,
+      wirePrev: null,
+      // Resumable stream: last message seq seen and the server run it belongs to
+      streamSeq: 0,
+      streamEpoch: null,
     };
 
     // ---------- CONSTANTS (outside hot path) ----------
@@ -709,7 +715,9 @@ if (!window.__DGS_BOOTED__) {
 
       // --- AUDIO & ALTITUDE TRACKING ---
       if (typeof t.altitude_m === 'number') {
-        if (t.altitude_m > st.maxAlt) st.maxAlt = t.altitude_m;
+        // A rate-limited update (?rate=) carries the window's peak in agg.max.
+        const peak = Math.max(t.altitude_m, t.agg?.max?.altitude_m ?? -Infinity);
+        if (peak > st.maxAlt) st.maxAlt = peak;
       }
 
       if (t.state && t.state.trim() !== '' && t.state !== st.lastSpokenState) {
@@ -867,6 +875,10 @@ if (!window.__DGS_BOOTED__) {
       // 4. Update Packet Counters
       el.rxCount && (el.rxCount.textContent = t.gs_rx_count);
       el.lossCount && (el.lossCount.textContent = t.gs_loss_total);
+      // RSSI is sampled by the backend (ATDB policy) and folded into telemetry.
+      if (el.rssiLabel && typeof t.gs_rssi_dbm === 'number') {
+        el.rssiLabel.textContent = `${t.gs_rssi_dbm} dBm`;
+      }
 
       // 5. Update Time
       // Use mission time from telemetry if valid
@@ -1214,6 +1226,127 @@ if (!window.__DGS_BOOTED__) {
     }
 
     // ---------- WEBSOCKET CONNECTION (Real-time link) ----------
+    // Offered to the backend; an older backend ignores it and keeps sending JSON.
+    const WS_BINARY_PROTOCOL = 'gs.telemetry.bin.v1';
+    const utf8 = new TextDecoder();
+
+    // Decode one binary telemetry frame (layout: WsBinarySchema in main.py) into
+    // the same object a JSON telemetry message parses to. Delta frames only carry
+    // changed fields; the rest come from the previous packet.
+    function decodeBinaryTelemetry(buf) {
+      const schema = st.wireSchema;
+      const dv = new DataView(buf);
+      const kind = dv.getUint8(0);
+      if (!schema || dv.getUint32(1, true) !== schema.id) return null;
+      if (kind === 2 && !st.wirePrev) return null;
+      const fields = schema.fields;
+      const bits = new Uint8Array(buf, 9, (fields.length + 7) >> 3);
+      const vals = kind === 2 ? st.wirePrev.slice() : new Array(fields.length).fill(null);
+      let off = 9 + bits.length;
+      for (let i = 0; i < fields.length; i++) {
+        if (!(bits[i >> 3] & (1 << (i & 7)))) continue;
+        switch (fields[i].type) {
+          case 'i32': vals[i] = dv.getInt32(off, true); off += 4; break;
+          case 'f32': vals[i] = +dv.getFloat32(off, true).toPrecision(7); off += 4; break;
+          case 'f64': vals[i] = dv.getFloat64(off, true); off += 8; break;
+          case 'time': vals[i] = new Date(dv.getFloat64(off, true)).toISOString(); off += 8; break;
+          default: {
+            const len = dv.getUint16(off, true);
+            vals[i] = utf8.decode(new Uint8Array(buf, off + 2, len));
+            off += 2 + len;
+          }
+        }
+      }
+      st.wirePrev = vals;
+      // Only a frame actually shown counts as seen: a dropped one (schema
+      // mismatch) comes back in the replay after a reconnect.
+      st.streamSeq = dv.getUint32(5, true);
+      const t = {};
+      for (let i = 0; i < fields.length; i++) t[fields[i].key] = vals[i];
+      return t;
+    }
+
+    // Ask only for what the dashboard shows: the raw CSV echo (gs_raw_line) is
+    // most of each packet and only needed while the Raw box is ticked.
+    // A wall display can open the page as /?rate=2 to get at most 2 updates a
+    // second; each update then carries the window's min/max (t.agg).
+    const WS_RATE_HZ = parseFloat(new URLSearchParams(location.search).get('rate')) || null;
+    function sendSubscription() {
+      if (!st.ws || st.ws.readyState !== WebSocket.OPEN) return;
+      st.ws.send(JSON.stringify({
+        type: 'subscribe',
+        exclude: el.showRaw?.checked ? [] : ['gs_raw_line'],
+        rate_hz: WS_RATE_HZ,
+      }));
+    }
+    el.showRaw?.addEventListener('change', sendSubscription);
+
+    // One JSON message from /ws/telemetry (also each message inside a replay).
+    function handleMessage(data) {
+      if (typeof data.seq === 'number') st.streamSeq = data.seq;
+      if (data.type === 'replay') {
+        // First message after a reconnect: what was missed while away, oldest first.
+        const resumed = st.streamEpoch === data.epoch;
+        st.streamEpoch = data.epoch;
+        if (resumed && !data.complete) {
+          warn(`Reconnected — some messages since #${data.since} are no longer kept; see /api/logs for the gap.`);
+        } else if (!resumed && st.streamSeq) {
+          warn('Reconnected to a restarted backend — missed messages can\'t be replayed.');
+        } else if (data.count) {
+          info(`Reconnected — caught up on ${data.count} missed message(s).`);
+        }
+        data.messages.forEach(handleMessage);
+        st.streamSeq = data.last;
+      } else if (data.type === 'schema') {
+        st.wireSchema = data;
+        st.wirePrev = null;
+      } else if (data.type === 'subscribed') {
+        // acknowledged; nothing to show
+      } else if (data.type === 'error') {
+        err(data.message || 'Received an unknown error from backend.');
+      } else if (data.type === 'log_switched') {
+        const label = data.label || 'default';
+        if (el.activeLogLabel) el.activeLogLabel.textContent = label;
+        cmdEcho(`Log \u2192 ${data.file}`);
+        speak(`Log switched to ${label}.`);
+        resetDisplayState();   // wipe old-log data \u2014 charts fill from new incoming data
+      } else if (data.type === 'kml_saved') {
+        info(`KML auto-saved → ${data.file}`);
+      } else if (data.type === 'xbee_addr') {
+        info(`XBee address updated → ${data.full}`);
+        updateXbeePill(data.dh, data.dl);
+      } else if (data.type === 'tx_status') {
+        // Delivery receipt for the last uplink. Failures are always shown;
+        // successes are throttled so 1 Hz SIM uplinks don't flood the log.
+        if (data.ok) {
+          const now = Date.now();
+          if (now - (st._lastTxOkToast || 0) > 3000) {
+            st._lastTxOkToast = now;
+            info(`✓ Uplink delivered to CanSat`);
+          }
+        } else if (data.timeout) {
+          warn(`⚠ No delivery receipt for ${data.cmd || 'uplink'} — timed out (check address / link)`);
+        } else {
+          warn(`⚠ Uplink${data.cmd ? ` ${data.cmd}` : ''} NOT delivered — XBee status 0x${(data.delivery || 0).toString(16).toUpperCase().padStart(2, '0')} (check address / link)`);
+        }
+      } else if (data.type === 'source_session') {
+        info(`${data.primary ? 'CanSat' : 'Second CanSat'} ${data.src} heard → ${data.file}`);
+      } else if (data.type === 'telemetry_config') {
+        info(`Telemetry layout v${data.version} loaded (${data.columns} columns) → ${data.file}`);
+      } else if (data.type === 'serial_status') {
+        const lbl = document.getElementById('serialStatusLabel');
+        if (data.connected) {
+          info(`Serial reconnected on ${data.port}.`);
+          if (lbl) { lbl.textContent = `\u25cf ${data.port}`; lbl.style.color = 'var(--ok)'; }
+        } else {
+          warn(`Serial disconnected from ${data.port}. Auto-reconnecting\u2026`);
+          if (lbl) { lbl.textContent = '\u25cf disconnected'; lbl.style.color = 'var(--err)'; }
+        }
+      } else if (data.type !== 'ping') {
+        onTelemetry(data); // Process the data!
+      }
+    }
+
     function connect() {
       // Don't open a second socket if one is already live OR still connecting.
       // Guarding only on OPEN let a second socket spawn while the first was still
@@ -1237,56 +1370,27 @@ if (!window.__DGS_BOOTED__) {
       const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
       const url = `${protocol}//${window.location.host}/ws/telemetry`;
       info(`Connecting to ${url}\u2026`);
-      st.ws = new WebSocket(url);
+      // Resume from the last message seen; the first connect just learns the epoch.
+      const resume = st.streamEpoch ? `?since=${st.streamSeq}&epoch=${st.streamEpoch}` : '?since=0';
+      st.ws = new WebSocket(url + resume, [WS_BINARY_PROTOCOL]);
+      st.ws.binaryType = 'arraybuffer';
+      st.wireSchema = st.wirePrev = null;
 
       st.ws.onopen = () => {
         st.reconnectDelay = 2000; // reset backoff on success
+        sendSubscription();
         info('Backend connected.');
         setPill(true, 'Connected');
       };
 
       st.ws.onmessage = (ev) => {
         try {
-          const data = JSON.parse(ev.data);
-          if (data.type === 'error') {
-            err(data.message || 'Received an unknown error from backend.');
-          } else if (data.type === 'log_switched') {
-            const label = data.label || 'default';
-            if (el.activeLogLabel) el.activeLogLabel.textContent = label;
-            cmdEcho(`Log \u2192 ${data.file}`);
-            speak(`Log switched to ${label}.`);
-            resetDisplayState();   // wipe old-log data \u2014 charts fill from new incoming data
-          } else if (data.type === 'rssi') {
-            if (el.rssiLabel) el.rssiLabel.textContent = `${data.dbm} dBm`;
-          } else if (data.type === 'kml_saved') {
-            info(`KML auto-saved → ${data.file}`);
-          } else if (data.type === 'xbee_addr') {
-            info(`XBee address updated → ${data.full}`);
-            updateXbeePill(data.dh, data.dl);
-          } else if (data.type === 'tx_status') {
-            // Delivery receipt for the last uplink. Failures are always shown;
-            // successes are throttled so 1 Hz SIM uplinks don't flood the log.
-            if (data.ok) {
-              const now = Date.now();
-              if (now - (st._lastTxOkToast || 0) > 3000) {
-                st._lastTxOkToast = now;
-                info(`✓ Uplink delivered to CanSat`);
-              }
-            } else {
-              warn(`⚠ Uplink NOT delivered — XBee status 0x${(data.delivery || 0).toString(16).toUpperCase().padStart(2, '0')} (check address / link)`);
-            }
-          } else if (data.type === 'serial_status') {
-            const lbl = document.getElementById('serialStatusLabel');
-            if (data.connected) {
-              info(`Serial reconnected on ${data.port}.`);
-              if (lbl) { lbl.textContent = `\u25cf ${data.port}`; lbl.style.color = 'var(--ok)'; }
-            } else {
-              warn(`Serial disconnected from ${data.port}. Auto-reconnecting\u2026`);
-              if (lbl) { lbl.textContent = '\u25cf disconnected'; lbl.style.color = 'var(--err)'; }
-            }
-          } else if (data.type !== 'ping') {
-            onTelemetry(data); // Process the data!
+          if (ev.data instanceof ArrayBuffer) {
+            const t = decodeBinaryTelemetry(ev.data);
+            if (t) onTelemetry(t);
+            return;
           }
+          handleMessage(JSON.parse(ev.data));
         } catch (e) {
           warn(`Invalid JSON from backend: ${e.message}`);
         }